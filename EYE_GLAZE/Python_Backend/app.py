@@ -3,14 +3,13 @@ Flask Backend for Iris Stress Detection
 Serves ML predictions via REST API
 Port: 5000
 """
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import cv2
 import numpy as np
 import traceback
 import sys
 import os
-from pathlib import Path
 from PIL import Image
 import io
 
@@ -18,7 +17,15 @@ import io
 sys.path.append(os.path.dirname(__file__))
 
 # Import pipeline functions
-from pipeline import load_production_model, run_inference_pipeline
+from pipeline import (
+    load_production_model,
+    run_inference_pipeline,
+    MicroBatcher,
+    warmup_model,
+    PipelineCache,
+    model_file_tag
+)
+from pipeline.metrics import get_metrics, render_prometheus
 import config
 
 # Initialize Flask app
@@ -36,9 +43,28 @@ CORS(app, resources={
 # Global model variable
 model = None
 
-def initialize_model():
-    """Load the trained model on startup"""
-    global model
+# Micro-batching scheduler shared by all request threads (None = batch size 1)
+batcher = None
+
+# Content-hash cache of detection/prediction results (None = disabled)
+result_cache = None
+
+# Set once the model is loaded AND warmed up (see /ready)
+model_ready = False
+
+
+def warmup_batch_sizes():
+    """Batch sizes this process will serve (config.SERVER_SETTINGS['WARMUP_BATCH_SIZES'])."""
+    sizes = config.SERVER_SETTINGS.get('WARMUP_BATCH_SIZES')
+    if sizes:
+        return list(sizes)
+    if config.MICRO_BATCH_SETTINGS['ENABLED']:
+        return list(range(1, config.MICRO_BATCH_SETTINGS['MAX_BATCH_SIZE'] + 1))
+    return [1]
+
+def initialize_model(warmup: bool = True):
+    """Load the trained model on startup (and warm it up at every served batch size)"""
+    global model, batcher, result_cache, model_ready
     try:
         print("\n" + "="*80)
         print("🚀 INITIALIZING FLASK BACKEND")
@@ -52,6 +78,22 @@ def initialize_model():
             return False
         
         print("✅ Model loaded successfully!")
+        
+        if config.MICRO_BATCH_SETTINGS['ENABLED']:
+            batcher = MicroBatcher(model)
+            print(f"✅ Micro-batching enabled (max batch {batcher.max_batch_size}, "
+                  f"max wait {batcher.max_wait_ms:.1f} ms)")
+        
+        if config.RESULT_CACHE_SETTINGS['ENABLED']:
+            result_cache = PipelineCache(model_tag=model_file_tag(config.MODEL_PATH))
+            print(f"✅ Result cache enabled (disk tier: {config.RESULT_CACHE_SETTINGS['DISK_PATH'] or 'off'})")
+        
+        if warmup:
+            timings = warmup_model(model, warmup_batch_sizes())
+            print(f"✅ Model warmed up for batch sizes {list(timings)} "
+                  f"({sum(timings.values()):.0f} ms)")
+        
+        model_ready = True
         print("✅ Flask backend ready to serve predictions")
         print("="*80 + "\n")
         return True
@@ -80,13 +122,41 @@ def health():
         'model_status': 'loaded' if model is not None else 'not_loaded',
         'backend': 'Flask',
         'port': 5000,
+        'micro_batching': batcher.stats() if batcher is not None else None,
+        'result_cache': result_cache.stats() if result_cache is not None else None,
+        'pipeline_metrics': get_metrics().snapshot(),
         'endpoints': {
             'predict': '/predict (POST)',
-            'health': '/health (GET)'
+            'health': '/health (GET)',
+            'ready': '/ready (GET)',
+            'metrics': '/metrics (GET, Prometheus text format)'
         }
     }), 200
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 only once the model is loaded and warmed up"""
+    if not model_ready:
+        return jsonify({'ready': False}), 503
+    return jsonify({'ready': True, 'pid': os.getpid()}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint: per-stage latency quantiles and pipeline counters"""
+    gauges = {'model_ready': ('1 once the model is loaded and warmed up', int(model_ready))}
+    if batcher is not None:
+        gauges['micro_batch_queue_depth'] = ('Samples waiting for a batch', batcher.stats()['queue_depth'])
+    if result_cache is not None:
+        cache_stats = result_cache.stats()
+        gauges['result_cache_detection_entries'] = ('Detection results in memory',
+                                                    cache_stats['detection']['entries'])
+        gauges['result_cache_prediction_entries'] = ('Predictions in memory',
+                                                     cache_stats['prediction']['entries'])
+    return Response(render_prometheus(extra_gauges=gauges), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/predict', methods=['POST', 'OPTIONS'])
 def predict():
     """
@@ -149,20 +219,8 @@ def predict():
                 'error': 'Invalid image format. Please upload a valid JPG/PNG image.'
             }), 400
         
-        # Save image temporarily
-        temp_dir = Path(__file__).parent / "temp"
-        temp_dir.mkdir(exist_ok=True)
-        temp_image_path = temp_dir / f"temp_{file.filename}"
-        cv2.imwrite(str(temp_image_path), image)
-        
-        # Run inference pipeline
-        results = run_inference_pipeline(str(temp_image_path), age, model)
-        
-        # Clean up temp file
-        try:
-            temp_image_path.unlink()
-        except:
-            pass
+        # Run inference pipeline on the decoded array (no temp file, no re-decode)
+        results = run_inference_pipeline(image, age, model, batcher=batcher, cache=result_cache)
         
         # Check if pipeline was successful
         if not results.get('success'):
@@ -17,7 +17,7 @@ import io
 sys.path.append(os.path.dirname(__file__))
 
 # Import REAL detection and measurement modules  
-from detection import detect_eye_color, detect_eye_grayscale, count_tension_rings
+from detection import detect_eye_color, detect_eye_grayscale, count_tension_rings, is_grayscale_image
 from measurement import measure_pupil_diameter
 from utils import preprocess_eye_image, encode_age
 
@@ -56,9 +56,7 @@ def detect_image_type(img):
     if len(img.shape) == 2:
         return 'grayscale'
     elif img.shape[2] == 3:
-        if np.allclose(img[:,:,0], img[:,:,1]) and np.allclose(img[:,:,1], img[:,:,2]):
-            return 'grayscale'
-        return 'color'
+        return 'grayscale' if is_grayscale_image(img) else 'color'
     return 'unknown'
 
 @app.route('/predict', methods=['POST', 'OPTIONS'])
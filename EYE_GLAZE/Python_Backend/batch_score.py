@@ -0,0 +1,433 @@
+"""
+Offline Batch Scoring - Score a directory or manifest of eye images
+
+    python batch_score.py --input DIR --output results.csv [--age 30]
+    python batch_score.py --manifest subjects.csv --output results.parquet
+                          [--workers N] [--batch-size 32] [--chunk-size 256] [--model PATH]
+
+The run_inference_pipeline stages are split across processes:
+
+1. Detection, measurements and 5-channel preprocessing run in a pool of
+   CPU worker processes (spawned, so they never import TensorFlow).
+2. The parent is the only model process: it collects the preprocessed
+   samples and scores them BATCH_SIZE at a time with one forward pass
+   (predict_batch).
+3. Rows are appended to the output every CHUNK_SIZE images and flushed to
+   disk. The output doubles as the checkpoint: re-running the same command
+   skips every (image, age) already in it, so an interrupted run resumes
+   where it stopped (at most one unflushed chunk is scored again). A
+   manifest may list the same image at several ages.
+
+Manifest: CSV with a 'path' column (relative paths are resolved against the
+manifest's folder) and an optional 'age' column (default --age).
+
+Output: .csv (always available) or .parquet - a folder of part files,
+requires pyarrow. Rows are written in completion order, not input order.
+Failed images get a row with success=False and the error, and are not
+retried on resume.
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Suppress TensorFlow C++ logging before it is imported
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff'}
+
+COLUMNS = [
+    'path', 'age', 'success', 'image_type', 'stress_level', 'prediction',
+    'confidence', 'alpha', 'pupil_diameter_mm', 'ring_count', 'measurements_valid',
+    'pupil_radius_px', 'iris_radius_px', 'detection_ms', 'error'
+]
+
+Task = Tuple[str, int]
+
+
+# ============================================================================
+# INPUTS
+# ============================================================================
+
+def find_images(folder: str) -> List[str]:
+    """Every image under folder (recursive), sorted."""
+    return sorted(str(path) for path in Path(folder).rglob('*')
+                  if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def read_manifest(manifest_path: str, default_age: int) -> List[Task]:
+    """
+    [(image path, age)] from a CSV manifest with a 'path' column and an
+    optional 'age' column.
+    """
+    base = Path(manifest_path).parent
+    tasks = []
+    with open(manifest_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if 'path' not in (reader.fieldnames or []):
+            raise ValueError(f"Manifest {manifest_path} has no 'path' column")
+        for row in reader:
+            path = Path(row['path'])
+            if not path.is_absolute():
+                path = base / path
+            age = row.get('age')
+            tasks.append((str(path), int(age) if age not in (None, '') else default_age))
+    return tasks
+
+
+# ============================================================================
+# RESULT WRITERS (the output is also the checkpoint)
+# ============================================================================
+
+class CsvResultWriter:
+    """Appends rows to a CSV file, fsync'ed per chunk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._repair()
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+        if is_new:
+            self._writer.writeheader()
+            self._flush()
+
+    def _repair(self):
+        """Drop a partial last line left by a run killed mid-write."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def completed_tasks(self) -> Set[Task]:
+        with open(self.path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames != COLUMNS:
+                raise ValueError(f"{self.path} was not written by batch_score (columns differ)")
+            return {(row['path'], int(row['age'])) for row in reader}
+
+    def write(self, rows: List[Dict]):
+        self._writer.writerows(rows)
+        self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """One Parquet part file per chunk in a folder (pyarrow required)."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow), "
+                              "or write to a .csv file") from e
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.schema = pa.schema([
+            ('path', pa.string()), ('age', pa.int32()), ('success', pa.bool_()),
+            ('image_type', pa.string()), ('stress_level', pa.string()),
+            ('prediction', pa.float64()), ('confidence', pa.float64()), ('alpha', pa.float64()),
+            ('pupil_diameter_mm', pa.float64()), ('ring_count', pa.int32()),
+            ('measurements_valid', pa.bool_()), ('pupil_radius_px', pa.int32()),
+            ('iris_radius_px', pa.int32()), ('detection_ms', pa.float64()), ('error', pa.string())
+        ])
+        os.makedirs(path, exist_ok=True)
+        self._parts = sorted(name for name in os.listdir(path) if name.endswith('.parquet'))
+
+    def completed_tasks(self) -> Set[Task]:
+        tasks = set()
+        for name in self._parts:
+            table = self.pq.read_table(os.path.join(self.path, name), columns=['path', 'age'])
+            tasks.update(zip(table.column('path').to_pylist(), table.column('age').to_pylist()))
+        return tasks
+
+    def write(self, rows: List[Dict]):
+        if not rows:
+            return
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        name = f'part-{len(self._parts):05d}.parquet'
+        # Written under a temporary name so a killed run never leaves a torn part
+        temporary = os.path.join(self.path, f'.{name}.tmp')
+        self.pq.write_table(table, temporary)
+        os.replace(temporary, os.path.join(self.path, name))
+        self._parts.append(name)
+
+    def close(self):
+        pass
+
+
+def open_result_writer(output: str):
+    """Writer for output: a .parquet folder or a CSV file."""
+    if output.lower().endswith('.parquet'):
+        return ParquetResultWriter(output)
+    return CsvResultWriter(output)
+
+
+# ============================================================================
+# CPU WORKERS: detection -> measurements -> preprocessing
+# ============================================================================
+
+def _init_worker(quiet: bool):
+    import cv2
+    # One process per core already - no OpenCV thread pool on top
+    cv2.setNumThreads(1)
+    if quiet:
+        # Detectors print per image; keep the progress output readable
+        sys.stdout = open(os.devnull, 'w')
+
+
+def detect_task(task: Task) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Run the CPU stages of the pipeline for one image.
+
+    Returns:
+    --------
+    tuple: (row, sample) - sample holds the model inputs, or is None when
+           the image failed before prediction (row has the error)
+    """
+    from pipeline.inference_pipeline import run_detection, run_measurements, prepare_model_inputs
+
+    path, age = task
+    row = dict.fromkeys(COLUMNS)
+    row.update({'path': path, 'age': age, 'success': False})
+    start = time.perf_counter()
+    try:
+        detection = run_detection(path)
+        if not detection['success']:
+            row['error'] = detection.get('error', 'Detection failed')
+            return row, None
+
+        row['image_type'] = detection['image_type']
+        row['pupil_radius_px'] = int(detection['pupil'][1])
+        row['iris_radius_px'] = int(detection['iris'][1])
+
+        measurements = run_measurements(detection)
+        if measurements.get('ring_count') is None:
+            row['error'] = measurements.get('error', 'Measurement failed')
+            return row, None
+        row['pupil_diameter_mm'] = float(measurements['pupil_diameter_mm'])
+        row['ring_count'] = int(measurements['ring_count'])
+        row['measurements_valid'] = bool(measurements['measurements_valid'])
+
+        model_inputs = prepare_model_inputs(detection, measurements, age)
+        if not model_inputs['ready']:
+            row['error'] = model_inputs.get('error', 'Input preparation failed')
+            return row, None
+        return row, model_inputs
+    except Exception as e:
+        row['error'] = str(e)
+        return row, None
+    finally:
+        row['detection_ms'] = round((time.perf_counter() - start) * 1000.0, 3)
+
+
+# ============================================================================
+# MODEL PROCESS: batched prediction
+# ============================================================================
+
+def score_samples(model, pending: List[Tuple[Dict, Dict]]) -> List[Dict]:
+    """Predict every (row, model inputs) pair in one forward pass, fill the rows."""
+    import numpy as np
+    from pipeline.model_loader import predict_batch
+    from pipeline.inference_pipeline import classify_stress_level
+
+    rows = [row for row, _ in pending]
+    if not pending:
+        return rows
+    try:
+        predictions, alphas = predict_batch(
+            model,
+            np.stack([sample['pupil_img'] for _, sample in pending]).astype(np.float32, copy=False),
+            np.stack([sample['iris_img'] for _, sample in pending]).astype(np.float32, copy=False),
+            np.stack([sample['age_vector'] for _, sample in pending]).astype(np.float32, copy=False),
+            np.array([sample['ring_count'] for _, sample in pending], dtype=np.float32)
+        )
+    except Exception as e:
+        for row in rows:
+            row['error'] = f"Prediction error: {e}"
+        return rows
+
+    for index, row in enumerate(rows):
+        pred = float(predictions[index])
+        confidence = max(pred, 1 - pred)
+        row.update({
+            'success': True,
+            'prediction': pred,
+            'confidence': confidence,
+            'alpha': float(alphas[index]) if alphas is not None else None,
+            'stress_level': classify_stress_level(pred, confidence)
+        })
+    return rows
+
+
+def batch_score(tasks: Iterable[Task], output: str, model=None, model_path: Optional[str] = None,
+                workers: Optional[int] = None, batch_size: Optional[int] = None,
+                chunk_size: Optional[int] = None, limit: Optional[int] = None,
+                quiet_workers: bool = True) -> Dict:
+    """
+    Score tasks into output, skipping (path, age) pairs already in it.
+
+    Parameters:
+    -----------
+    tasks : iterable of (path, age)
+        Images to score (see find_images / read_manifest)
+    output : str
+        .csv file or .parquet folder (created, or resumed if it exists)
+    model : keras.Model, optional
+        Loaded model (default: load model_path)
+    model_path : str, optional
+        Model file (default: config.MODEL_PATH)
+    workers : int, optional
+        CPU worker processes; 0 runs the CPU stages in this process
+        (default: config.BATCH_SCORE_SETTINGS['WORKERS'])
+    batch_size, chunk_size : int, optional
+        Prediction batch size / rows per output flush (default: config)
+    limit : int, optional
+        Score at most this many new images (the rest is left for a later run)
+    quiet_workers : bool
+        Silence the detectors' per-image output in worker processes
+
+    Returns:
+    --------
+    dict: {'total', 'skipped', 'scored', 'succeeded', 'failed', 'elapsed_s', 'images_per_s'}
+    """
+    settings = config.BATCH_SCORE_SETTINGS
+    batch_size = batch_size or settings['BATCH_SIZE']
+    chunk_size = chunk_size or settings['CHUNK_SIZE']
+    if workers is None:
+        workers = settings['WORKERS']
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) - 1)
+
+    tasks = list(tasks)
+    writer = open_result_writer(output)
+    done = writer.completed_tasks()
+    remaining = [task for task in tasks if task not in done]
+    todo = remaining[:limit] if limit is not None else remaining
+    summary = {'total': len(tasks), 'skipped': len(tasks) - len(remaining),
+               'scored': 0, 'succeeded': 0, 'failed': 0}
+    print(f"📂 {len(tasks)} images, {summary['skipped']} already in {output}, scoring {len(todo)}")
+
+    if not todo:
+        writer.close()
+        return dict(summary, elapsed_s=0.0, images_per_s=0.0)
+
+    if model is None:
+        from pipeline.model_loader import load_production_model
+        model = load_production_model(model_path or config.MODEL_PATH)
+        if model is None:
+            writer.close()
+            raise RuntimeError(f"Failed to load model: {model_path or config.MODEL_PATH}")
+
+    start = time.perf_counter()
+    rows: List[Dict] = []
+    pending: List[Tuple[Dict, Dict]] = []
+
+    def flush(final: bool = False):
+        if not rows or (len(rows) < chunk_size and not final):
+            return
+        writer.write(rows)
+        summary['scored'] += len(rows)
+        summary['succeeded'] += sum(1 for row in rows if row['success'])
+        summary['failed'] += sum(1 for row in rows if not row['success'])
+        rows.clear()
+        elapsed = time.perf_counter() - start
+        print(f"📊 {summary['scored']}/{len(todo)} scored "
+              f"({summary['failed']} failed, {summary['scored'] / elapsed:.1f} img/s)")
+
+    pool = None
+    try:
+        if workers > 0:
+            # spawn: workers start clean, without this process's TensorFlow runtime
+            pool = multiprocessing.get_context('spawn').Pool(
+                workers, initializer=_init_worker, initargs=(quiet_workers,))
+            results = pool.imap_unordered(detect_task, todo, chunksize=1)
+        else:
+            results = map(detect_task, todo)
+
+        for row, sample in results:
+            if sample is None:
+                rows.append(row)
+            else:
+                pending.append((row, sample))
+                if len(pending) >= batch_size:
+                    rows.extend(score_samples(model, pending))
+                    pending.clear()
+            flush()
+
+        rows.extend(score_samples(model, pending))
+        pending.clear()
+    finally:
+        # Keep every finished row (also on Ctrl-C); unscored samples rerun on resume
+        flush(final=True)
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    summary['elapsed_s'] = elapsed
+    summary['images_per_s'] = summary['scored'] / elapsed if elapsed > 0 else 0.0
+    return summary
+
+
+def main() -> int:
+    settings = config.BATCH_SCORE_SETTINGS
+    parser = argparse.ArgumentParser(description="Resumable offline batch scoring")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help="Folder of images (searched recursively)")
+    source.add_argument('--manifest', help="CSV with 'path' and optional 'age' columns")
+    parser.add_argument('--output', required=True, help="Results .csv file or .parquet folder")
+    parser.add_argument('--age', type=int, default=settings['DEFAULT_AGE'],
+                        help="Age for images without one")
+    parser.add_argument('--workers', type=int, default=settings['WORKERS'],
+                        help="CPU worker processes (default: CPUs - 1, 0 = in process)")
+    parser.add_argument('--batch-size', type=int, default=settings['BATCH_SIZE'])
+    parser.add_argument('--chunk-size', type=int, default=settings['CHUNK_SIZE'])
+    parser.add_argument('--model', default=None, help="Model path (default: config.MODEL_PATH)")
+    parser.add_argument('--limit', type=int, default=None, help="Score at most N new images")
+    parser.add_argument('--verbose', action='store_true', help="Show the detectors' output")
+    args = parser.parse_args()
+
+    if args.input:
+        tasks = [(path, args.age) for path in find_images(args.input)]
+    else:
+        tasks = read_manifest(args.manifest, args.age)
+
+    try:
+        summary = batch_score(tasks, args.output, model_path=args.model, workers=args.workers,
+                              batch_size=args.batch_size, chunk_size=args.chunk_size,
+                              limit=args.limit, quiet_workers=not args.verbose)
+    except KeyboardInterrupt:
+        print("⚠️  Interrupted - finished rows were saved, re-run the same command to resume")
+        return 130
+    except (ImportError, RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ Done: {summary['scored']} scored ({summary['failed']} failed), "
+          f"{summary['skipped']} skipped, {summary['images_per_s']:.1f} img/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+Performance benchmarks for the backend (run from EYE_GLAZE/Python_Backend).
+
+- startup_time: import time / RSS per entry point (python -m benchmarks.startup_time)
+- pipeline_stages: per-stage timings, ring-count accuracy and /predict
+  throughput on synthetic eyes, JSON reports comparable across commits
+  (python -m benchmarks.pipeline_stages)
+- synthetic_eye: eye images with known pupil / iris / ring geometry
+"""
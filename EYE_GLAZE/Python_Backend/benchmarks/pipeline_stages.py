@@ -0,0 +1,436 @@
+"""
+Pipeline Benchmark - Per-stage timings and accuracy on synthetic eyes
+
+Every case is a synthetic eye (benchmarks/synthetic_eye.py) with known
+pupil, iris and ring geometry. Per case, the report holds:
+- timings (median / min / p90 ms) of detect_image_type, the colour or
+  grayscale detector, count_tension_rings and preprocess_eye_image
+- accuracy against the ground truth: detection error in pixels and the
+  ring count measured at the true geometry and at the detected geometry
+
+With a model file, it also times predict_single, the whole
+run_inference_pipeline (with its per-stage breakdown) and /predict
+throughput through the Flask app at several client concurrencies (result
+cache off, so every request runs the pipeline).
+
+The JSON report is meant to be kept per commit and compared:
+
+    python -m benchmarks.pipeline_stages --json before.json
+    (change the code)
+    python -m benchmarks.pipeline_stages --json after.json --compare before.json
+
+--compare prints the timing change per stage and exits with 1 if any ring
+count or detection result differs from the baseline (an optimisation that
+changes results).
+
+Usage:
+    python -m benchmarks.pipeline_stages [--quick] [--repeats N] [--model PATH]
+                                         [--requests N] [--json FILE] [--compare FILE]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+import config
+from benchmarks.synthetic_eye import make_synthetic_eye, encode_image
+
+
+REPORT_VERSION = 1
+
+# (image type, height, width, ring count)
+DEFAULT_CASES = [
+    ('color', 240, 320, 3),
+    ('color', 480, 640, 0),
+    ('color', 480, 640, 3),
+    ('color', 480, 640, 6),
+    ('color', 960, 1280, 3),
+    ('grayscale', 240, 320, 3),
+    ('grayscale', 480, 640, 0),
+    ('grayscale', 480, 640, 3),
+    ('grayscale', 480, 640, 6),
+    ('grayscale', 960, 1280, 3),
+]
+
+QUICK_CASES = [
+    ('color', 480, 640, 3),
+    ('grayscale', 480, 640, 3),
+]
+
+
+def case_name(image_type: str, height: int, width: int, ring_count: int) -> str:
+    return f'{image_type}_{width}x{height}_r{ring_count}'
+
+
+def time_stage(function: Callable, repeats: int = 5, warmup: int = 1) -> Dict:
+    """
+    Time function() (its output is silenced).
+
+    Returns:
+    --------
+    dict: {'median_ms', 'min_ms', 'p90_ms', 'runs'}
+    """
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            function()
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function()
+            samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        'median_ms': float(np.median(samples)),
+        'min_ms': float(np.min(samples)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'runs': repeats
+    }
+
+
+def _as_circle(circle) -> Optional[tuple]:
+    """((x, y), r) or (x, y, r) -> (x, y, r); None if not found."""
+    if circle is None:
+        return None
+    if len(circle) == 2:
+        (x, y), radius = circle
+    else:
+        x, y, radius = circle
+    if x is None or radius is None:
+        return None
+    return int(x), int(y), int(radius)
+
+
+# ============================================================================
+# DETECTION / MEASUREMENT / PREPROCESSING STAGES
+# ============================================================================
+
+def benchmark_case(image_type: str, height: int, width: int, ring_count: int,
+                   noise: float = 8.0, repeats: int = 5, seed: int = 0) -> Dict:
+    """
+    Time the model-free stages on one synthetic eye and score them against
+    its ground truth.
+    """
+    from detection import detect_eye_color, detect_eye_grayscale, count_tension_rings
+    from pipeline.inference_pipeline import detect_image_type
+    from utils import preprocess_eye_image, extract_eye_region
+
+    image, truth = make_synthetic_eye(height, width, ring_count=ring_count, noise=noise,
+                                      grayscale=image_type == 'grayscale', seed=seed)
+    (cx, cy), pupil_radius = truth['pupil']
+    iris_radius = truth['iris'][1]
+
+    if image_type == 'color':
+        detector_name = 'detect_eye_color'
+        detect = lambda: detect_eye_color(image)
+    else:
+        detector_name = 'detect_eye_grayscale'
+        detect = lambda: detect_eye_grayscale(image, config.DEFAULT_CONFIG,
+                                              parallel=config.PARALLEL_TIER_SETTINGS['ENABLED'])
+
+    iris_crop = extract_eye_region(image, (cx, cy), iris_radius, padding=1.3)
+
+    stages = {
+        'detect_image_type': time_stage(lambda: detect_image_type(image), repeats),
+        detector_name: time_stage(detect, repeats),
+        'count_tension_rings': time_stage(
+            lambda: count_tension_rings(image, (cx, cy), pupil_radius, (cx, cy), iris_radius), repeats),
+        'preprocess_eye_image': time_stage(lambda: preprocess_eye_image(iris_crop, config.TARGET_SIZE), repeats)
+    }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        detected_type = detect_image_type(image)
+        detection = detect()
+        rings_at_truth = count_tension_rings(image, (cx, cy), pupil_radius, (cx, cy), iris_radius)
+
+    pupil = _as_circle(detection.get('pupil')) if detection.get('success') else None
+    iris = _as_circle(detection.get('iris')) if detection.get('success') else None
+    accuracy = {
+        'image_type_correct': detected_type == truth['image_type'],
+        'detected': pupil is not None and iris is not None,
+        'pupil': list(pupil) if pupil else None,
+        'iris': list(iris) if iris else None,
+        'ring_count_truth': truth['ring_count'],
+        'ring_count_at_truth': int(rings_at_truth),
+        'ring_count_at_detection': None
+    }
+    if pupil and iris:
+        accuracy['pupil_center_error_px'] = float(np.hypot(pupil[0] - cx, pupil[1] - cy))
+        accuracy['pupil_radius_error_px'] = float(abs(pupil[2] - pupil_radius))
+        accuracy['iris_radius_error_px'] = float(abs(iris[2] - iris_radius))
+        with contextlib.redirect_stdout(io.StringIO()):
+            accuracy['ring_count_at_detection'] = int(count_tension_rings(
+                image, pupil[:2], pupil[2], iris[:2], iris[2]))
+
+    return {
+        'image_type': image_type,
+        'height': height,
+        'width': width,
+        'truth': {'pupil': [cx, cy, pupil_radius], 'iris': [cx, cy, iris_radius],
+                  'ring_radii': truth['ring_radii']},
+        'stages': stages,
+        'accuracy': accuracy
+    }
+
+
+# ============================================================================
+# MODEL STAGES
+# ============================================================================
+
+def benchmark_model(model, repeats: int = 5, noise: float = 8.0) -> Dict:
+    """
+    predict_single on one preprocessed eye, and run_inference_pipeline end
+    to end (median of its per-stage timings_ms).
+    """
+    from pipeline.model_loader import predict_single
+    from pipeline.inference_pipeline import run_inference_pipeline, run_detection, run_measurements, prepare_model_inputs
+
+    image, _ = make_synthetic_eye(480, 640, ring_count=3, noise=noise, seed=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        detection = run_detection(image)
+        if not detection['success']:
+            return {'skipped': 'synthetic eye not detected'}
+        inputs = prepare_model_inputs(detection, run_measurements(detection), 30)
+
+    predict = time_stage(lambda: predict_single(model, inputs['pupil_img'], inputs['iris_img'],
+                                                inputs['age_vector'], inputs['ring_count']), repeats)
+
+    runs = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_inference_pipeline(image, 30, model)
+        for _ in range(repeats):
+            runs.append(run_inference_pipeline(image, 30, model)['timings_ms'])
+    pipeline_ms = {stage: float(np.median([run[stage] for run in runs if stage in run]))
+                   for stage in runs[0]}
+
+    return {'predict_single': predict, 'run_inference_pipeline_ms': pipeline_ms}
+
+
+def benchmark_predict_endpoint(model, requests: int = 16, concurrency=(1, 4),
+                               noise: float = 8.0) -> Dict:
+    """
+    POST /predict through the Flask test client with distinct synthetic
+    uploads (result cache off). Uses the app's micro-batcher when enabled.
+
+    Returns:
+    --------
+    dict: {'concurrency_<n>': {'requests', 'ok', 'requests_per_s', 'latency_ms': {...}}}
+    """
+    import app as backend
+    from pipeline.batching import MicroBatcher
+
+    uploads = []
+    for index in range(requests):
+        image, _ = make_synthetic_eye(480, 640, ring_count=3, noise=noise,
+                                      grayscale=bool(index % 2), seed=index)
+        uploads.append(encode_image(image))
+
+    saved = (backend.model, backend.batcher, backend.result_cache, backend.model_ready)
+    backend.model = model
+    backend.batcher = MicroBatcher(model) if config.MICRO_BATCH_SETTINGS['ENABLED'] else None
+    backend.result_cache = None
+    backend.model_ready = True
+
+    def post(upload: bytes):
+        client = backend.app.test_client()
+        start = time.perf_counter()
+        response = client.post('/predict', data={'image': (io.BytesIO(upload), 'eye.png'), 'age': '30'},
+                               content_type='multipart/form-data')
+        return response.status_code == 200, (time.perf_counter() - start) * 1000.0
+
+    report = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            post(uploads[0])
+            for clients in concurrency:
+                with ThreadPoolExecutor(max_workers=clients) as executor:
+                    start = time.perf_counter()
+                    outcomes = list(executor.map(post, uploads))
+                    elapsed = time.perf_counter() - start
+                latencies = [latency for _, latency in outcomes]
+                report[f'concurrency_{clients}'] = {
+                    'requests': len(outcomes),
+                    'ok': sum(1 for ok, _ in outcomes if ok),
+                    'requests_per_s': len(outcomes) / elapsed,
+                    'latency_ms': {'median_ms': float(np.median(latencies)),
+                                   'p90_ms': float(np.percentile(latencies, 90))}
+                }
+    finally:
+        if backend.batcher is not None:
+            backend.batcher.close()
+        backend.model, backend.batcher, backend.result_cache, backend.model_ready = saved
+    return report
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(cases: List = None, repeats: int = 5, noise: float = 8.0,
+                   model=None, requests: int = 16) -> Dict:
+    """
+    Full benchmark report.
+
+    Parameters:
+    -----------
+    cases : list, optional
+        [(image type, height, width, ring count)] (default: DEFAULT_CASES)
+    repeats : int
+        Timed runs per stage
+    noise : float
+        Sensor noise of the synthetic eyes
+    model : keras.Model, optional
+        Model for the predict / pipeline / endpoint sections (skipped without)
+    requests : int
+        /predict requests per concurrency level
+
+    Returns:
+    --------
+    dict: {'meta', 'settings', 'cases', 'model', 'endpoint'}
+    """
+    cases = cases or DEFAULT_CASES
+    report = {
+        'meta': {
+            'report_version': REPORT_VERSION,
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'settings': {'repeats': repeats, 'noise': noise, 'requests': requests,
+                     'parallel_tiers': config.PARALLEL_TIER_SETTINGS['ENABLED']},
+        'cases': {}
+    }
+
+    for index, (image_type, height, width, ring_count) in enumerate(cases):
+        report['cases'][case_name(image_type, height, width, ring_count)] = benchmark_case(
+            image_type, height, width, ring_count, noise=noise, repeats=repeats, seed=index)
+
+    if model is None:
+        report['model'] = report['endpoint'] = {'skipped': 'no model'}
+    else:
+        report['model'] = benchmark_model(model, repeats=repeats, noise=noise)
+        report['endpoint'] = benchmark_predict_endpoint(model, requests=requests, noise=noise)
+    return report
+
+
+def compare_reports(baseline: Dict, current: Dict) -> Dict:
+    """
+    Timing changes and result changes between two reports (cases in both).
+
+    Returns:
+    --------
+    dict: {
+        'timings': {'<case>/<stage>': {'baseline_ms', 'current_ms', 'change_pct'}},
+        'result_changes': ['<case>: <field> <baseline> -> <current>', ...]
+    }
+    """
+    timings, changes = {}, []
+    for name, case in current['cases'].items():
+        old = baseline.get('cases', {}).get(name)
+        if old is None:
+            continue
+        for stage, stats in case['stages'].items():
+            if stage in old['stages']:
+                before, after = old['stages'][stage]['median_ms'], stats['median_ms']
+                timings[f'{name}/{stage}'] = {
+                    'baseline_ms': before,
+                    'current_ms': after,
+                    'change_pct': (after - before) / before * 100.0 if before else 0.0
+                }
+        for field in ('detected', 'pupil', 'iris', 'ring_count_at_truth', 'ring_count_at_detection'):
+            if old['accuracy'].get(field) != case['accuracy'].get(field):
+                changes.append(f"{name}: {field} {old['accuracy'].get(field)} -> {case['accuracy'].get(field)}")
+    return {'timings': timings, 'result_changes': changes}
+
+
+def print_report(report: Dict):
+    print(f"{'case':24s} {'stage':24s} {'median':>10s} {'p90':>10s}")
+    for name, case in report['cases'].items():
+        for stage, stats in case['stages'].items():
+            print(f"{name:24s} {stage:24s} {stats['median_ms']:8.2f}ms {stats['p90_ms']:8.2f}ms")
+        accuracy = case['accuracy']
+        detected = '✅' if accuracy['detected'] else '❌ not detected'
+        print(f"{'':24s} {detected} rings: truth {accuracy['ring_count_truth']}, "
+              f"at truth {accuracy['ring_count_at_truth']}, "
+              f"at detection {accuracy['ring_count_at_detection']}")
+
+    if 'skipped' in report['model']:
+        print(f"\n⚠️  Model stages skipped ({report['model']['skipped']})")
+        return
+    print(f"\npredict_single: {report['model']['predict_single']['median_ms']:.2f} ms")
+    stages = ', '.join(f"{stage} {ms:.1f}" for stage, ms in report['model']['run_inference_pipeline_ms'].items())
+    print(f"run_inference_pipeline (ms): {stages}")
+    for level, stats in report['endpoint'].items():
+        print(f"/predict {level}: {stats['requests_per_s']:.1f} req/s, "
+              f"median {stats['latency_ms']['median_ms']:.0f} ms ({stats['ok']}/{stats['requests']} ok)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quick', action='store_true', help='Two cases only')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--noise', type=float, default=8.0)
+    parser.add_argument('--requests', type=int, default=16, help='/predict requests per concurrency level')
+    parser.add_argument('--model', default=config.MODEL_PATH,
+                        help='Model for predict / pipeline / endpoint timings (skipped if missing)')
+    parser.add_argument('--json', help='Write the report to this file')
+    parser.add_argument('--compare', help='Baseline report to compare against')
+    args = parser.parse_args()
+
+    model = None
+    if args.model and os.path.exists(args.model):
+        from pipeline.model_loader import load_production_model
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = load_production_model(args.model)
+
+    report = run_benchmarks(QUICK_CASES if args.quick else DEFAULT_CASES, repeats=args.repeats,
+                            noise=args.noise, model=model, requests=args.requests)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report written to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            comparison = compare_reports(json.load(f), report)
+        print(f"\n{'compared to ' + args.compare:50s} {'before':>10s} {'after':>10s} {'change':>8s}")
+        for key, stats in comparison['timings'].items():
+            print(f"{key:50s} {stats['baseline_ms']:8.2f}ms {stats['current_ms']:8.2f}ms "
+                  f"{stats['change_pct']:+7.1f}%")
+        for change in comparison['result_changes']:
+            print(f"⚠️  {change}")
+        if comparison['result_changes']:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Startup Benchmark - Import time and memory per backend entry point
+
+Every entry point is imported in a fresh interpreter (cold start, module
+caches empty) and measured for:
+- import time (median over repeats)
+- peak RSS after the import (None where neither resource nor psutil is
+  available)
+- whether TensorFlow / SciPy were pulled in
+
+Detection/measurement-only entry points must not import TensorFlow; the
+report makes a regression visible immediately.
+
+Usage:
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --repeats 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (entry point, expected to load TensorFlow)
+ENTRY_POINTS = [
+    ('detection', False),
+    ('measurement', False),
+    ('utils', False),
+    ('pipeline', False),
+    ('app_production', False),
+    ('pipeline.model_loader', True),
+    ('app', True),
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            memory = psutil.Process().memory_info()
+            return getattr(memory, 'peak_wset', memory.rss) / 2 ** 20
+        except ImportError:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024.0
+
+print(json.dumps({{
+    'import_s': elapsed,
+    'peak_rss_mb': peak_rss_mb(),
+    'tensorflow': 'tensorflow' in sys.modules,
+    'scipy': 'scipy' in sys.modules
+}}))
+"""
+
+
+def measure_import(module: str) -> Dict:
+    """Import module in a fresh interpreter and return its probe measurements."""
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    result = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    # Entry points may print on import - the probe line is the last one
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_startup(entry_points: List = None, repeats: int = 3) -> Dict:
+    """
+    Cold-start import benchmark.
+
+    Parameters:
+    -----------
+    entry_points : list, optional
+        [(module, expects_tensorflow), ...] (default: ENTRY_POINTS)
+    repeats : int
+        Fresh interpreters per entry point
+
+    Returns:
+    --------
+    dict: {module: {'import_s', 'import_s_min', 'peak_rss_mb' (or None), 'tensorflow',
+                    'scipy', 'expects_tensorflow', 'ok'}}
+    """
+    report = {}
+    for module, expects_tf in entry_points or ENTRY_POINTS:
+        runs = [measure_import(module) for _ in range(repeats)]
+        errors = [run['error'] for run in runs if 'error' in run]
+        if errors:
+            report[module] = {'error': errors[0], 'ok': False}
+            continue
+        report[module] = {
+            'import_s': float(np.median([run['import_s'] for run in runs])),
+            'import_s_min': float(min(run['import_s'] for run in runs)),
+            'peak_rss_mb': (float(np.median([run['peak_rss_mb'] for run in runs]))
+                            if runs[0]['peak_rss_mb'] is not None else None),
+            'tensorflow': runs[0]['tensorflow'],
+            'scipy': runs[0]['scipy'],
+            'expects_tensorflow': expects_tf,
+            'ok': expects_tf or not runs[0]['tensorflow']
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', help='Write the report to this file')
+    args = parser.parse_args()
+
+    report = benchmark_startup(repeats=args.repeats)
+
+    print(f"{'entry point':24s} {'import':>9s} {'peak RSS':>10s}  TF    SciPy")
+    for module, stats in report.items():
+        if 'error' in stats:
+            print(f"{module:24s} ❌ {stats['error']}")
+            continue
+        flag = '' if stats['ok'] else '  ⚠️  unexpected TensorFlow import'
+        rss = f"{stats['peak_rss_mb']:8.0f}MB" if stats['peak_rss_mb'] is not None else f"{'n/a':>10s}"
+        print(f"{module:24s} {stats['import_s']:8.2f}s {rss}  "
+              f"{str(stats['tensorflow']):5s} {str(stats['scipy']):5s}{flag}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report written to {args.json}")
+
+    return 0 if all(stats['ok'] for stats in report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Synthetic Eye Generator - Eye images with known ground truth
+
+Renders sclera, iris, pupil, corneal glints and concentric tension rings at
+any resolution, so benchmarks and tests do not depend on private datasets
+and can check detector output against the true geometry:
+
+    image, truth = make_synthetic_eye(480, 640, ring_count=4, noise=8.0, seed=1)
+    truth['pupil']       # ((x, y), radius)
+    truth['ring_radii']  # radii of the rendered rings
+
+Geometry scales with min(height, width); the centre is jittered by seed.
+Grayscale eyes are returned as 3 identical channels (like a grayscale JPEG
+decoded with IMREAD_COLOR), which is what the pipeline receives.
+
+paint_eye() is the plain variant for test fixtures: pupil and iris at an
+exact centre and radius, flat colours, no rings:
+
+    image = paint_eye(500, 500, (250, 250), 30, 120, sclera=170, iris=110,
+                      pupil=15, noise=5.0, grayscale=True)
+"""
+
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+# BGR colours of the colour eye (grayscale uses their luminance)
+SCLERA_BGR = (215, 215, 215)
+IRIS_BGR = (70, 110, 150)
+RING_BGR = (25, 45, 65)
+PUPIL_BGR = (12, 12, 12)
+GLINT_BGR = (250, 250, 250)
+
+
+def make_synthetic_eye(height: int = 480, width: int = 640, ring_count: int = 3,
+                       noise: float = 8.0, glints: int = 2, grayscale: bool = False,
+                       iris_fraction: float = 0.28, pupil_fraction: float = 0.3,
+                       seed: int = 0) -> Tuple[np.ndarray, Dict]:
+    """
+    Render one eye.
+
+    Parameters:
+    -----------
+    height, width : int
+        Image size in pixels
+    ring_count : int
+        Tension rings, evenly spaced across the iris between pupil and limbus
+    noise : float
+        Standard deviation of the Gaussian sensor noise (0 = clean)
+    glints : int
+        Corneal reflections: small bright spots on the pupil
+    grayscale : bool
+        Render a grayscale eye (3 identical channels)
+    iris_fraction : float
+        Iris radius as a fraction of min(height, width)
+    pupil_fraction : float
+        Pupil radius as a fraction of the iris radius
+    seed : int
+        Random seed (centre jitter, glint positions, noise)
+
+    Returns:
+    --------
+    tuple: (image, truth)
+        - image: numpy.ndarray (height, width, 3) uint8, BGR
+        - truth: dict with 'pupil' ((x, y), r), 'iris' ((x, y), r),
+          'ring_radii' (list), 'ring_count', 'image_type' ('color' / 'grayscale')
+    """
+    rng = np.random.default_rng(seed)
+    size = min(height, width)
+    iris_radius = max(int(round(iris_fraction * size)), 8)
+    pupil_radius = max(int(round(pupil_fraction * iris_radius)), 3)
+
+    # Jitter the centre without pushing the iris out of the frame
+    jitter = 0.05 * size
+    center = (int(round(width / 2 + rng.uniform(-jitter, jitter))),
+              int(round(height / 2 + rng.uniform(-jitter, jitter))))
+
+    # Rings between the pupil and the limbus, keeping clear of both edges
+    inner, outer = pupil_radius + 0.12 * iris_radius, iris_radius - 0.08 * iris_radius
+    ring_radii = [int(round(inner + (outer - inner) * (i + 1) / (ring_count + 1)))
+                  for i in range(ring_count)]
+    ring_thickness = max(1, int(round(size / 240)))
+
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = SCLERA_BGR
+    cv2.circle(image, center, iris_radius, IRIS_BGR, -1, lineType=cv2.LINE_AA)
+    for radius in ring_radii:
+        cv2.circle(image, center, radius, RING_BGR, ring_thickness, lineType=cv2.LINE_AA)
+    cv2.circle(image, center, pupil_radius, PUPIL_BGR, -1, lineType=cv2.LINE_AA)
+
+    # Glints: inside the pupil, away from its edge
+    glint_radius = max(1, int(round(0.12 * pupil_radius)))
+    for _ in range(glints):
+        angle = rng.uniform(0, 2 * np.pi)
+        distance = rng.uniform(0.2, 0.5) * pupil_radius
+        glint = (int(round(center[0] + distance * np.cos(angle))),
+                 int(round(center[1] + distance * np.sin(angle))))
+        cv2.circle(image, glint, glint_radius, GLINT_BGR, -1, lineType=cv2.LINE_AA)
+
+    if grayscale:
+        image = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+
+    if noise > 0:
+        noisy = image.astype(np.float32)
+        sensor = rng.normal(0.0, noise, size=(height, width, 1 if grayscale else 3))
+        noisy += sensor.astype(np.float32)
+        image = np.clip(noisy, 0, 255).astype(np.uint8)
+
+    truth = {
+        'pupil': (center, pupil_radius),
+        'iris': (center, iris_radius),
+        'ring_radii': ring_radii,
+        'ring_count': ring_count,
+        'image_type': 'grayscale' if grayscale else 'color'
+    }
+    return image, truth
+
+
+def paint_eye(height: int, width: int, center: Tuple[int, int],
+              pupil_radius: int, iris_radius: int,
+              sclera: Union[int, Tuple[int, int, int]] = 215,
+              iris: Union[int, Tuple[int, int, int]] = (40, 70, 110),
+              pupil: Union[int, Tuple[int, int, int]] = (12, 12, 12),
+              noise: float = 10.0, glint: Optional[Tuple[Tuple[int, int], int]] = None,
+              grayscale: bool = False, seed: int = 0) -> np.ndarray:
+    """
+    Paint a flat eye: sclera background, filled iris and pupil discs, noise.
+
+    Parameters:
+    -----------
+    height, width : int
+        Image size in pixels
+    center : tuple
+        (x, y) of the pupil and iris
+    pupil_radius, iris_radius : int
+        Disc radii in pixels
+    sclera, iris, pupil : int or tuple
+        Gray levels (grayscale=True) or BGR colours
+    noise : float
+        Standard deviation of the Gaussian sensor noise (0 = clean)
+    glint : tuple, optional
+        ((x, y), radius) of one bright corneal reflection
+    grayscale : bool
+        Paint a single channel and return it as 3 identical channels
+    seed : int
+        Random seed for the noise
+
+    Returns:
+    --------
+    numpy.ndarray (height, width, 3) uint8, BGR
+    """
+    rng = np.random.default_rng(seed)
+    shape = (height, width) if grayscale else (height, width, 3)
+    image = np.full(shape, sclera, dtype=np.uint8)
+    cv2.circle(image, center, iris_radius, iris, -1)
+    cv2.circle(image, center, pupil_radius, pupil, -1)
+    if glint is not None:
+        cv2.circle(image, glint[0], glint[1], GLINT_BGR[0] if grayscale else GLINT_BGR, -1)
+
+    if noise > 0:
+        image = np.clip(image + rng.normal(0, noise, size=image.shape), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if grayscale else image
+
+
+def encode_image(image: np.ndarray, extension: str = '.png') -> Optional[bytes]:
+    """Encoded image bytes (what an upload to /predict carries)."""
+    ok, buffer = cv2.imencode(extension, image)
+    return buffer.tobytes() if ok else None
@@ -16,6 +16,58 @@ MODEL_NAME = "Dual-Stream Age-Aware Stress Detection Model"
 # Model was trained with optimized 70-20-10 stratified split
 # Training config: Focal Loss (α=0.5, γ=2.0), Warmup LR, 2x iris aug, 1.5x pupil aug
 
+# Serving: predict_single calls a traced tf.function (pipeline/model_loader.py)
+# instead of model.predict. XLA JIT compiles the whole forward pass - lower
+# per-request latency, but the first call pays the compilation cost.
+SERVING_JIT_COMPILE = False
+
+# Micro-batching for /predict (pipeline/batching.py): concurrent requests are
+# scored together - a batch runs when MAX_BATCH_SIZE samples are waiting or
+# MAX_WAIT_MS after the first one arrived, whichever comes first
+MICRO_BATCH_SETTINGS = {
+    'ENABLED': True,
+    'MAX_BATCH_SIZE': 8,
+    'MAX_WAIT_MS': 5.0
+}
+
+# Content-hash result cache (pipeline/result_cache.py): detection/measurements
+# per image and predictions per image + age group. Bounds apply to each tier;
+# DISK_PATH = SQLite file for a persistent tier shared by workers (None = memory only)
+RESULT_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024,
+    'MAX_BYTES': 32 * 1024 * 1024,
+    'DISK_PATH': None
+}
+
+# Production launcher (serve.py): the model is warmed up at every served batch
+# size before the server reports ready. WARMUP_BATCH_SIZES = None warms 1 and
+# every micro-batch size up to MICRO_BATCH_SETTINGS['MAX_BATCH_SIZE'].
+# Replacements for dead workers are delayed by RESPAWN_BACKOFF_S, doubling
+# (up to RESPAWN_BACKOFF_MAX_S) while replacements keep failing their warmup;
+# MAX_FAILED_RESPAWNS failures within RESPAWN_WINDOW_S stop the server.
+SERVER_SETTINGS = {
+    'HOST': '0.0.0.0',
+    'PORT': 5000,
+    'WORKERS': 2,
+    'WARMUP_BATCH_SIZES': None,
+    'READY_TIMEOUT_S': 300,
+    'RESPAWN_BACKOFF_S': 1.0,
+    'RESPAWN_BACKOFF_MAX_S': 60.0,
+    'MAX_FAILED_RESPAWNS': 5,
+    'RESPAWN_WINDOW_S': 600
+}
+
+# Offline batch scoring (batch_score.py): detection runs in WORKERS processes
+# (None = one per CPU, minus the model process), predictions in batches of
+# BATCH_SIZE, results are flushed to disk every CHUNK_SIZE rows
+BATCH_SCORE_SETTINGS = {
+    'WORKERS': None,
+    'BATCH_SIZE': 32,
+    'CHUNK_SIZE': 256,
+    'DEFAULT_AGE': 30
+}
+
 # ============================================================================
 # IMAGE PROCESSING SETTINGS
 # ============================================================================
@@ -139,6 +191,27 @@ RESCUE_CONFIG = {
 # Default config to use
 DEFAULT_CONFIG = JACKPOT_CONFIG
 
+# Parallel tier evaluation (detection/tiered.py): detect_eye_grayscale runs
+# JACKPOT / HIGH_PASS / RESCUE for pupil and iris concurrently and keeps the
+# highest-priority tier that succeeds. Worth enabling on multi-core hosts;
+# ENABLED is what the inference pipeline passes as parallel=
+PARALLEL_TIER_SETTINGS = {
+    'ENABLED': False,
+    'MAX_WORKERS': 6        # 2 detectors x 3 tiers
+}
+
+# ============================================================================
+# PYRAMID LOCALISATION (opt-in coarse-to-fine detection strategy)
+# ============================================================================
+# Used by detection/pyramid.py when detect_eye_color / detect_eye_grayscale
+# are called with pyramid=True
+PYRAMID_SETTINGS = {
+    'LEVELS': 3,            # Pyramid depth (levels below native resolution)
+    'MIN_LEVEL_DIM': 160,   # Never downscale the short image side below this
+    'CROP_FACTOR': 2.0,     # Refinement window half-size, in expected radii
+    'RADIUS_WINDOW': 0.3    # Refinement radius search: expected radius ± 30%
+}
+
 # ============================================================================
 # IRIS DETECTION SETTINGS (From Iris Notebooks)
 # ============================================================================
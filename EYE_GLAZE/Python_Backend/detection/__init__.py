@@ -9,19 +9,42 @@ Supports:
 
 import cv2
 import numpy as np
+from functools import partial
 from typing import Dict, Tuple, Optional
 
 # Grayscale detection (for grayscale pupil images)
 from .grayscale_eye import detect_pupil_robust, detect_iris_robust
 
 # Color detection (for color iris images) - HYBRID approach
-from .color_eye import detect_pupil_hybrid, detect_iris_hybrid
+from .color_eye import (
+    detect_pupil_hybrid,
+    detect_iris_hybrid,
+    detect_pupil_hybrid_roi,
+    compare_roi_detection
+)
+
+# Coarse-to-fine pyramid localisation (opt-in strategy)
+from .pyramid import (
+    detect_pupil_pyramid,
+    detect_iris_pyramid,
+    detect_pupil_hybrid_pyramid
+)
+
+# Per-image memo of preprocessing intermediates shared by all tiers
+from .context import DetectionContext
+
+# Tier fallback evaluated concurrently (detect_eye_grayscale(parallel=True))
+from .tiered import grayscale_tiers, run_tiers_parallel
+
+# Decode-once image sources (path, bytes or array)
+from .image_io import load_image, describe_source, is_grayscale_image, ImageSource
 
 # Ring counting and iris unwrapping
 from .ring_counter import (
     unwrap_iris_region,
     detect_tension_rings_radial_profile,
-    count_tension_rings as _count_tension_rings_notebook
+    count_tension_rings as _count_tension_rings_notebook,
+    count_tension_rings_batch
 )
 
 
@@ -57,17 +80,25 @@ def count_tension_rings(image: np.ndarray,
     return ring_count
 
 
-def detect_eye_color(image_path: str, brown_iris_mode: bool = False) -> Dict:
+def detect_eye_color(image_source: ImageSource, brown_iris_mode: bool = False,
+                     coarse_to_fine: bool = False, pyramid: bool = False) -> Dict:
     """
     High-level wrapper for color eye detection.
     Uses hybrid detection approach combining Normal + Stressed notebook methods.
     
     Parameters:
     -----------
-    image_path : str
-        Path to color eye image
+    image_source : str, Path, bytes or numpy.ndarray
+        Color eye image: file path, encoded bytes, or decoded BGR array
+        (arrays are used as-is, nothing is re-read from disk)
     brown_iris_mode : bool
         If True, uses brown iris detection mode (area filtering)
+    coarse_to_fine : bool
+        If True, locates the pupil at low resolution and runs the expensive
+        hybrid stages only on an ROI around it (see detect_pupil_hybrid_roi)
+    pyramid : bool
+        If True, localises the pupil on an image pyramid (see detection/pyramid.py),
+        depth from config.PYRAMID_SETTINGS
     
     Returns:
     --------
@@ -80,17 +111,21 @@ def detect_eye_color(image_path: str, brown_iris_mode: bool = False) -> Dict:
     }
     """
     try:
-        # Load image
-        import cv2
-        image = cv2.imread(image_path)
+        # Load image (decoded once, shared by every stage)
+        image = load_image(image_source)
         if image is None:
             return {
                 'success': False,
-                'error': f"Failed to load image: {image_path}"
+                'error': f"Failed to load image: {describe_source(image_source)}"
             }
         
         # Detect pupil (returns tuple: (center, radius))
-        pupil_center, pupil_radius = detect_pupil_hybrid(image_path, brown_iris_mode=brown_iris_mode)
+        if pyramid:
+            pupil_center, pupil_radius = detect_pupil_hybrid_pyramid(image, brown_iris_mode=brown_iris_mode)
+        elif coarse_to_fine:
+            pupil_center, pupil_radius = detect_pupil_hybrid_roi(image, brown_iris_mode=brown_iris_mode)
+        else:
+            pupil_center, pupil_radius = detect_pupil_hybrid(image, brown_iris_mode=brown_iris_mode)
         
         if pupil_center is None or pupil_radius is None:
             return {
@@ -121,7 +156,8 @@ def detect_eye_color(image_path: str, brown_iris_mode: bool = False) -> Dict:
         }
 
 
-def detect_eye_grayscale(image_path: str, config: dict) -> Dict:
+def detect_eye_grayscale(image_source: ImageSource, config: Optional[dict] = None,
+                         pyramid: bool = False, parallel: bool = False) -> Dict:
     """
     High-level wrapper for grayscale eye detection.
     Uses TIERED FALLBACK strategy from Pupil dataset notebook.
@@ -133,10 +169,18 @@ def detect_eye_grayscale(image_path: str, config: dict) -> Dict:
     
     Parameters:
     -----------
-    image_path : str
-        Path to grayscale eye image
-    config : dict
-        Primary configuration (usually JACKPOT_CONFIG)
+    image_source : str, Path, bytes or numpy.ndarray
+        Grayscale eye image: file path, encoded bytes, or decoded array
+        (BGR or single-channel; arrays are used as-is)
+    config : dict, optional
+        Primary configuration (default: config.DEFAULT_CONFIG, i.e. JACKPOT)
+    pyramid : bool
+        If True, every tier localises pupil/iris coarse-to-fine on an image
+        pyramid (see detection/pyramid.py), depth from config.PYRAMID_SETTINGS
+    parallel : bool
+        If True, all tiers of both detectors run concurrently on a thread
+        pool and the highest-priority successful tier wins (see
+        detection/tiered.py) - same result, worst case ~one tier's latency
     
     Returns:
     --------
@@ -150,28 +194,44 @@ def detect_eye_grayscale(image_path: str, config: dict) -> Dict:
     }
     """
     try:
-        # Load image
-        image = cv2.imread(image_path)
+        # Load image (decoded once, shared by every tier)
+        image = load_image(image_source)
         if image is None:
             return {
                 'success': False,
-                'error': f"Failed to load image: {image_path}"
+                'error': f"Failed to load image: {describe_source(image_source)}"
             }
         
         # Import tier configs (avoid circular import)
-        from config import HIGH_PASS_CONFIG, RESCUE_CONFIG
+        from config import DEFAULT_CONFIG, HIGH_PASS_CONFIG, RESCUE_CONFIG
+        if config is None:
+            config = DEFAULT_CONFIG
+        
+        # Detection strategy: native resolution or pyramid coarse-to-fine
+        if pyramid:
+            detect_pupil, detect_iris = detect_pupil_pyramid, detect_iris_pyramid
+        else:
+            detect_pupil, detect_iris = detect_pupil_robust, detect_iris_robust
+        
+        # Grayscale / blurred / inpainted / edge images computed once for all tiers
+        context = DetectionContext(image)
+        detect_pupil = partial(detect_pupil, context=context)
+        detect_iris = partial(detect_iris, context=context)
+        
+        if parallel:
+            return _detect_grayscale_parallel(image, config, detect_pupil, detect_iris)
         
         # TIER 1: Try primary config (JACKPOT)
         print(f"🔍 Trying TIER 1 (JACKPOT)...")
-        pupil_x, pupil_y, pupil_radius = detect_pupil_robust(image, config)
-        iris_x, iris_y, iris_radius = detect_iris_robust(image, config)
+        pupil_x, pupil_y, pupil_radius = detect_pupil(image, config)
+        iris_x, iris_y, iris_radius = detect_iris(image, config)
         
         config_used = "JACKPOT"
         
         # TIER 2: If pupil failed, try HIGH_PASS
         if pupil_x is None:
             print(f"   ⚠️  Pupil failed, trying TIER 2 (HIGH_PASS)...")
-            pupil_x, pupil_y, pupil_radius = detect_pupil_robust(image, HIGH_PASS_CONFIG)
+            pupil_x, pupil_y, pupil_radius = detect_pupil(image, HIGH_PASS_CONFIG)
             if pupil_x is not None:
                 config_used = "HIGH_PASS"
                 print(f"   ✅ Pupil rescued with HIGH_PASS!")
@@ -179,7 +239,7 @@ def detect_eye_grayscale(image_path: str, config: dict) -> Dict:
         # TIER 2: If iris failed, try HIGH_PASS
         if iris_x is None:
             print(f"   ⚠️  Iris failed, trying TIER 2 (HIGH_PASS)...")
-            iris_x, iris_y, iris_radius = detect_iris_robust(image, HIGH_PASS_CONFIG)
+            iris_x, iris_y, iris_radius = detect_iris(image, HIGH_PASS_CONFIG)
             if iris_x is not None:
                 config_used = "HIGH_PASS"
                 print(f"   ✅ Iris rescued with HIGH_PASS!")
@@ -187,14 +247,14 @@ def detect_eye_grayscale(image_path: str, config: dict) -> Dict:
         # TIER 3: If still failing, try RESCUE (last resort)
         if pupil_x is None:
             print(f"   ⚠️  Pupil still failing, trying TIER 3 (RESCUE)...")
-            pupil_x, pupil_y, pupil_radius = detect_pupil_robust(image, RESCUE_CONFIG)
+            pupil_x, pupil_y, pupil_radius = detect_pupil(image, RESCUE_CONFIG)
             if pupil_x is not None:
                 config_used = "RESCUE"
                 print(f"   ✅ Pupil rescued with RESCUE!")
         
         if iris_x is None:
             print(f"   ⚠️  Iris still failing, trying TIER 3 (RESCUE)...")
-            iris_x, iris_y, iris_radius = detect_iris_robust(image, RESCUE_CONFIG)
+            iris_x, iris_y, iris_radius = detect_iris(image, RESCUE_CONFIG)
             if iris_x is not None:
                 config_used = "RESCUE"
                 print(f"   ✅ Iris rescued with RESCUE!")
@@ -231,6 +291,38 @@ def detect_eye_grayscale(image_path: str, config: dict) -> Dict:
         }
 
 
+def _detect_grayscale_parallel(image, config: dict, detect_pupil, detect_iris) -> Dict:
+    """detect_eye_grayscale body for parallel=True (same result as the sequential tiers)."""
+    tiers = grayscale_tiers(config)
+    print(f"🔍 Trying {len(tiers)} tiers in parallel...")
+    outcome = run_tiers_parallel(image, tiers, detect_pupil, detect_iris)
+    
+    if outcome['pupil_tier'] is None:
+        return {
+            'success': False,
+            'error': "Pupil detection failed (all tiers exhausted)"
+        }
+    
+    if outcome['iris_tier'] is None:
+        return {
+            'success': False,
+            'error': "Iris detection failed (all tiers exhausted)"
+        }
+    
+    # Same label as the sequential path: the latest tier either part needed
+    config_used = tiers[max(outcome['pupil_tier'], outcome['iris_tier'])][0]
+    print(f"   🎯 Detection successful using {config_used} config! "
+          f"({outcome['passes_run']} of {2 * len(tiers)} passes run)")
+    
+    return {
+        'success': True,
+        'pupil': outcome['pupil'],
+        'iris': outcome['iris'],
+        'image': image,
+        'config_used': config_used
+    }
+
+
 __all__ = [
     # Grayscale detection (Pupil dataset)
     'detect_pupil_robust',
@@ -239,11 +331,28 @@ __all__ = [
     # Color detection (Iris dataset) - HYBRID
     'detect_pupil_hybrid',
     'detect_iris_hybrid',
+    'detect_pupil_hybrid_roi',
+    'compare_roi_detection',
+    
+    # Pyramid coarse-to-fine localisation
+    'detect_pupil_pyramid',
+    'detect_iris_pyramid',
+    'detect_pupil_hybrid_pyramid',
+    
+    # Tier fallback
+    'DetectionContext',
+    'grayscale_tiers',
+    'run_tiers_parallel',
     
     # Ring counting and unwrapping
     'unwrap_iris_region',
     'detect_tension_rings_radial_profile',
     'count_tension_rings',
+    'count_tension_rings_batch',
+    
+    # Image sources
+    'load_image',
+    'is_grayscale_image',
     
     # High-level wrappers for pipeline
     'detect_eye_color',
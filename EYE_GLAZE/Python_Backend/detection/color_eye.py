@@ -14,10 +14,14 @@ Authors: Extracted from both notebooks
 Date: 2025-11-12
 """
 
+import time
 import cv2
 import numpy as np
-from pathlib import Path
-from typing import Tuple, Optional, Union
+from typing import Dict, Tuple, Optional
+
+from .polar_grid import get_polar_offsets
+from .image_io import load_image, describe_source, ImageSource
+from utils.cv_cache import get_clahe, get_structuring_element
 
 
 # ============================================================================
@@ -45,7 +49,7 @@ def normalize_brightness(image: np.ndarray) -> np.ndarray:
     l, a, b = cv2.split(lab)
     
     # Apply CLAHE to L channel (brightness)
-    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+    clahe = get_clahe(3.0, (8, 8))
     l_clahe = clahe.apply(l)
     
     # Merge back
@@ -76,7 +80,7 @@ def remove_glints_enhanced(gray_image: np.ndarray) -> np.ndarray:
     
     # Additional detection: bright spots in dark regions (pupil area)
     dark_regions = (gray_image < 80).astype(np.uint8)
-    local_bright = cv2.dilate(dark_regions, np.ones((15, 15), np.uint8))
+    local_bright = cv2.dilate(dark_regions, get_structuring_element(cv2.MORPH_RECT, (15, 15)))
     local_bright_spots = ((gray_image > 180) & (local_bright > 0)).astype(np.uint8)
     
     # Combine both glint detection methods
@@ -84,7 +88,7 @@ def remove_glints_enhanced(gray_image: np.ndarray) -> np.ndarray:
     
     # Dilate glint mask to ensure complete coverage
     if np.any(glint_mask):
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        kernel = get_structuring_element(cv2.MORPH_ELLIPSE, (5, 5))
         glint_mask = cv2.dilate(glint_mask, kernel, iterations=1)
         
         # Inpaint with larger radius for better filling
@@ -118,7 +122,7 @@ def segment_pupil_hybrid(image: np.ndarray, image_normalized: np.ndarray) -> np.
     gray = remove_glints_enhanced(gray)
     
     # Enhanced preprocessing
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    clahe = get_clahe(2.0, (8, 8))
     enhanced = clahe.apply(gray)
     blurred = cv2.GaussianBlur(enhanced, (3, 3), 1.0)
     
@@ -207,11 +211,11 @@ def refine_pupil_mask(pupil_mask: np.ndarray) -> np.ndarray:
         Refined binary mask
     """
     # Remove small noise
-    kernel_open = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    kernel_open = get_structuring_element(cv2.MORPH_ELLIPSE, (5, 5))
     mask = cv2.morphologyEx(pupil_mask, cv2.MORPH_OPEN, kernel_open)
     
     # Fill small holes
-    kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+    kernel_close = get_structuring_element(cv2.MORPH_ELLIPSE, (7, 7))
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel_close)
     
     # Flood fill large holes
@@ -220,7 +224,7 @@ def refine_pupil_mask(pupil_mask: np.ndarray) -> np.ndarray:
         cv2.drawContours(mask, contours, -1, 255, -1)
     
     # Smooth boundaries
-    kernel_smooth = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+    kernel_smooth = get_structuring_element(cv2.MORPH_ELLIPSE, (7, 7))
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel_smooth)
     
     return mask
@@ -343,7 +347,7 @@ def fit_circle_to_contour(contour) -> Tuple[Optional[Tuple[int, int]], Optional[
     return (int(cx), int(cy)), int(radius)
 
 
-def detect_pupil_hybrid(image_path: Union[str, Path, np.ndarray],
+def detect_pupil_hybrid(image_path: ImageSource,
                         brown_iris_mode: bool = False) -> Tuple[Optional[Tuple[int, int]], Optional[int]]:
     """
     HYBRID pupil detection combining best of both notebooks.
@@ -357,7 +361,7 @@ def detect_pupil_hybrid(image_path: Union[str, Path, np.ndarray],
     6. Circle fitting (Both)
     
     Args:
-        image_path: Path to image OR numpy array
+        image_path: Path to image, encoded image bytes, OR numpy array
         brown_iris_mode: If True, use area constraints for brown iris (2463-4300 px²)
                          If False, use adaptive constraints for any image
     
@@ -366,11 +370,8 @@ def detect_pupil_hybrid(image_path: Union[str, Path, np.ndarray],
         center: (x, y) tuple of pupil center
         radius: int pupil radius in pixels
     """
-    # Load image
-    if isinstance(image_path, (str, Path)):
-        img = cv2.imread(str(image_path))
-    else:
-        img = image_path
+    # Load image (path, encoded bytes or decoded array)
+    img = load_image(image_path)
     
     if img is None:
         return None, None
@@ -400,6 +401,143 @@ def detect_pupil_hybrid(image_path: Union[str, Path, np.ndarray],
     return center, radius
 
 
+# ============================================================================
+# COARSE-TO-FINE (ROI) PUPIL DETECTION
+# ============================================================================
+
+# Longest side of the low-resolution image used to find the pupil candidate
+ROI_COARSE_MAX_DIM = 640
+# ROI half-size in pupil radii (iris search reaches 4.5x the pupil radius)
+ROI_SIZE_FACTOR = 6.0
+
+
+def detect_pupil_hybrid_roi(image_path: ImageSource,
+                            brown_iris_mode: bool = False,
+                            coarse_max_dim: int = ROI_COARSE_MAX_DIM,
+                            roi_size_factor: float = ROI_SIZE_FACTOR) -> Tuple[Optional[Tuple[int, int]], Optional[int]]:
+    """
+    Coarse-to-fine pupil detection for high-resolution captures.
+    
+    Pipeline:
+    1. Downscale so the longest side is coarse_max_dim and locate a pupil candidate
+    2. Crop an ROI around the candidate at full resolution
+    3. Run the full hybrid pipeline (normalisation, glints, HSV, morphology) on the ROI only
+    4. Map the result back to full-resolution coordinates
+    
+    Falls back to full-frame detect_pupil_hybrid when the image is already small
+    or when either the coarse or the ROI pass finds nothing.
+    
+    Args:
+        image_path: Path to image, encoded image bytes, OR numpy array
+        brown_iris_mode: Area constraints for brown iris (applied on the ROI pass)
+        coarse_max_dim: Longest side of the coarse image
+        roi_size_factor: ROI half-size in pupil radii
+    
+    Returns:
+        (center, radius) or (None, None) in full-resolution coordinates
+    """
+    img = load_image(image_path)
+    
+    if img is None:
+        return None, None
+    
+    h, w = img.shape[:2]
+    scale = coarse_max_dim / max(h, w)
+    
+    if scale >= 1.0:
+        return detect_pupil_hybrid(img, brown_iris_mode=brown_iris_mode)
+    
+    # Stage 1: Coarse candidate (adaptive constraints - brown iris areas are full-res px²)
+    coarse = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))),
+                        interpolation=cv2.INTER_AREA)
+    coarse_center, coarse_radius = detect_pupil_hybrid(coarse, brown_iris_mode=False)
+    
+    if coarse_center is None:
+        return detect_pupil_hybrid(img, brown_iris_mode=brown_iris_mode)
+    
+    # Stage 2: ROI around the candidate at full resolution
+    cx, cy = int(coarse_center[0] / scale), int(coarse_center[1] / scale)
+    half_size = int(max((coarse_radius + 1) / scale * roi_size_factor, 32))
+    
+    x0, y0 = max(0, cx - half_size), max(0, cy - half_size)
+    x1, y1 = min(w, cx + half_size + 1), min(h, cy + half_size + 1)
+    
+    center, radius = detect_pupil_hybrid(img[y0:y1, x0:x1], brown_iris_mode=brown_iris_mode)
+    
+    if center is None:
+        return detect_pupil_hybrid(img, brown_iris_mode=brown_iris_mode)
+    
+    # Stage 3: Back to full-resolution coordinates
+    return (center[0] + x0, center[1] + y0), radius
+
+
+def compare_roi_detection(image_source: ImageSource,
+                          brown_iris_mode: bool = False,
+                          coarse_max_dim: int = ROI_COARSE_MAX_DIM,
+                          roi_size_factor: float = ROI_SIZE_FACTOR) -> Dict:
+    """
+    Run full-frame and coarse-to-fine detection on the same image and report
+    timing and accuracy deltas (ROI result vs full-frame result).
+    
+    Args:
+        image_source: Path to image, encoded image bytes, OR numpy array
+        brown_iris_mode: Passed to both detectors
+        coarse_max_dim: Longest side of the coarse image
+        roi_size_factor: ROI half-size in pupil radii
+    
+    Returns:
+        dict: {
+            'full': {'pupil': (center, radius), 'iris': (center, radius), 'time_ms': float},
+            'roi': {'pupil': (center, radius), 'iris': (center, radius), 'time_ms': float},
+            'speedup': float (full time / ROI time),
+            'pupil_center_delta_px': float or None,
+            'pupil_radius_delta_px': int or None,
+            'iris_radius_delta_px': int or None
+        }
+    """
+    img = load_image(image_source)
+    
+    if img is None:
+        return {'error': f"Failed to load image: {describe_source(image_source)}"}
+    
+    def run(pupil_detector, **kwargs):
+        start = time.perf_counter()
+        pupil_center, pupil_radius = pupil_detector(img, brown_iris_mode=brown_iris_mode, **kwargs)
+        iris_center, iris_radius = detect_iris_hybrid(img, pupil_center, pupil_radius)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return {
+            'pupil': (pupil_center, pupil_radius),
+            'iris': (iris_center, iris_radius),
+            'time_ms': elapsed_ms
+        }
+    
+    full = run(detect_pupil_hybrid)
+    roi = run(detect_pupil_hybrid_roi, coarse_max_dim=coarse_max_dim, roi_size_factor=roi_size_factor)
+    
+    (full_pupil_center, full_pupil_radius), (roi_pupil_center, roi_pupil_radius) = full['pupil'], roi['pupil']
+    full_iris_radius, roi_iris_radius = full['iris'][1], roi['iris'][1]
+    
+    pupil_center_delta = None
+    pupil_radius_delta = None
+    if full_pupil_center is not None and roi_pupil_center is not None:
+        pupil_center_delta = float(np.hypot(roi_pupil_center[0] - full_pupil_center[0],
+                                            roi_pupil_center[1] - full_pupil_center[1]))
+        pupil_radius_delta = roi_pupil_radius - full_pupil_radius
+    
+    iris_radius_delta = None
+    if full_iris_radius is not None and roi_iris_radius is not None:
+        iris_radius_delta = roi_iris_radius - full_iris_radius
+    
+    return {
+        'full': full,
+        'roi': roi,
+        'speedup': full['time_ms'] / roi['time_ms'] if roi['time_ms'] > 0 else None,
+        'pupil_center_delta_px': pupil_center_delta,
+        'pupil_radius_delta_px': pupil_radius_delta,
+        'iris_radius_delta_px': iris_radius_delta
+    }
+
+
 # ============================================================================
 # IRIS DETECTION - HYBRID APPROACH
 # ============================================================================
@@ -427,22 +565,11 @@ def detect_iris_gradient_based(image: np.ndarray,
     if pupil_center is None or pupil_radius is None:
         return None, None
     
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    h, w = gray.shape
-    
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (5, 5), 1.0)
-    
-    # Calculate gradients
-    sobelx = cv2.Sobel(blurred, cv2.CV_64F, 1, 0, ksize=3)
-    sobely = cv2.Sobel(blurred, cv2.CV_64F, 0, 1, ksize=3)
-    gradient_magnitude = np.sqrt(sobelx**2 + sobely**2)
-    
+    h, w = image.shape[:2]
     px, py = pupil_center
     
     # Sample points in multiple directions (angles)
     num_angles = 36  # Sample every 10 degrees
-    angles = np.linspace(0, 2*np.pi, num_angles, endpoint=False)
     
     # Search range for iris boundary
     min_search_radius = int(pupil_radius * 1.8)  # Start searching after pupil
@@ -455,36 +582,44 @@ def detect_iris_gradient_based(image: np.ndarray,
     if min_search_radius >= max_search_radius:
         return None, None
     
-    detected_radii = []
+    # Only the annulus bounding box is needed. The margin covers the Gaussian (2px)
+    # and Sobel (1px) apertures so gradients inside the box match a full-frame pass.
+    margin = 4
+    x0 = max(0, px - max_search_radius - margin)
+    y0 = max(0, py - max_search_radius - margin)
+    x1 = min(w, px + max_search_radius + margin + 1)
+    y1 = min(h, py + max_search_radius + margin + 1)
     
-    # For each angle, search radially for the iris boundary
-    for angle in angles:
-        dx = np.cos(angle)
-        dy = np.sin(angle)
-        
-        # Sample gradient along this radial line
-        radii = np.arange(min_search_radius, max_search_radius, 1)
-        max_grad = 0
-        best_radius = None
-        
-        for r in radii:
-            x = int(px + r * dx)
-            y = int(py + r * dy)
-            
-            # Check bounds
-            if x < 0 or x >= w or y < 0 or y >= h:
-                break
-            
-            # Get gradient at this point
-            grad = gradient_magnitude[y, x]
-            
-            if grad > max_grad:
-                max_grad = grad
-                best_radius = r
-        
-        # Only accept if gradient is strong enough (clear edge)
-        if best_radius is not None and max_grad > 10:
-            detected_radii.append(best_radius)
+    gray = cv2.cvtColor(image[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+    
+    # Apply Gaussian blur to reduce noise
+    blurred = cv2.GaussianBlur(gray, (5, 5), 1.0)
+    
+    # Calculate gradients (float32 magnitude - Sobel of uint8 is integer valued,
+    # so the ordering and the > 10 threshold are the same as in float64)
+    sobelx = cv2.Sobel(blurred, cv2.CV_32F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(blurred, cv2.CV_32F, 0, 1, ksize=3)
+    gradient_magnitude = cv2.magnitude(sobelx, sobely)
+    
+    # Sample all rays at once: (radius x angle) grid, column k is the ray at angle k
+    radii = np.arange(min_search_radius, max_search_radius, 1)
+    offsets_x, offsets_y = get_polar_offsets(min_search_radius, max_search_radius, num_angles)
+    xs = (px + offsets_x).astype(np.intp)
+    ys = (py + offsets_y).astype(np.intp)
+    
+    # A ray stops at its first out-of-bounds sample
+    in_bounds = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    in_bounds = np.logical_and.accumulate(in_bounds, axis=0)
+    
+    grads = gradient_magnitude[np.clip(ys - y0, 0, y1 - y0 - 1), np.clip(xs - x0, 0, x1 - x0 - 1)]
+    grads[~in_bounds] = 0
+    
+    # Strongest edge along each ray (first one on ties, like a strict > scan)
+    best_idx = np.argmax(grads, axis=0)
+    max_grad = grads[best_idx, np.arange(num_angles)]
+    
+    # Only accept if gradient is strong enough (clear edge)
+    detected_radii = radii[best_idx[max_grad > 10]]
     
     # Need at least 50% of radial samples to succeed
     if len(detected_radii) < num_angles * 0.5:
@@ -0,0 +1,107 @@
+"""
+Detection Context - Per-image memo of preprocessing intermediates
+
+The grayscale tiers (JACKPOT / HIGH_PASS / RESCUE) only differ in
+thresholds, yet every detect_pupil_robust / detect_iris_robust call starts
+again from cvtColor + medianBlur (+ inpaint / Canny). A DetectionContext is
+created once per image and hands out each intermediate keyed by the
+parameters that produced it, so identical work happens once per image:
+
+    context = DetectionContext(image)
+    detect_pupil_robust(image, JACKPOT_CONFIG, context=context)
+    detect_pupil_robust(image, HIGH_PASS_CONFIG, context=context)  # reuses gray + blur
+
+Safe to share between the threads of the parallel tier mode: each entry is
+computed by exactly one thread while the others wait for it. Returned
+arrays are shared - callers must treat them as read-only.
+"""
+
+import threading
+from typing import Callable, Dict, Hashable, List
+
+import cv2
+import numpy as np
+
+
+class DetectionContext:
+    """Memoised grayscale / blurred / inpainted / edge images of one BGR image."""
+
+    def __init__(self, image: np.ndarray):
+        """
+        Parameters:
+        -----------
+        image : numpy.ndarray
+            BGR eye image (must not change while the context is in use)
+        """
+        self.image = image
+        self._entries: Dict[Hashable, object] = {}
+        self._computing: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _memo(self, key: Hashable, compute: Callable[[], object]):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+                event = self._computing.get(key)
+                if event is None:
+                    event = self._computing[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another thread is computing this entry
+            event.wait()
+
+        try:
+            value = compute()
+            with self._lock:
+                self._entries[key] = value
+            return value
+        finally:
+            with self._lock:
+                del self._computing[key]
+            event.set()
+
+    def gray(self) -> np.ndarray:
+        """cvtColor(BGR2GRAY)"""
+        return self._memo('gray', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY))
+
+    def median_blur(self, ksize: int) -> np.ndarray:
+        """medianBlur(gray, ksize)"""
+        return self._memo(('median_blur', ksize), lambda: cv2.medianBlur(self.gray(), ksize))
+
+    def reflections_inpainted(self, ksize: int, threshold: int) -> np.ndarray:
+        """
+        medianBlur(gray, ksize) with pixels above threshold (reflections)
+        inpainted (TELEA, radius 3); the blurred image itself if there are none.
+        """
+        def compute():
+            blurred = self.median_blur(ksize)
+            _, reflection_mask = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)
+            if np.sum(reflection_mask) > 0:
+                return cv2.inpaint(blurred, reflection_mask, 3, cv2.INPAINT_TELEA)
+            return blurred
+        return self._memo(('inpainted', ksize, threshold), compute)
+
+    def canny(self, ksize: int, low: float, high: float) -> np.ndarray:
+        """Canny(medianBlur(gray, ksize), low, high)"""
+        return self._memo(('canny', ksize, low, high),
+                          lambda: cv2.Canny(self.median_blur(ksize), low, high))
+
+    def pyramid(self, levels: int, min_level_dim: int) -> List[np.ndarray]:
+        """build_pyramid(image, levels, min_level_dim) (see detection/pyramid.py)"""
+        from .pyramid import build_pyramid
+        return self._memo(('pyramid', levels, min_level_dim),
+                          lambda: build_pyramid(self.image, levels, min_level_dim))
+
+    def level_context(self, levels: int, min_level_dim: int, level: int) -> 'DetectionContext':
+        """Context of one pyramid level, shared by every tier searching that level."""
+        return self._memo(('level_context', levels, min_level_dim, level),
+                          lambda: DetectionContext(self.pyramid(levels, min_level_dim)[level]))
+
+    def stats(self) -> Dict:
+        """{'hits', 'misses', 'entries'}"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
@@ -9,8 +9,10 @@ These are exact 1:1 copies from the notebook for consistent detection behavior.
 import cv2
 import numpy as np
 
+from utils.cv_cache import get_clahe, get_structuring_element
 
-def detect_pupil_robust(image_cv, config):
+
+def detect_pupil_robust(image_cv, config, context=None):
     """
     Detect pupil in an eye image using robust computer vision techniques.
     NOW CONFIGURABLE: Accepts a config dictionary for tiered detection strategy.
@@ -23,6 +25,9 @@ def detect_pupil_robust(image_cv, config):
         Configuration dictionary containing detection parameters:
         - INPAINT_THRESHOLD, CLAHE_CLIP_LIMIT, BINARY_THRESHOLD
         - MIN_PUPIL_AREA, MAX_PUPIL_AREA, MIN_CIRCULARITY
+    context : DetectionContext, optional
+        Per-image memo of grayscale / blurred / inpainted images shared by
+        all tiers (see detection/context.py); same result, computed once
     
     Returns:
     --------
@@ -32,34 +37,35 @@ def detect_pupil_robust(image_cv, config):
         Returns (None, None, None) if detection fails
     """
     try:
-        # 1. PREPROCESSING PIPELINE
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
-        
-        # Apply Median Blur to reduce noise
-        blurred = cv2.medianBlur(gray, 5)
-        
-        # 2. REFLECTION REMOVAL (using config)
-        # Detect bright spots (reflections) using threshold from config
-        _, reflection_mask = cv2.threshold(
-            blurred, 
-            config['INPAINT_THRESHOLD'], 
-            255, 
-            cv2.THRESH_BINARY
-        )
-        
-        # Inpaint the reflections to fill them with surrounding pixels
-        if np.sum(reflection_mask) > 0:
-            inpainted = cv2.inpaint(blurred, reflection_mask, 3, cv2.INPAINT_TELEA)
+        if context is not None:
+            # Steps 1-2 depend only on the image and INPAINT_THRESHOLD
+            inpainted = context.reflections_inpainted(5, config['INPAINT_THRESHOLD'])
         else:
-            inpainted = blurred.copy()
+            # 1. PREPROCESSING PIPELINE
+            
+            # Convert to grayscale
+            gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
+            
+            # Apply Median Blur to reduce noise
+            blurred = cv2.medianBlur(gray, 5)
+            
+            # 2. REFLECTION REMOVAL (using config)
+            # Detect bright spots (reflections) using threshold from config
+            _, reflection_mask = cv2.threshold(
+                blurred, 
+                config['INPAINT_THRESHOLD'], 
+                255, 
+                cv2.THRESH_BINARY
+            )
+            
+            # Inpaint the reflections to fill them with surrounding pixels
+            if np.sum(reflection_mask) > 0:
+                inpainted = cv2.inpaint(blurred, reflection_mask, 3, cv2.INPAINT_TELEA)
+            else:
+                inpainted = blurred.copy()
         
         # 3. CONTRAST ENHANCEMENT using CLAHE (using config)
-        clahe = cv2.createCLAHE(
-            clipLimit=config['CLAHE_CLIP_LIMIT'], 
-            tileGridSize=(8, 8)
-        )
+        clahe = get_clahe(config['CLAHE_CLIP_LIMIT'], (8, 8))
         enhanced = clahe.apply(inpainted)
         
         # 4. THRESHOLDING (using config)
@@ -71,7 +77,7 @@ def detect_pupil_robust(image_cv, config):
         )
         
         # Optional: Use morphological operations to clean up
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        kernel = get_structuring_element(cv2.MORPH_ELLIPSE, (5, 5))
         binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
         binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
         
@@ -111,8 +117,8 @@ def detect_pupil_robust(image_cv, config):
             # Get minimum enclosing circle
             (x, y), radius = cv2.minEnclosingCircle(best_contour)
             
-            # Verify radius is reasonable
-            if radius < 5 or radius > 200:
+            # Verify radius is reasonable (limits are scaled on pyramid levels)
+            if radius < config.get('MIN_PUPIL_RADIUS', 5) or radius > config.get('MAX_PUPIL_RADIUS', 200):
                 return (None, None, None)
             
             return (int(x), int(y), int(radius))
@@ -124,7 +130,7 @@ def detect_pupil_robust(image_cv, config):
         return (None, None, None)
 
 
-def detect_iris_robust(image_cv, config):
+def detect_iris_robust(image_cv, config, context=None):
     """
     Detect the iris boundary using Hough Circle Transform.
     NOW CONFIGURABLE: Accepts a config dictionary for tiered detection strategy.
@@ -141,24 +147,30 @@ def detect_iris_robust(image_cv, config):
         Configuration dictionary containing detection parameters:
         - CANNY_LOW, CANNY_HIGH, IRIS_HOUGH_PARAM1, IRIS_HOUGH_PARAM2
         - MIN_IRIS_RADIUS, MAX_IRIS_RADIUS (FIXED: matches config keys)
+    context : DetectionContext, optional
+        Per-image memo shared by all tiers (see detection/context.py)
     
     Returns:
     --------
     tuple: (center_x, center_y, radius) or (None, None, None) if detection fails
     """
     try:
-        # 1. Preprocessing
-        gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
-        
-        # Apply median blur to reduce noise (iris needs more smoothing)
-        blurred = cv2.medianBlur(gray, 7)
-        
-        # 2. Edge Detection using Canny (using config)
-        edges = cv2.Canny(
-            blurred, 
-            config['CANNY_LOW'], 
-            config['CANNY_HIGH']
-        )
+        if context is not None:
+            # Gray + blur shared by every tier, edges by tiers with equal thresholds
+            edges = context.canny(7, config['CANNY_LOW'], config['CANNY_HIGH'])
+        else:
+            # 1. Preprocessing
+            gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
+            
+            # Apply median blur to reduce noise (iris needs more smoothing)
+            blurred = cv2.medianBlur(gray, 7)
+            
+            # 2. Edge Detection using Canny (using config)
+            edges = cv2.Canny(
+                blurred, 
+                config['CANNY_LOW'], 
+                config['CANNY_HIGH']
+            )
         
         # 3. Hough Circle Transform (using config)
         circles = cv2.HoughCircles(
@@ -0,0 +1,112 @@
+"""
+Image Source Handling - Decode once, pass arrays everywhere
+
+Detection and pipeline entry points accept any of:
+- str / Path: image file on disk (read with cv2.imread)
+- bytes / bytearray / memoryview: encoded image (e.g. an HTTP upload, decoded in memory)
+- numpy.ndarray: already decoded image (BGR, or single-channel grayscale)
+
+so a request is decoded exactly once and never has to touch disk.
+
+is_grayscale_image() classifies a decoded array as grayscale (identical
+channels) or colour without float temporaries: a strided sample settles
+colour images at once, only grayscale-looking ones are checked in full.
+"""
+
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional, Union
+
+
+ImageSource = Union[str, Path, bytes, bytearray, memoryview, np.ndarray]
+
+
+def load_image(source: ImageSource) -> Optional[np.ndarray]:
+    """
+    Resolve an image source to a BGR numpy array.
+
+    Parameters:
+    -----------
+    source : str, Path, bytes or numpy.ndarray
+        Image path, encoded image bytes, or decoded image
+
+    Returns:
+    --------
+    numpy.ndarray: BGR image (uint8, 3 channels), or None if it cannot be decoded
+    """
+    if isinstance(source, np.ndarray):
+        image = source
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        image = cv2.imdecode(np.frombuffer(source, np.uint8), cv2.IMREAD_COLOR)
+    else:
+        image = cv2.imread(str(source))
+
+    if image is None or image.size == 0:
+        return None
+
+    # Detectors expect BGR (cv2.imread default); promote single-channel arrays
+    if image.ndim == 2 or image.shape[2] == 1:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+    return image
+
+
+def describe_source(source: ImageSource) -> str:
+    """Short label for error messages (paths are shown, arrays/bytes are summarised)."""
+    if isinstance(source, np.ndarray):
+        return f"<array {source.shape}>"
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"<{len(source)} bytes>"
+    return str(source)
+
+
+def _channels_equal(pixels: np.ndarray) -> bool:
+    """All pixels have identical B, G, R (np.allclose semantics for float images)."""
+    if pixels.dtype == np.uint8:
+        # cv2.split + NORM_INF: no boolean temporaries, ~3x faster than numpy
+        b, g, r = cv2.split(np.ascontiguousarray(pixels))[:3]
+        return cv2.norm(b, g, cv2.NORM_INF) == 0 and cv2.norm(g, r, cv2.NORM_INF) == 0
+    b, g, r = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    if np.issubdtype(pixels.dtype, np.integer):
+        return np.array_equal(b, g) and np.array_equal(g, r)
+    return bool(np.allclose(b, g) and np.allclose(g, r))
+
+
+def is_grayscale_image(image: np.ndarray, sample_grid: int = 64, band_rows: int = 64) -> bool:
+    """
+    True if the image is grayscale: single-channel, or every pixel has
+    identical B, G and R (grayscale saved as colour).
+
+    Same answer as comparing the full channel planes with np.allclose, but:
+    1. a strided sample of about sample_grid x sample_grid pixels is checked
+       first - one differing pixel proves a colour image (microseconds);
+    2. only if the whole sample is gray, the image is checked exactly, band
+       by band (band_rows rows at a time), stopping at the first band with
+       a coloured pixel.
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        Decoded image (H, W) or (H, W, C); the first three channels are compared
+    sample_grid : int
+        Sample points per side for the first pass
+    band_rows : int
+        Rows per block in the exact pass (bounds the temporaries)
+
+    Returns:
+    --------
+    bool: True for grayscale, False for colour
+    """
+    if image.ndim == 2 or image.shape[2] == 1:
+        return True
+
+    height, width = image.shape[:2]
+    sample = image[::max(1, height // sample_grid), ::max(1, width // sample_grid)]
+    if not _channels_equal(sample):
+        return False
+
+    for top in range(0, height, band_rows):
+        if not _channels_equal(image[top:top + band_rows]):
+            return False
+    return True
@@ -0,0 +1,99 @@
+"""
+Polar Sampling Grid Cache
+Shared trig tables and offset grids for the circular samplers in
+ring_counter.py and color_eye.py.
+
+Every sampler walks circles (or rays) around a center with a fixed number of
+angles. The cos/sin tables and the (radius x angle) offset grids only depend on
+the angular resolution and the radius span, so they are computed once and kept
+in small LRU caches instead of being rebuilt on every request.
+
+Cached arrays are shared between callers and marked read-only.
+
+NOTE: Offsets are kept in float64 (not pre-truncated to int). The samplers
+truncate ``center + offset`` toward zero exactly like the original
+``int(cx + r * np.cos(angle))`` code, which is not the same as adding an
+integer offset to the center near the image border.
+"""
+
+import numpy as np
+from functools import lru_cache
+from typing import Tuple
+
+
+# Cache bounds (entries). Offset grids are the large ones: R x A float64 each.
+TRIG_CACHE_SIZE = 32
+OFFSET_CACHE_SIZE = 16
+
+
+def _read_only(*arrays: np.ndarray) -> Tuple[np.ndarray, ...]:
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays
+
+
+@lru_cache(maxsize=TRIG_CACHE_SIZE)
+def get_trig_table(num_angles: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    cos/sin of ``np.linspace(0, 2π, num_angles, endpoint=False)``.
+
+    Parameters:
+    -----------
+    num_angles : int
+        Angular resolution (e.g. 720 for the radial profile, 64/32 for validation)
+
+    Returns:
+    --------
+    tuple: (cos_table, sin_table), each of shape (num_angles,)
+    """
+    angles = np.linspace(0, 2*np.pi, num_angles, endpoint=False)
+    return _read_only(np.cos(angles), np.sin(angles))
+
+
+@lru_cache(maxsize=OFFSET_CACHE_SIZE)
+def get_polar_offsets(min_radius: int, max_radius: int,
+                      num_angles: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Offset grid ``r * cos(θ)``, ``r * sin(θ)`` for r in [min_radius, max_radius).
+
+    Parameters:
+    -----------
+    min_radius : int
+        First radius (inclusive)
+    max_radius : int
+        Last radius (exclusive)
+    num_angles : int
+        Angular resolution
+
+    Returns:
+    --------
+    tuple: (dx, dy), each of shape (max_radius - min_radius, num_angles)
+    """
+    cos_t, sin_t = get_trig_table(num_angles)
+    radii = np.arange(min_radius, max_radius)[:, None]
+    return _read_only(radii * cos_t, radii * sin_t)
+
+
+@lru_cache(maxsize=TRIG_CACHE_SIZE)
+def get_rubber_sheet_table(radial_res: int,
+                           angular_res: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Normalised radius column and cos/sin rows for Daugman's rubber-sheet unwrap.
+
+    Uses ``θ = 2π·i / angular_res`` (the notebook formula), which is not always
+    bit-identical to ``np.linspace``, so it is cached separately.
+
+    Returns:
+    --------
+    tuple: (r_norm, cos_table, sin_table) of shapes (radial_res, 1), (angular_res,), (angular_res,)
+    """
+    r_norm = (np.arange(radial_res) / (radial_res - 1))[:, None]
+    theta = (2 * np.pi * np.arange(angular_res)) / angular_res
+    return _read_only(r_norm, np.cos(theta), np.sin(theta))
+
+
+def clear_polar_cache() -> None:
+    """Drop all cached tables (e.g. between benchmark runs)."""
+    get_trig_table.cache_clear()
+    get_polar_offsets.cache_clear()
+    get_rubber_sheet_table.cache_clear()
@@ -0,0 +1,274 @@
+"""
+Image Pyramid Localisation - Coarse-to-fine pupil/iris detection
+
+Opt-in detection strategy for high-resolution captures. The detectors are
+run on the coarsest pyramid level first (cheap: a 4000x3000 frame becomes
+500x375 at depth 3), then each finer level only re-detects inside a narrow
+window around the up-scaled estimate, with radius limits narrowed around
+the expected radius. HoughCircles on a full frame with minRadius=40 ..
+maxRadius=350 is replaced by a small search per level.
+
+If the coarse pass or any refinement fails, the detector falls back to a
+native-resolution pass with the original parameters, so the strategy never
+loses a detection the full-frame path would have found.
+
+Pyramid depth and search windows come from config.PYRAMID_SETTINGS.
+"""
+
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .grayscale_eye import detect_pupil_robust, detect_iris_robust
+from .color_eye import detect_pupil_hybrid
+
+
+Circle = Tuple[Optional[int], Optional[int], Optional[int]]
+
+NO_CIRCLE = (None, None, None)
+
+
+def _pyramid_settings() -> Dict:
+    # Imported lazily like the tier configs (avoid circular import)
+    from config import PYRAMID_SETTINGS
+    return PYRAMID_SETTINGS
+
+
+def build_pyramid(image: np.ndarray, levels: int, min_level_dim: int) -> List[np.ndarray]:
+    """
+    Gaussian pyramid: [native, 1/2, 1/4, ...].
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        Input image (BGR or grayscale)
+    levels : int
+        Maximum number of levels below native resolution
+    min_level_dim : int
+        Stop before the short side would drop below this size
+
+    Returns:
+    --------
+    list: Pyramid images, index 0 is the native image
+    """
+    pyramid = [image]
+    for _ in range(levels):
+        if min(pyramid[-1].shape[:2]) // 2 < min_level_dim:
+            break
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def _crop_window(image: np.ndarray, center: Tuple[int, int],
+                 half_size: int) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Square window around center, clipped to the image. Returns (crop, (x0, y0))."""
+    h, w = image.shape[:2]
+    cx, cy = center
+    x0, y0 = max(0, cx - half_size), max(0, cy - half_size)
+    x1, y1 = min(w, cx + half_size + 1), min(h, cy + half_size + 1)
+    return image[y0:y1, x0:x1], (x0, y0)
+
+
+def _radius_window(radius: float, window: float) -> Tuple[int, int]:
+    """Expected radius ± window (at least ± 3px to absorb up-scaling error)."""
+    slack = max(radius * window, 3)
+    return max(1, int(radius - slack)), int(np.ceil(radius + slack))
+
+
+def localize_circle_pyramid(image: np.ndarray,
+                            detect: Callable[[np.ndarray, float, Optional[float]], Circle],
+                            levels: Optional[int] = None,
+                            min_level_dim: Optional[int] = None,
+                            crop_factor: Optional[float] = None,
+                            context=None) -> Circle:
+    """
+    Generic coarse-to-fine circle localisation.
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        Native resolution image
+    detect : callable
+        detect(level_image, scale, expected_radius) -> (x, y, radius)
+        - scale: level size relative to native (1.0, 0.5, 0.25, ...)
+        - expected_radius: None on the coarsest level, otherwise the
+          up-scaled radius the detector should search around
+    levels, min_level_dim, crop_factor : optional
+        Override config.PYRAMID_SETTINGS ('LEVELS', 'MIN_LEVEL_DIM', 'CROP_FACTOR')
+    context : DetectionContext, optional
+        Per-image memo (detection/context.py): the pyramid is built once and
+        the coarsest level is searched with a shared level context, passed
+        to detect as context=
+
+    Returns:
+    --------
+    tuple: (x, y, radius) at native resolution, or (None, None, None)
+    """
+    settings = _pyramid_settings()
+    levels = settings['LEVELS'] if levels is None else levels
+    min_level_dim = settings['MIN_LEVEL_DIM'] if min_level_dim is None else min_level_dim
+    crop_factor = settings['CROP_FACTOR'] if crop_factor is None else crop_factor
+
+    if context is not None:
+        pyramid = context.pyramid(levels, min_level_dim)
+    else:
+        pyramid = build_pyramid(image, levels, min_level_dim)
+    coarsest = len(pyramid) - 1
+
+    # Coarsest level: unconstrained search
+    if context is not None:
+        level_context = context.level_context(levels, min_level_dim, coarsest)
+        x, y, radius = detect(pyramid[coarsest], 0.5 ** coarsest, None, context=level_context)
+    else:
+        x, y, radius = detect(pyramid[coarsest], 0.5 ** coarsest, None)
+    if x is None:
+        return NO_CIRCLE
+
+    # Finer levels: re-detect in a narrow window around the up-scaled estimate
+    for level in range(coarsest - 1, -1, -1):
+        x, y, radius = 2 * x, 2 * y, 2 * radius
+        half_size = int(radius * crop_factor) + 2
+        crop, (x0, y0) = _crop_window(pyramid[level], (x, y), half_size)
+
+        rx, ry, r = detect(crop, 0.5 ** level, radius)
+        if rx is None:
+            return NO_CIRCLE
+        x, y, radius = rx + x0, ry + y0, r
+
+    return int(x), int(y), int(radius)
+
+
+def scale_detection_config(config: Dict, scale: float) -> Dict:
+    """
+    Scale the pixel-based limits of a tier config (JACKPOT/HIGH_PASS/RESCUE)
+    to a pyramid level. Thresholds and circularity are resolution independent.
+    """
+    scaled = dict(config)
+    scaled['MIN_PUPIL_AREA'] = config['MIN_PUPIL_AREA'] * scale * scale
+    scaled['MAX_PUPIL_AREA'] = config['MAX_PUPIL_AREA'] * scale * scale
+    scaled['MIN_PUPIL_RADIUS'] = max(2, config.get('MIN_PUPIL_RADIUS', 5) * scale)
+    scaled['MAX_PUPIL_RADIUS'] = config.get('MAX_PUPIL_RADIUS', 200) * scale
+    scaled['MIN_IRIS_RADIUS'] = max(1, int(config['MIN_IRIS_RADIUS'] * scale))
+    scaled['MAX_IRIS_RADIUS'] = max(2, int(np.ceil(config['MAX_IRIS_RADIUS'] * scale)))
+    return scaled
+
+
+# ============================================================================
+# GRAYSCALE DETECTORS (Pupil dataset)
+# ============================================================================
+
+def detect_pupil_pyramid(image_cv: np.ndarray, config: Dict, context=None, **pyramid_kwargs) -> Circle:
+    """
+    Pyramid version of grayscale_eye.detect_pupil_robust.
+
+    Parameters:
+    -----------
+    image_cv : numpy.ndarray
+        Input image in BGR format
+    config : dict
+        Tier configuration (JACKPOT/HIGH_PASS/RESCUE)
+    context : DetectionContext, optional
+        Per-image memo shared by all tiers (see detection/context.py)
+    **pyramid_kwargs
+        Optional overrides passed to localize_circle_pyramid()
+
+    Returns:
+    --------
+    tuple: (center_x, center_y, radius) or (None, None, None)
+    """
+    window = _pyramid_settings()['RADIUS_WINDOW']
+
+    def detect(level_image, scale, expected_radius, context=None):
+        level_config = scale_detection_config(config, scale)
+        if expected_radius is not None:
+            # Narrow the area limits around the expected pupil size
+            r_min, r_max = _radius_window(expected_radius, window)
+            level_config['MIN_PUPIL_AREA'] = max(level_config['MIN_PUPIL_AREA'], 0.8 * np.pi * r_min * r_min)
+            level_config['MAX_PUPIL_AREA'] = min(level_config['MAX_PUPIL_AREA'], np.pi * r_max * r_max)
+        return detect_pupil_robust(level_image, level_config, context=context)
+
+    result = localize_circle_pyramid(image_cv, detect, context=context, **pyramid_kwargs)
+    if result[0] is None:
+        return detect_pupil_robust(image_cv, config, context=context)
+    return result
+
+
+def detect_iris_pyramid(image_cv: np.ndarray, config: Dict, context=None, **pyramid_kwargs) -> Circle:
+    """
+    Pyramid version of grayscale_eye.detect_iris_robust.
+
+    HoughCircles runs with the full [MIN_IRIS_RADIUS, MAX_IRIS_RADIUS] range
+    only on the coarsest level; finer levels search ± RADIUS_WINDOW around
+    the up-scaled radius.
+
+    Parameters:
+    -----------
+    image_cv : numpy.ndarray
+        Input image in BGR format
+    config : dict
+        Tier configuration (JACKPOT/HIGH_PASS/RESCUE)
+    context : DetectionContext, optional
+        Per-image memo shared by all tiers (see detection/context.py)
+    **pyramid_kwargs
+        Optional overrides passed to localize_circle_pyramid()
+
+    Returns:
+    --------
+    tuple: (center_x, center_y, radius) or (None, None, None)
+    """
+    window = _pyramid_settings()['RADIUS_WINDOW']
+
+    def detect(level_image, scale, expected_radius, context=None):
+        level_config = scale_detection_config(config, scale)
+        if expected_radius is not None:
+            r_min, r_max = _radius_window(expected_radius, window)
+            level_config['MIN_IRIS_RADIUS'] = max(level_config['MIN_IRIS_RADIUS'], r_min)
+            level_config['MAX_IRIS_RADIUS'] = min(level_config['MAX_IRIS_RADIUS'], r_max)
+            if level_config['MIN_IRIS_RADIUS'] >= level_config['MAX_IRIS_RADIUS']:
+                return NO_CIRCLE
+        return detect_iris_robust(level_image, level_config, context=context)
+
+    result = localize_circle_pyramid(image_cv, detect, context=context, **pyramid_kwargs)
+    if result[0] is None:
+        return detect_iris_robust(image_cv, config, context=context)
+    return result
+
+
+# ============================================================================
+# COLOR DETECTOR (Iris dataset)
+# ============================================================================
+
+def detect_pupil_hybrid_pyramid(image: np.ndarray, brown_iris_mode: bool = False,
+                                **pyramid_kwargs) -> Tuple[Optional[Tuple[int, int]], Optional[int]]:
+    """
+    Pyramid version of color_eye.detect_pupil_hybrid.
+
+    The coarse levels use the adaptive (any image) constraints; the brown iris
+    area constraints are absolute pixel areas, so they only apply at native
+    resolution.
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        BGR image
+    brown_iris_mode : bool
+        Brown iris area constraints on the native-resolution pass
+    **pyramid_kwargs
+        Optional overrides passed to localize_circle_pyramid()
+
+    Returns:
+    --------
+    tuple: (center, radius) or (None, None)
+    """
+    def detect(level_image, scale, expected_radius):
+        center, radius = detect_pupil_hybrid(level_image,
+                                             brown_iris_mode=brown_iris_mode and scale == 1.0)
+        if center is None:
+            return NO_CIRCLE
+        return center[0], center[1], radius
+
+    x, y, radius = localize_circle_pyramid(image, detect, **pyramid_kwargs)
+
+    if x is None:
+        return detect_pupil_hybrid(image, brown_iris_mode=brown_iris_mode)
+    return (x, y), radius
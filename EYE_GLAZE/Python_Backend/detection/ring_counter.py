@@ -18,17 +18,137 @@ Enhancements:
 
 import cv2
 import numpy as np
-from scipy.ndimage import gaussian_filter1d
-from scipy.signal import find_peaks
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
+
+from .polar_grid import get_trig_table, get_polar_offsets, get_rubber_sheet_table
+from utils.cv_cache import get_clahe
+
+
+def sample_polar_grid(image: np.ndarray,
+                      center: Tuple[int, int],
+                      dx: np.ndarray,
+                      dy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample pixels on concentric circles around a center in one vectorized pass.
+    
+    Pixel coordinates are truncated toward zero exactly like the original
+    per-point loop (``int(cx + r * cos(theta))``), so the samples are identical.
+    
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        Grayscale image
+    center : tuple
+        (x, y) origin of the circles
+    dx, dy : numpy.ndarray
+        (R, A) offset grids ``r * cos(θ)`` / ``r * sin(θ)`` (see polar_grid.py)
+    
+    Returns:
+    --------
+    tuple: (samples, valid)
+        - samples: (R, A) array of pixel values (0 where out of bounds)
+        - valid: (R, A) boolean mask of in-bounds samples
+    """
+    h, w = image.shape[:2]
+    cx, cy = center
+    
+    xs = (cx + dx).astype(np.intp)
+    ys = (cy + dy).astype(np.intp)
+    
+    valid = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    if valid.all():
+        return image[ys, xs], valid
+    
+    samples = np.zeros(xs.shape, dtype=image.dtype)
+    samples[valid] = image[ys[valid], xs[valid]]
+    return samples, valid
+
+
+def masked_row_median(samples: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Per-row median over the valid samples only, computed with a single sort.
+    
+    Matches ``np.median`` of each row's valid values bit-for-bit; rows without
+    any valid sample yield 0.
+    
+    Parameters:
+    -----------
+    samples : numpy.ndarray
+        (R, A) uint8 samples
+    valid : numpy.ndarray
+        (R, A) boolean mask
+    
+    Returns:
+    --------
+    numpy.ndarray: (R,) float64 medians
+    """
+    counts = valid.sum(axis=1)
+    
+    # Push invalid samples past the uint8 range so they sort to the end of each row
+    filled = samples.astype(np.int16)
+    filled[~valid] = 256
+    filled.sort(axis=1)
+    
+    rows = np.arange(len(samples))
+    lo = np.maximum(counts - 1, 0) // 2
+    hi = counts // 2
+    medians = (filled[rows, lo].astype(np.float64) + filled[rows, hi]) / 2.0
+    
+    medians[counts == 0] = 0
+    return medians
+
+
+def build_unwrap_maps(pupil_center: Tuple[int, int], pupil_radius: int, iris_radius: int,
+                      radial_res: int = 64, angular_res: int = 512,
+                      interpolation: str = 'nearest') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the cv2.remap sampling grids (map_x, map_y) for Daugman's rubber sheet.
+    
+    Parameters:
+    -----------
+    pupil_center : tuple
+        (cx, cy) pupil center (origin of the unwrap)
+    pupil_radius : int
+        Pupil radius in pixels (inner boundary)
+    iris_radius : int
+        Iris radius in pixels (outer boundary)
+    radial_res : int
+        Number of samples in radial direction (pupil → iris)
+    angular_res : int
+        Number of samples in angular direction (0° → 360°)
+    interpolation : str
+        'nearest' - coordinates truncated with int() exactly like the original loop
+        'bilinear' - fractional coordinates kept for sub-pixel sampling
+    
+    Returns:
+    --------
+    tuple: (map_x, map_y) float32 arrays of shape (radial_res, angular_res)
+    """
+    cx_pupil, cy_pupil = pupil_center
+    r_norm, cos_t, sin_t = get_rubber_sheet_table(radial_res, angular_res)
+    
+    # Actual radius in pixels (linear interpolation pupil → iris)
+    radius = pupil_radius + r_norm * (iris_radius - pupil_radius)
+    map_x = cx_pupil + radius * cos_t
+    map_y = cy_pupil + radius * sin_t
+    
+    if interpolation == 'nearest':
+        # int() truncates toward zero - keep that behaviour for exact compatibility
+        map_x = np.trunc(map_x)
+        map_y = np.trunc(map_y)
+    elif interpolation != 'bilinear':
+        raise ValueError(f"Unknown interpolation: {interpolation}")
+    
+    return map_x.astype(np.float32), map_y.astype(np.float32)
 
 
 def unwrap_iris_region(image: np.ndarray, pupil_center: Tuple[int, int], pupil_radius: int,
                        iris_center: Tuple[int, int], iris_radius: int,
-                       radial_res: int = 64, angular_res: int = 512) -> Optional[np.ndarray]:
+                       radial_res: int = 64, angular_res: int = 512,
+                       interpolation: str = 'nearest') -> Optional[np.ndarray]:
     """
     Unwrap iris region from Cartesian to Polar coordinates.
-    EXACT COPY from Iris_Pattern_Unwrap_LineCount.ipynb
+    Same sampling as Iris_Pattern_Unwrap_LineCount.ipynb, done with cv2.remap
     
     Uses Daugman's rubber sheet model to normalize iris region:
     - Inner boundary: pupil edge
@@ -51,6 +171,9 @@ def unwrap_iris_region(image: np.ndarray, pupil_center: Tuple[int, int], pupil_r
         Number of samples in radial direction (pupil → iris)
     angular_res : int
         Number of samples in angular direction (0° → 360°)
+    interpolation : str
+        'nearest' (default) reproduces the notebook's int() truncation exactly,
+        'bilinear' samples with sub-pixel interpolation
     
     Returns:
     --------
@@ -62,12 +185,7 @@ def unwrap_iris_region(image: np.ndarray, pupil_center: Tuple[int, int], pupil_r
         if len(image.shape) == 3:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         else:
-            gray = image.copy()
-        
-        h, w = gray.shape
-        
-        # Use pupil center as origin (iris should be concentric)
-        cx_pupil, cy_pupil = pupil_center
+            gray = image
         
         # Validate inputs
         if pupil_radius >= iris_radius:
@@ -76,31 +194,14 @@ def unwrap_iris_region(image: np.ndarray, pupil_center: Tuple[int, int], pupil_r
         if pupil_radius < 5 or iris_radius < 10:
             return None
         
-        # Create normalized iris image
-        unwrapped = np.zeros((radial_res, angular_res), dtype=np.uint8)
+        # Use pupil center as origin (iris should be concentric)
+        map_x, map_y = build_unwrap_maps(pupil_center, pupil_radius, iris_radius,
+                                         radial_res, angular_res, interpolation)
         
-        # Sample points in polar coordinates
-        for r_idx in range(radial_res):
-            # Radial position (normalized 0→1 from pupil to iris)
-            r_norm = r_idx / (radial_res - 1)
-            
-            # Actual radius in pixels (linear interpolation)
-            radius = pupil_radius + r_norm * (iris_radius - pupil_radius)
-            
-            for theta_idx in range(angular_res):
-                # Angular position (0 to 2π)
-                theta = (2 * np.pi * theta_idx) / angular_res
-                
-                # Convert to Cartesian coordinates
-                x = int(cx_pupil + radius * np.cos(theta))
-                y = int(cy_pupil + radius * np.sin(theta))
-                
-                # Sample pixel value (with bounds checking)
-                if 0 <= x < w and 0 <= y < h:
-                    unwrapped[r_idx, theta_idx] = gray[y, x]
-                else:
-                    # Out of bounds - use edge value
-                    unwrapped[r_idx, theta_idx] = 0
+        # Out of bounds samples are filled with 0
+        flags = cv2.INTER_NEAREST if interpolation == 'nearest' else cv2.INTER_LINEAR
+        unwrapped = cv2.remap(gray, map_x, map_y, flags,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=0)
         
         return unwrapped
     
@@ -112,7 +213,8 @@ def unwrap_iris_region(image: np.ndarray, pupil_center: Tuple[int, int], pupil_r
 def detect_tension_rings_radial_profile(gray_image: np.ndarray, 
                                          pupil_center: Tuple[int, int], 
                                          pupil_radius: int,
-                                         iris_radius: int) -> Tuple[List[int], List[float], Optional[np.ndarray]]:
+                                         iris_radius: int,
+                                         clahe: Optional[cv2.CLAHE] = None) -> Tuple[List[int], List[float], Optional[np.ndarray]]:
     """
     Detect tension rings using radial intensity profiling.
     ENHANCED VERSION with improved sensitivity for subtle rings
@@ -135,6 +237,8 @@ def detect_tension_rings_radial_profile(gray_image: np.ndarray,
         Pupil radius in pixels
     iris_radius : int
         Iris radius in pixels
+    clahe : cv2.CLAHE, optional
+        Pre-built CLAHE (clipLimit=2.0, tileGridSize=(8, 8)) to reuse across calls
     
     Returns:
     --------
@@ -143,13 +247,11 @@ def detect_tension_rings_radial_profile(gray_image: np.ndarray,
         - ring_confidences: Confidence scores for each ring
         - radial_profile: Full radial intensity profile array
     """
-    h, w = gray_image.shape
-    cx_pupil, cy_pupil = pupil_center
-    
     # ========================================
     # ENHANCEMENT 1: Apply CLAHE for better contrast
     # ========================================
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    if clahe is None:
+        clahe = get_clahe(2.0, (8, 8))
     enhanced_image = clahe.apply(gray_image)
     
     # Define search region (pupil → iris)
@@ -162,32 +264,21 @@ def detect_tension_rings_radial_profile(gray_image: np.ndarray,
     # ========================================
     # STEP 1: Compute Radial Intensity Profile
     # ========================================
-    radial_profile = []
-    
     # ENHANCEMENT 2: Sample more angles (720 instead of 360) for better accuracy
-    for radius in range(min_radius, max_radius):
-        angles = np.linspace(0, 2*np.pi, 720, endpoint=False)  # More samples
-        intensities = []
-        
-        for angle in angles:
-            x = int(cx_pupil + radius * np.cos(angle))
-            y = int(cy_pupil + radius * np.sin(angle))
-            
-            if 0 <= x < w and 0 <= y < h:
-                # Use enhanced image for better ring detection
-                intensities.append(enhanced_image[y, x])
-        
-        if len(intensities) > 0:
-            # Use median instead of mean to reduce noise impact
-            radial_profile.append(np.median(intensities))
-        else:
-            radial_profile.append(0)
+    # All (radius x angle) samples are gathered in one shot from the enhanced image
+    dx, dy = get_polar_offsets(min_radius, max_radius, 720)  # More samples
+    intensities, valid = sample_polar_grid(enhanced_image, pupil_center, dx, dy)
     
-    radial_profile = np.array(radial_profile)
+    # Use median instead of mean to reduce noise impact
+    radial_profile = masked_row_median(intensities, valid)
     
     if len(radial_profile) < 10:
         return [], [], radial_profile
     
+    # SciPy imported on first use (scipy.signal alone is ~0.7s of cold start)
+    from scipy.ndimage import gaussian_filter1d
+    from scipy.signal import find_peaks
+    
     # ========================================
     # STEP 2: Smooth Profile (Multi-scale)
     # ========================================
@@ -227,95 +318,53 @@ def detect_tension_rings_radial_profile(gray_image: np.ndarray,
     # ========================================
     # STEP 4: Validate Rings (Enhanced Darkness Check)
     # ========================================
-    validated_rings = []
-    validated_confidences = []
+    # All candidates are validated at once on (candidate x angle) sample grids
+    candidate_radii = np.asarray(ring_radii)
+    
+    # Sample ring intensity around the circle (64 points for better accuracy)
+    cos_64, sin_64 = get_trig_table(64)
+    ring_samples, ring_valid = sample_polar_grid(
+        enhanced_image, pupil_center,
+        candidate_radii[:, None] * cos_64, candidate_radii[:, None] * sin_64
+    )
+    ring_intensity = masked_row_median(ring_samples, ring_valid)  # Use median
+    has_ring_samples = ring_valid.any(axis=1)
+    
+    # ENHANCEMENT 6: Relative darkness check
+    # Compare ring to local surrounding area (4 offsets x 32 points per candidate)
+    surrounding_radii = candidate_radii[:, None] + np.array([-5, -3, 3, 5])  # Sample nearby regions
+    in_search_region = (surrounding_radii >= min_radius) & (surrounding_radii <= max_radius)
+    
+    cos_32, sin_32 = get_trig_table(32)
+    surrounding_samples, surrounding_valid = sample_polar_grid(
+        enhanced_image, pupil_center,
+        surrounding_radii[:, :, None] * cos_32, surrounding_radii[:, :, None] * sin_32
+    )
+    surrounding_valid &= in_search_region[:, :, None]
     
-    # ENHANCEMENT 5: More lenient darkness threshold
-    for ring_radius, conf in zip(ring_radii, ring_confidences):
-        # Sample ring intensity around the circle (64 points for better accuracy)
-        angles = np.linspace(0, 2*np.pi, 64, endpoint=False)
-        ring_intensities = []
-        
-        for angle in angles:
-            x = int(cx_pupil + ring_radius * np.cos(angle))
-            y = int(cy_pupil + ring_radius * np.sin(angle))
-            
-            if 0 <= x < w and 0 <= y < h:
-                ring_intensities.append(enhanced_image[y, x])
-        
-        if len(ring_intensities) > 0:
-            ring_intensity = np.median(ring_intensities)  # Use median
-            
-            # ENHANCEMENT 6: Relative darkness check
-            # Compare ring to local surrounding area
-            surrounding_intensities = []
-            for offset in [-5, -3, 3, 5]:  # Sample nearby regions
-                r = ring_radius + offset
-                if min_radius <= r <= max_radius:
-                    for angle in np.linspace(0, 2*np.pi, 32, endpoint=False):
-                        x = int(cx_pupil + r * np.cos(angle))
-                        y = int(cy_pupil + r * np.sin(angle))
-                        if 0 <= x < w and 0 <= y < h:
-                            surrounding_intensities.append(enhanced_image[y, x])
-            
-            if len(surrounding_intensities) > 0:
-                avg_surrounding = np.median(surrounding_intensities)
-                # Ring should be at least 10% darker than surrounding
-                darkness_ratio = ring_intensity / (avg_surrounding + 1)
-                
-                # RELAXED validation: Either absolutely dark OR relatively darker
-                if ring_intensity < 140 or darkness_ratio < 0.90:
-                    validated_rings.append(ring_radius)
-                    # Boost confidence if both criteria met
-                    if ring_intensity < 130 and darkness_ratio < 0.85:
-                        validated_confidences.append(min(conf * 1.2, 1.0))
-                    else:
-                        validated_confidences.append(conf)
-            elif ring_intensity < 140:
-                # Fallback to absolute darkness
-                validated_rings.append(ring_radius)
-                validated_confidences.append(conf)
+    num_candidates = len(candidate_radii)
+    surrounding_samples = surrounding_samples.reshape(num_candidates, -1)
+    surrounding_valid = surrounding_valid.reshape(num_candidates, -1)
+    avg_surrounding = masked_row_median(surrounding_samples, surrounding_valid)
+    has_surrounding = surrounding_valid.any(axis=1)
     
-    return validated_rings, validated_confidences, radial_profile
+    # Ring should be at least 10% darker than surrounding
+    darkness_ratio = ring_intensity / (avg_surrounding + 1)
     
-    # Normalize confidences to [0, 1]
-    if len(prominences) > 0:
-        max_prom = max(prominences)
-        ring_confidences = [p / max_prom if max_prom > 0 else 0.5 for p in prominences]
-    else:
-        ring_confidences = [0.5] * len(ring_radii)
+    # ENHANCEMENT 5: More lenient darkness threshold
+    # RELAXED validation: Either absolutely dark OR relatively darker,
+    # fallback to absolute darkness when no surrounding samples exist
+    is_dark = ring_intensity < 140
+    is_relatively_dark = has_surrounding & (darkness_ratio < 0.90)
+    accepted = has_ring_samples & (is_dark | is_relatively_dark)
     
-    # ========================================
-    # STEP 4: Validate Rings (Darkness Check Only)
-    # ========================================
-    validated_rings = []
-    validated_confidences = []
-    
-    # Strategy: Maximize ring detection for stressed images
-    # Use only darkness validation (< 130 intensity)
-    # The darkness check confirms these are real dark bands (tension rings)
-    # The wavy appearance in unwrapped images proves they're real iris structures
-    
-    for ring_radius, conf in zip(ring_radii, ring_confidences):
-        # Sample ring intensity around the circle (32 points)
-        angles = np.linspace(0, 2*np.pi, 32, endpoint=False)
-        ring_intensities = []
-        
-        for angle in angles:
-            x = int(cx_pupil + ring_radius * np.cos(angle))
-            y = int(cy_pupil + ring_radius * np.sin(angle))
-            
-            if 0 <= x < w and 0 <= y < h:
-                ring_intensities.append(gray_image[y, x])
-        
-        if len(ring_intensities) > 0:
-            ring_intensity = np.mean(ring_intensities)
-            
-            # Validation: Ring should be darker than surrounding tissue (< 130)
-            # This confirms it's a real dark band (tension ring), not noise
-            if ring_intensity < 130:
-                validated_rings.append(ring_radius)
-                validated_confidences.append(conf)
+    # Boost confidence if both criteria met
+    boosted = has_surrounding & (ring_intensity < 130) & (darkness_ratio < 0.85)
+    confidences = np.asarray(ring_confidences, dtype=np.float64)
+    confidences = np.where(boosted, np.minimum(confidences * 1.2, 1.0), confidences)
+    
+    validated_rings = list(candidate_radii[accepted])
+    validated_confidences = list(confidences[accepted])
     
     return validated_rings, validated_confidences, radial_profile
 
@@ -323,7 +372,8 @@ def detect_tension_rings_radial_profile(gray_image: np.ndarray,
 def count_tension_rings(image: np.ndarray,
                        pupil_center: Tuple[int, int],
                        pupil_radius: int,
-                       iris_radius: int) -> Tuple[int, List[int], List[float]]:
+                       iris_radius: int,
+                       clahe: Optional[cv2.CLAHE] = None) -> Tuple[int, List[int], List[float]]:
     """
     High-level function to count tension rings.
     EXACT COPY from Iris_Pattern_Unwrap_LineCount.ipynb
@@ -338,6 +388,8 @@ def count_tension_rings(image: np.ndarray,
         Pupil radius in pixels
     iris_radius : int
         Iris radius in pixels
+    clahe : cv2.CLAHE, optional
+        Pre-built CLAHE to reuse across calls (see count_tension_rings_batch)
     
     Returns:
     --------
@@ -354,7 +406,8 @@ def count_tension_rings(image: np.ndarray,
         gray_image, 
         pupil_center, 
         pupil_radius,
-        iris_radius
+        iris_radius,
+        clahe=clahe
     )
     
     ring_count = len(ring_radii)
@@ -362,6 +415,89 @@ def count_tension_rings(image: np.ndarray,
     return ring_count, ring_radii, ring_confidences
 
 
+def _ring_geometry_key(sample: Tuple) -> Tuple[int, int]:
+    """Radius span searched for a sample - samples sharing it share offset grids."""
+    _, _, pupil_radius, iris_radius = sample
+    return int(pupil_radius + 5), int(iris_radius - 5)
+
+
+def _count_rings_chunk(samples: List[Tuple]) -> List[Tuple[List[int], List[float]]]:
+    """Count rings for a list of samples with one shared CLAHE object."""
+    clahe = get_clahe(2.0, (8, 8))
+    results = []
+    for image, pupil_center, pupil_radius, iris_radius in samples:
+        _, ring_radii, ring_confidences = count_tension_rings(
+            image, pupil_center, pupil_radius, iris_radius, clahe=clahe
+        )
+        results.append((ring_radii, ring_confidences))
+    return results
+
+
+def count_tension_rings_batch(samples: List[Tuple[np.ndarray, Tuple[int, int], int, int]],
+                              processes: Optional[int] = None,
+                              chunksize: int = 64) -> Dict[str, np.ndarray]:
+    """
+    Count tension rings for many eyes at once.
+    
+    Samples are processed grouped by geometry (searched radius span) so the
+    cached polar offset grids are reused back to back, and one CLAHE object is
+    shared per worker. Results are returned in input order as flat arrays.
+    
+    Parameters:
+    -----------
+    samples : list
+        (image, pupil_center, pupil_radius, iris_radius) tuples,
+        same arguments as count_tension_rings()
+    processes : int, optional
+        Number of worker processes. None, 0 or 1 runs in the calling process
+    chunksize : int
+        Samples per task when using a process pool
+    
+    Returns:
+    --------
+    dict: {
+        'ring_counts': (N,) int32 - rings per sample,
+        'ring_radii': (total,) int32 - all ring radii, concatenated,
+        'ring_confidences': (total,) float64 - matching confidences,
+        'offsets': (N+1,) int64 - sample i owns ring_radii[offsets[i]:offsets[i+1]]
+    }
+    """
+    num_samples = len(samples)
+    
+    # Group work by geometry
+    order = sorted(range(num_samples), key=lambda i: _ring_geometry_key(samples[i]))
+    ordered_samples = [samples[i] for i in order]
+    
+    if processes is not None and processes > 1 and num_samples > chunksize:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        chunks = [ordered_samples[i:i + chunksize] for i in range(0, num_samples, chunksize)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            ordered_results = [result for chunk in pool.map(_count_rings_chunk, chunks)
+                               for result in chunk]
+    else:
+        ordered_results = _count_rings_chunk(ordered_samples)
+    
+    # Scatter back to input order
+    results = [None] * num_samples
+    for i, result in zip(order, ordered_results):
+        results[i] = result
+    
+    ring_counts = np.array([len(radii) for radii, _ in results], dtype=np.int32)
+    offsets = np.zeros(num_samples + 1, dtype=np.int64)
+    np.cumsum(ring_counts, out=offsets[1:])
+    
+    ring_radii = np.array([r for radii, _ in results for r in radii], dtype=np.int32)
+    ring_confidences = np.array([c for _, confs in results for c in confs], dtype=np.float64)
+    
+    return {
+        'ring_counts': ring_counts,
+        'ring_radii': ring_radii,
+        'ring_confidences': ring_confidences,
+        'offsets': offsets
+    }
+
+
 if __name__ == "__main__":
     # Test the ring counter
     print("🧪 Testing Ring Counter...")
@@ -0,0 +1,147 @@
+"""
+Tiered Grayscale Detection - JACKPOT -> HIGH_PASS -> RESCUE fallback
+
+detect_eye_grayscale tries the tier configs in priority order, separately
+for the pupil and the iris. Two execution modes, identical results:
+
+- sequential: a tier runs only after the previous one failed (cheapest on
+  easy images, up to six full passes on hard ones)
+- parallel:   every (detector, tier) pass is submitted to a shared thread
+  pool at once (OpenCV releases the GIL); each part takes the
+  highest-priority tier that succeeds and the lower-priority passes that
+  have not started yet are cancelled (or skip themselves when a pool
+  thread reaches them first). Worst-case latency is about one tier's cost
+  instead of three.
+
+Passes already running when the answer is known cannot be interrupted
+inside OpenCV; they finish in the background and their results are
+dropped.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+Circle = Tuple[Optional[int], Optional[int], Optional[int]]
+NOT_FOUND: Circle = (None, None, None)
+
+# Returned by a pass that started after a higher-priority tier already won
+_SKIPPED: Circle = tuple([None] * 3)  # distinct object, compared by identity
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def grayscale_tiers(primary_config: Dict) -> List[Tuple[str, Dict]]:
+    """[(tier name, config)] in priority order; primary_config plays JACKPOT."""
+    from config import HIGH_PASS_CONFIG, RESCUE_CONFIG
+    return [('JACKPOT', primary_config), ('HIGH_PASS', HIGH_PASS_CONFIG), ('RESCUE', RESCUE_CONFIG)]
+
+
+def get_tier_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for parallel tier passes (config.PARALLEL_TIER_SETTINGS)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from config import PARALLEL_TIER_SETTINGS
+            _executor = ThreadPoolExecutor(max_workers=PARALLEL_TIER_SETTINGS['MAX_WORKERS'],
+                                           thread_name_prefix='detection-tier')
+        return _executor
+
+
+def _decide(futures: List[Future]) -> Tuple[bool, Optional[int]]:
+    """
+    (decided, winning tier index) for one part's futures in priority order.
+    Decided with None = every tier failed.
+    """
+    for index, future in enumerate(futures):
+        if not future.done():
+            return False, None
+        if future.result()[0] is not None:
+            return True, index
+    return True, None
+
+
+def run_tiers_parallel(image: np.ndarray, tiers: List[Tuple[str, Dict]],
+                       detect_pupil: Callable, detect_iris: Callable,
+                       executor: Optional[ThreadPoolExecutor] = None) -> Dict:
+    """
+    Evaluate every tier of both detectors concurrently.
+
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        BGR eye image (read-only for all passes)
+    tiers : list
+        [(name, config)] in priority order (see grayscale_tiers)
+    detect_pupil, detect_iris : callable
+        (image, config) -> (x, y, radius) or (None, None, None)
+    executor : ThreadPoolExecutor, optional
+        Pool to run on (default: get_tier_executor())
+
+    Returns:
+    --------
+    dict: {
+        'pupil': (x, y, radius) or (None, None, None),
+        'iris': (x, y, radius) or (None, None, None),
+        'pupil_tier': int or None (index into tiers),
+        'iris_tier': int or None,
+        'passes_run': int (passes that were not cancelled)
+    }
+    """
+    executor = executor or get_tier_executor()
+
+    # Best tier found so far per part, published by the pool threads so a
+    # queued lower-priority pass skips itself even before it is cancelled
+    best = {'pupil': len(tiers), 'iris': len(tiers)}
+    best_lock = threading.Lock()
+
+    def run_pass(part: str, detect: Callable, index: int, tier_config: Dict):
+        if index > best[part]:
+            return _SKIPPED
+        circle = detect(image, tier_config)
+        if circle[0] is not None:
+            with best_lock:
+                best[part] = min(best[part], index)
+        return circle
+
+    # Submitted tier by tier so a busy pool starts the likely winners first
+    parts = {'pupil': [], 'iris': []}
+    for index, (_, tier_config) in enumerate(tiers):
+        parts['pupil'].append(executor.submit(run_pass, 'pupil', detect_pupil, index, tier_config))
+        parts['iris'].append(executor.submit(run_pass, 'iris', detect_iris, index, tier_config))
+    all_futures = parts['pupil'] + parts['iris']
+
+    winners: Dict[str, Optional[int]] = {}
+    pending = set(all_futures)
+    while True:
+        for part, futures in parts.items():
+            if part in winners:
+                continue
+            decided, index = _decide(futures)
+            if decided:
+                winners[part] = index
+                # Lower-priority passes of this part are no longer needed
+                for future in futures[(index + 1) if index is not None else len(futures):]:
+                    future.cancel()
+
+        # Either part exhausted every tier: the image fails, drop the rest
+        if any(index is None for index in winners.values()) or len(winners) == len(parts):
+            break
+        pending = {future for future in pending if not future.done()}
+        wait(pending, return_when=FIRST_COMPLETED)
+
+    passes_run = 0
+    for future in all_futures:
+        if not future.cancel() and not (future.done() and future.result() is _SKIPPED):
+            passes_run += 1
+
+    result = {'passes_run': passes_run}
+    for part, futures in parts.items():
+        index = winners.get(part)
+        result[part] = futures[index].result() if index is not None else NOT_FOUND
+        result[f'{part}_tier'] = index
+    return result
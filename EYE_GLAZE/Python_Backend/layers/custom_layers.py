@@ -41,6 +41,30 @@ class WeightedFeatureFusion(layers.Layer):
         # Store the last computed alpha for monitoring
         self.last_alpha = None
     
+    def compute_alpha(self, inputs):
+        """
+        Per-sample fusion weight from the gating network.
+        
+        Also used on symbolic tensors to export alpha as a model output
+        (see pipeline/model_loader.py::build_serving_model).
+        
+        Args:
+            inputs: [pupil_age_features, iris_features]
+        
+        Returns:
+            alpha: (batch, 1) - Iris stream weight
+        """
+        pupil_age_features, iris_features = inputs
+        
+        # 1. Concatenate both feature streams for gating network
+        # (named after this layer: an auto-generated name can clash with layers
+        #  of a loaded model when alpha is exported as a graph output)
+        concatenated_features = layers.concatenate([iris_features, pupil_age_features],
+                                                   name=f'{self.name}_gating_concat')
+        
+        # 2. KEY: Alpha is computed PER SAMPLE!
+        return self.gating_network(concatenated_features)
+    
     def call(self, inputs):
         """
         Args:
@@ -53,12 +77,8 @@ class WeightedFeatureFusion(layers.Layer):
         """
         pupil_age_features, iris_features = inputs
         
-        # 1. Concatenate both feature streams for gating network
-        concatenated_features = layers.concatenate([iris_features, pupil_age_features])
-        
-        # 2. Predict dynamic alpha for each sample (shape: batch_size, 1)
-        # KEY: Alpha is computed PER SAMPLE!
-        alpha = self.gating_network(concatenated_features)
+        # 1-2. Predict dynamic alpha for each sample (shape: batch_size, 1)
+        alpha = self.compute_alpha(inputs)
         
         # Store alpha for monitoring purposes
         self.last_alpha = alpha
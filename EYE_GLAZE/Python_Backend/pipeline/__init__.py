@@ -1,15 +1,53 @@
 """
 Pipeline modules for model loading and inference
+
+TensorFlow-backed names (model loading, prediction, micro-batching) are
+imported lazily on first access, so detection/measurement-only users of
+run_detection / run_measurements start without importing TensorFlow.
 """
 
-from .model_loader import load_production_model, get_model_info, predict_single
+import importlib
+
 from .inference_pipeline import run_inference_pipeline, run_detection, run_measurements
+from .result_cache import PipelineCache, model_file_tag
+from .metrics import get_metrics, render_prometheus
+
+# name -> submodule, resolved on first attribute access (PEP 562)
+_LAZY_EXPORTS = {
+    'load_production_model': 'model_loader',
+    'get_model_info': 'model_loader',
+    'predict_single': 'model_loader',
+    'predict_batch': 'model_loader',
+    'get_serving_function': 'model_loader',
+    'benchmark_serving_latency': 'model_loader',
+    'warmup_model': 'model_loader',
+    'MicroBatcher': 'batching'
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f'.{_LAZY_EXPORTS[name]}', __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'load_production_model',
     'get_model_info',
     'predict_single',
+    'predict_batch',
+    'get_serving_function',
+    'benchmark_serving_latency',
+    'warmup_model',
+    'MicroBatcher',
     'run_inference_pipeline',
     'run_detection',
-    'run_measurements'
+    'run_measurements',
+    'PipelineCache',
+    'model_file_tag',
+    'get_metrics',
+    'render_prometheus'
 ]
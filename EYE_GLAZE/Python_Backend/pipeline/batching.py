@@ -0,0 +1,237 @@
+"""
+Micro-Batching Scheduler - Dynamic batching for concurrent /predict requests
+
+Request threads hand their preprocessed sample to a MicroBatcher and block
+on a future. A single worker thread collects samples until either
+MAX_BATCH_SIZE samples are waiting or MAX_WAIT_MS has passed since the first
+one arrived, runs ONE batched forward pass through the traced serving
+function, and routes each (prediction, alpha) back to its request.
+
+At batch size 1 the dual-stream CNN leaves most of its throughput unused;
+under concurrent load this trades at most MAX_WAIT_MS of latency for one
+forward pass per batch instead of one per request.
+
+Settings come from config.MICRO_BATCH_SETTINGS.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.buffer_pool import get_buffer_pool
+from pipeline.model_loader import (
+    get_serving_function,
+    prepare_sample_inputs,
+    SERVING_INPUT_SIGNATURE,
+    PREDICTION_OUTPUT,
+    ALPHA_OUTPUT
+)
+
+
+# Worker shutdown marker
+_STOP = object()
+
+
+def _batching_settings() -> Dict:
+    # Imported lazily like the other optional settings
+    from config import MICRO_BATCH_SETTINGS
+    return MICRO_BATCH_SETTINGS
+
+
+class MicroBatcher:
+    """
+    Collects single samples from concurrent callers into batched forward passes.
+
+    Usage:
+        batcher = MicroBatcher(model)
+        pred, alpha = batcher.predict(pupil_img, iris_img, age_vector, ring_count)
+        batcher.stats()   # queue depth / batch size metrics
+        batcher.close()
+    """
+
+    def __init__(self, model, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        """
+        Parameters:
+        -----------
+        model : keras.Model
+            Production (or serving) model
+        max_batch_size : int, optional
+            Largest batch per forward pass (default: MICRO_BATCH_SETTINGS['MAX_BATCH_SIZE'])
+        max_wait_ms : float, optional
+            Longest time the first sample of a batch waits for company
+            (default: MICRO_BATCH_SETTINGS['MAX_WAIT_MS'])
+        """
+        settings = _batching_settings()
+        self.max_batch_size = int(max_batch_size or settings['MAX_BATCH_SIZE'])
+        self.max_wait_ms = float(settings['MAX_WAIT_MS'] if max_wait_ms is None else max_wait_ms)
+
+        self._serve = get_serving_function(model)
+        image_shape = tuple(SERVING_INPUT_SIGNATURE['pupil_input'].shape[1:3])
+        self._image_pool = get_buffer_pool(self.max_batch_size, image_shape)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Metrics
+        self._batches = 0
+        self._samples = 0
+        self._max_queue_depth = 0
+        self._batch_size_counts = {}
+        self._total_wait_ms = 0.0
+        self._total_forward_ms = 0.0
+
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # Request side
+    # ------------------------------------------------------------------
+
+    def submit(self, pupil_img: np.ndarray, iris_img: np.ndarray,
+               age_vector: np.ndarray, ring_count: float) -> Future:
+        """
+        Queue one sample (same format as predict_single).
+
+        Returns:
+        --------
+        Future: resolves to (prediction, alpha)
+        """
+        inputs = prepare_sample_inputs(pupil_img, iris_img, age_vector, ring_count)
+        future = Future()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((inputs, future, time.perf_counter()))
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        return future
+
+    def predict(self, pupil_img: np.ndarray, iris_img: np.ndarray, age_vector: np.ndarray,
+                ring_count: float, timeout: Optional[float] = None) -> Tuple[float, Optional[float]]:
+        """Blocking drop-in for predict_single(model, ...). Returns (prediction, alpha)."""
+        return self.submit(pupil_img, iris_img, age_vector, ring_count).result(timeout=timeout)
+
+    def stats(self) -> Dict:
+        """
+        Scheduler metrics.
+
+        Returns:
+        --------
+        dict: {
+            'queue_depth': int (samples waiting now),
+            'max_queue_depth': int,
+            'batches': int,
+            'samples': int,
+            'mean_batch_size': float,
+            'batch_size_histogram': {batch_size: count},
+            'mean_queue_wait_ms': float (submit -> forward pass start),
+            'mean_forward_ms': float (per batch),
+            'max_batch_size': int,
+            'max_wait_ms': float
+        }
+        """
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_queue_depth,
+                'batches': self._batches,
+                'samples': self._samples,
+                'mean_batch_size': self._samples / self._batches if self._batches else 0.0,
+                'batch_size_histogram': dict(sorted(self._batch_size_counts.items())),
+                'mean_queue_wait_ms': self._total_wait_ms / self._samples if self._samples else 0.0,
+                'mean_forward_ms': self._total_forward_ms / self._batches if self._batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms
+            }
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop accepting samples, finish the queued ones and stop the worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """Gather up to max_batch_size items, waiting at most max_wait_ms after the first."""
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            self._run_batch(batch)
+
+        # Drain anything queued before close()
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        for start in range(0, len(leftovers), self.max_batch_size):
+            self._run_batch(leftovers[start:start + self.max_batch_size])
+
+    def _run_batch(self, batch: List):
+        start = time.perf_counter()
+        futures = [future for _, future, _ in batch]
+
+        try:
+            # Images are copied into pooled (max_batch_size, 224, 224, 5) buffers
+            with self._image_pool.lease() as pupil_buffer, self._image_pool.lease() as iris_buffer:
+                for i, (inputs, _, _) in enumerate(batch):
+                    pupil_buffer[i] = inputs['pupil_input'][0]
+                    iris_buffer[i] = inputs['iris_input'][0]
+                outputs = self._serve({
+                    'pupil_input': pupil_buffer[:len(batch)],
+                    'iris_input': iris_buffer[:len(batch)],
+                    'age_input': np.concatenate([item[0]['age_input'] for item in batch]).astype(np.float32),
+                    'iris_ring_count': np.concatenate([item[0]['iris_ring_count'] for item in batch]).astype(np.float32)
+                })
+            preds = outputs[PREDICTION_OUTPUT].numpy().reshape(-1)
+            alphas = outputs[ALPHA_OUTPUT].numpy().reshape(-1) if ALPHA_OUTPUT in outputs else None
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        forward_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._batches += 1
+            self._samples += len(batch)
+            self._batch_size_counts[len(batch)] = self._batch_size_counts.get(len(batch), 0) + 1
+            self._total_wait_ms += sum((start - submitted) * 1000 for _, _, submitted in batch)
+            self._total_forward_ms += forward_ms
+
+        for i, future in enumerate(futures):
+            alpha = float(alphas[i]) if alphas is not None else None
+            future.set_result((float(preds[i]), alpha))
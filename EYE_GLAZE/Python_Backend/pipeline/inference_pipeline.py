@@ -4,13 +4,17 @@ Author: AI Assistant
 Date: 2025-11-11
 
 Orchestrates the complete production pipeline:
-1. Load image and detect type (color/grayscale)
+1. Decode image once and detect type (color/grayscale)
+   (optionally answered from the content-hash result cache)
 2. Detect pupil and iris using adaptive detection
 3. Measure pupil diameter and count tension rings
 4. Preprocess for model input (5-channel format, EXACT match to training)
 5. Run prediction with production model (best_dual_stream_model.keras)
 6. Generate results with fusion analysis
 
+Every stage is timed (results['timings_ms']) and aggregated for the
+/metrics endpoint (pipeline/metrics.py).
+
 CRITICAL: All preprocessing must match training exactly:
 - Pupil stream: RGB only (channels 3-4 ZEROED)
 - Iris stream: RGB + Canny + BlackHat (all 5 channels active)
@@ -19,9 +23,8 @@ CRITICAL: All preprocessing must match training exactly:
 """
 
 import os
-import cv2
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, Optional
 from pathlib import Path
 
 # Import detection modules
@@ -31,11 +34,15 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from detection import (
     detect_eye_color,
     detect_eye_grayscale,
-    count_tension_rings
+    count_tension_rings,
+    load_image
 )
+from detection.image_io import ImageSource, describe_source, is_grayscale_image
 from measurement import measure_pupil_diameter, validate_pupil_measurement
-from utils import preprocess_eye_image, encode_age, extract_eye_region
-from pipeline.model_loader import predict_single
+from utils import preprocess_pupil_stream, preprocess_iris_stream, encode_age, extract_eye_region
+from utils.buffer_pool import InputBufferPool, get_buffer_pool
+from pipeline.result_cache import PipelineCache, image_digest
+from pipeline.metrics import StageTimer, get_metrics
 import config
 
 
@@ -68,47 +75,44 @@ def classify_stress_level(prediction_score: float, confidence: float) -> str:
         return "Normal"
 
 
-def detect_image_type(image_path: str) -> str:
+def detect_image_type(image_source: ImageSource) -> str:
     """
     Detect if image is color or grayscale.
     
     Parameters:
     -----------
-    image_path : str
-        Path to input image
+    image_source : str, Path, bytes or numpy.ndarray
+        Input image path, encoded bytes, or decoded image
+        (pass the decoded array to avoid a second decode)
     
     Returns:
     --------
     str: 'color' or 'grayscale'
     """
     try:
-        img = cv2.imread(image_path)
+        img = image_source if isinstance(image_source, np.ndarray) else load_image(image_source)
         if img is None:
             return 'unknown'
         
-        if len(img.shape) == 2:
-            return 'grayscale'
-        elif img.shape[2] == 1:
-            return 'grayscale'
-        else:
-            # Check if RGB channels are identical (grayscale saved as color)
-            if np.allclose(img[:, :, 0], img[:, :, 1]) and np.allclose(img[:, :, 1], img[:, :, 2]):
-                return 'grayscale'
-            return 'color'
+        # Grayscale saved as color has identical channels (sampled check, exact result)
+        return 'grayscale' if is_grayscale_image(img) else 'color'
     
     except Exception as e:
         print(f"[ERROR] Error detecting image type: {e}")
         return 'unknown'
 
 
-def run_detection(image_path: str) -> Dict:
+def run_detection(image_source: ImageSource) -> Dict:
     """
     Run eye detection on an image (auto-detects color/grayscale).
     
+    The image is decoded once here; type detection and the detectors all
+    work on the same array.
+    
     Parameters:
     -----------
-    image_path : str
-        Path to input image
+    image_source : str, Path, bytes or numpy.ndarray
+        Input image path, encoded bytes (e.g. an upload), or decoded BGR image
     
     Returns:
     --------
@@ -120,17 +124,23 @@ def run_detection(image_path: str) -> Dict:
         - 'image': numpy array
         - 'error': str (if failed)
     """
+    # Decode once
+    image = load_image(image_source)
+    if image is None:
+        return {'success': False, 'error': f"Failed to load image: {describe_source(image_source)}"}
+    
     # Detect image type
-    img_type = detect_image_type(image_path)
+    img_type = detect_image_type(image)
     
     if img_type == 'unknown':
         return {'success': False, 'error': 'Could not determine image type'}
     
     # Run appropriate detector
     if img_type == 'color':
-        result = detect_eye_color(image_path)
+        result = detect_eye_color(image)
     else:
-        result = detect_eye_grayscale(image_path, config.DEFAULT_CONFIG)
+        result = detect_eye_grayscale(image, config.DEFAULT_CONFIG,
+                                      parallel=config.PARALLEL_TIER_SETTINGS['ENABLED'])
     
     result['image_type'] = img_type
     
@@ -213,7 +223,8 @@ def run_measurements(detection_result: Dict) -> Dict:
         }
 
 
-def prepare_model_inputs(detection_result: Dict, measurements: Dict, age: int) -> Dict:
+def prepare_model_inputs(detection_result: Dict, measurements: Dict, age: int,
+                         buffer_pool: Optional[InputBufferPool] = None) -> Dict:
     """
     Prepare inputs for model prediction.
     
@@ -225,6 +236,9 @@ def prepare_model_inputs(detection_result: Dict, measurements: Dict, age: int) -
         Output from run_measurements()
     age : int
         Subject age
+    buffer_pool : InputBufferPool, optional
+        If given, both images are preprocessed in place into pooled
+        (1, 224, 224, 5) buffers - return them with release_model_inputs()
     
     Returns:
     --------
@@ -234,7 +248,9 @@ def prepare_model_inputs(detection_result: Dict, measurements: Dict, age: int) -
         - 'age_vector': numpy array (8,)
         - 'ring_count': float
         - 'ready': bool
+        - 'buffers': pooled arrays backing the images (only with buffer_pool)
     """
+    buffers = None
     try:
         # Extract eye regions
         pupil_center, pupil_radius = detection_result['pupil']
@@ -249,9 +265,14 @@ def prepare_model_inputs(detection_result: Dict, measurements: Dict, age: int) -
             print(f"❌ Failed to extract eye regions")
             return {'ready': False, 'error': 'Region extraction failed'}
         
-        # Preprocess to 5-channel format
-        pupil_img = preprocess_eye_image(pupil_region, config.TARGET_SIZE)
-        iris_img = preprocess_eye_image(iris_region, config.TARGET_SIZE)
+        # Preprocess to 5-channel format (pupil: RGB only, channels 3-4 zeroed;
+        # iris: RGB + Canny + BlackHat), in place into pooled buffers if given
+        if buffer_pool is not None:
+            buffers = [buffer_pool.acquire(), buffer_pool.acquire()]
+        pupil_img = preprocess_pupil_stream(pupil_region, config.TARGET_SIZE,
+                                            out=buffers[0][0] if buffers else None)
+        iris_img = preprocess_iris_stream(iris_region, config.TARGET_SIZE,
+                                          out=buffers[1][0] if buffers else None)
         
         # Encode age
         age_vector = encode_age(age)
@@ -259,20 +280,37 @@ def prepare_model_inputs(detection_result: Dict, measurements: Dict, age: int) -
         # Normalize ring count
         ring_count_normalized = measurements['ring_count'] / 10.0
         
-        return {
+        model_inputs = {
             'pupil_img': pupil_img,
             'iris_img': iris_img,
             'age_vector': age_vector,
             'ring_count': ring_count_normalized,
             'ready': True
         }
+        if buffers:
+            model_inputs['buffers'] = buffers
+        return model_inputs
     
     except Exception as e:
         print(f"❌ Input preparation error: {e}")
+        for buffer in buffers or []:
+            buffer_pool.release(buffer)
         return {'ready': False, 'error': str(e)}
 
 
-def run_inference_pipeline(image_path: str, age: int, model) -> Dict:
+def release_model_inputs(model_inputs: Dict, buffer_pool: InputBufferPool):
+    """
+    Return pooled buffers from prepare_model_inputs() to the pool. The image
+    entries are cleared since the buffers will be reused by other requests.
+    """
+    for buffer in model_inputs.pop('buffers', None) or []:
+        buffer_pool.release(buffer)
+    model_inputs['pupil_img'] = None
+    model_inputs['iris_img'] = None
+
+
+def run_inference_pipeline(image_source: ImageSource, age: int, model, batcher=None,
+                           cache: Optional[PipelineCache] = None) -> Dict:
     """
     Complete production inference pipeline: detection → measurement → prediction.
     
@@ -284,12 +322,20 @@ def run_inference_pipeline(image_path: str, age: int, model) -> Dict:
     
     Parameters:
     -----------
-    image_path : str
-        Path to input eye image
+    image_source : str, Path, bytes or numpy.ndarray
+        Input eye image: file path, encoded bytes, or decoded BGR array.
+        Arrays/bytes are processed fully in memory (no temp files).
     age : int
         Subject age in years
     model : keras.Model
         Production model (best_dual_stream_model.keras)
+    batcher : MicroBatcher, optional
+        If given, the prediction is queued on this micro-batching scheduler
+        (pipeline/batching.py) and scored together with concurrent requests
+    cache : PipelineCache, optional
+        Content-hash result cache (pipeline/result_cache.py): detection and
+        measurements are reused for the same pixels, the prediction for the
+        same pixels and age group
     
     Returns:
     --------
@@ -298,29 +344,82 @@ def run_inference_pipeline(image_path: str, age: int, model) -> Dict:
         - 'measurements': Pupil diameter, ring count, validation
         - 'prediction': Model prediction with alpha analysis
         - 'success': Overall pipeline status
+        - 'cache': {'detection': hit, 'prediction': hit} (only with cache)
+        - 'timings_ms': {stage: ms} for the stages that ran, plus 'total'
+          (also aggregated into pipeline.metrics.get_metrics() for /metrics)
     """
+    timer = StageTimer()
+    with timer.stage('total'):
+        results = _run_pipeline_stages(image_source, age, model, batcher, cache, timer)
+    results['timings_ms'] = timer.timings_ms
+    get_metrics().record(results)
+    return results
+
+
+def _run_pipeline_stages(image_source: ImageSource, age: int, model, batcher,
+                         cache: Optional[PipelineCache], timer: StageTimer) -> Dict:
+    """Body of run_inference_pipeline; every stage runs under timer."""
     # Minimal logging - only show errors
     
     results = {
-        'image_path': image_path,
+        'image_path': str(image_source) if isinstance(image_source, (str, Path)) else None,
         'age': age,
         'success': False
     }
     
-    # Step 1: Detection
-    detection_result = run_detection(image_path)
+    # Cache keys are computed from the decoded pixels
+    digest = None
+    if cache is not None:
+        with timer.stage('hash'):
+            image = load_image(image_source)
+            if image is not None:
+                image_source = image
+                digest = image_digest(image)
+                results['cache'] = {'detection': False, 'prediction': False}
+    
+    # Steps 1-2: Detection + measurements (age independent)
+    cached = cache.detection.get(cache.detection_key(digest)) if digest else None
+    if cached is not None:
+        detection_result, measurements = cached
+        if detection_result['success']:
+            detection_result['image'] = image_source
+        results['cache']['detection'] = True
+    else:
+        # Step 1: Detection
+        with timer.stage('detection'):
+            detection_result = run_detection(image_source)
+        
+        # Step 2: Measurements
+        measurements = None
+        if detection_result['success']:
+            with timer.stage('measurements'):
+                measurements = run_measurements(detection_result)
+        
+        if digest:
+            stored = {key: value for key, value in detection_result.items() if key != 'image'}
+            cache.detection.put(cache.detection_key(digest), (stored, measurements))
+    
     results['detection'] = detection_result
     
     if not detection_result['success']:
         print(f"❌ Detection failed: {detection_result.get('error', 'Unknown error')}")
         return results
     
-    # Step 2: Measurements
-    measurements = run_measurements(detection_result)
     results['measurements'] = measurements
     
-    # Step 3: Prepare inputs
-    model_inputs = prepare_model_inputs(detection_result, measurements, age)
+    # Same pixels and age group: nothing left to run
+    prediction = cache.prediction.get(cache.prediction_key(digest, age)) if digest else None
+    if prediction is not None:
+        results['prediction'] = prediction
+        results['success'] = True
+        results['cache']['prediction'] = True
+        print(f"✅ Analysis complete (cached): {prediction['stress_level']}")
+        return results
+    
+    # Step 3: Prepare inputs (preprocessed in place into pooled buffers)
+    buffer_pool = get_buffer_pool(1, config.TARGET_SIZE)
+    with timer.stage('preprocessing'):
+        model_inputs = prepare_model_inputs(detection_result, measurements, age, buffer_pool=buffer_pool)
     results['model_inputs'] = model_inputs
     
     if not model_inputs['ready']:
@@ -329,13 +428,24 @@ def run_inference_pipeline(image_path: str, age: int, model) -> Dict:
     
     # Step 4: Run prediction
     try:
-        pred, alpha = predict_single(
-            model,
-            model_inputs['pupil_img'],
-            model_inputs['iris_img'],
-            model_inputs['age_vector'],
-            model_inputs['ring_count']
-        )
+        with timer.stage('prediction'):
+            if batcher is not None:
+                pred, alpha = batcher.predict(
+                    model_inputs['pupil_img'],
+                    model_inputs['iris_img'],
+                    model_inputs['age_vector'],
+                    model_inputs['ring_count']
+                )
+            else:
+                # TensorFlow-backed - imported on first prediction, not at import time
+                from pipeline.model_loader import predict_single
+                pred, alpha = predict_single(
+                    model,
+                    model_inputs['pupil_img'],
+                    model_inputs['iris_img'],
+                    model_inputs['age_vector'],
+                    model_inputs['ring_count']
+                )
         
         # Calculate confidence
         confidence = max(pred, 1 - pred)
@@ -352,6 +462,8 @@ def run_inference_pipeline(image_path: str, age: int, model) -> Dict:
         
         results['prediction'] = prediction
         results['success'] = True
+        if digest:
+            cache.prediction.put(cache.prediction_key(digest, age), prediction)
         
         print(f"✅ Analysis complete: {stress_level}")
         
@@ -361,6 +473,9 @@ def run_inference_pipeline(image_path: str, age: int, model) -> Dict:
         traceback.print_exc()
         results['prediction'] = {'error': str(e)}
     
+    finally:
+        release_model_inputs(model_inputs, buffer_pool)
+    
     return results
 
 
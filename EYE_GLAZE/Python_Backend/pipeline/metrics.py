@@ -0,0 +1,224 @@
+"""
+Pipeline Metrics - Per-stage latency and detection-tier counters
+
+run_inference_pipeline times every stage with a StageTimer (monotonic
+perf_counter) and attaches the timings to its results as
+results['timings_ms']. Each finished request is recorded in a process-wide
+PipelineMetrics registry:
+
+- latency per stage (hash, detection, measurements, preprocessing,
+  prediction, total) over a sliding window -> p50 / p95 / p99
+- which detection tier succeeded (grayscale config_used, or 'COLOR')
+- request outcomes and result-cache hits
+
+render_prometheus() exports everything in the Prometheus text format for
+the /metrics endpoint in app.py. Metrics are per process: with serve.py
+every worker reports its own numbers.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+
+STAGES = ('hash', 'detection', 'measurements', 'preprocessing', 'prediction', 'total')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _quantile_key(q: float) -> str:
+    """snapshot() key of a quantile: 0.95 -> 'p95_ms'"""
+    return f'p{q * 100:g}_ms'
+
+METRIC_PREFIX = 'eye_glaze'
+
+
+class StageTimer:
+    """
+    Wall-clock time per pipeline stage, in milliseconds.
+
+    Usage:
+        timer = StageTimer()
+        with timer.stage('detection'):
+            ...
+        timer.timings_ms   # {'detection': 812.4}
+    """
+
+    def __init__(self):
+        self.timings_ms: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms[name] = self.timings_ms.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+class PipelineMetrics:
+    """Thread-safe aggregation of StageTimer results and pipeline counters."""
+
+    def __init__(self, window: int = 2048):
+        """
+        Parameters:
+        -----------
+        window : int
+            Most recent samples per stage used for the quantiles
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {stage: deque(maxlen=window) for stage in STAGES}
+        self._sum_ms = {stage: 0.0 for stage in STAGES}
+        self._count = {stage: 0 for stage in STAGES}
+        self._tiers: Dict[str, int] = {}
+        self._outcomes: Dict[str, int] = {}
+        self._cache_hits: Dict[str, int] = {}
+
+    def record(self, results: Dict):
+        """Add one run_inference_pipeline result (uses 'timings_ms', 'detection', 'cache')."""
+        timings = results.get('timings_ms') or {}
+        detection = results.get('detection') or {}
+        outcome = _outcome(results)
+
+        with self._lock:
+            for stage, elapsed_ms in timings.items():
+                if stage not in self._samples:
+                    continue
+                self._samples[stage].append(elapsed_ms)
+                self._sum_ms[stage] += elapsed_ms
+                self._count[stage] += 1
+
+            # A detection-cache hit replays the stored result: counted in cache_hits only
+            if detection.get('success') and not (results.get('cache') or {}).get('detection'):
+                tier = detection.get('config_used') or detection.get('image_type', 'unknown').upper()
+                self._tiers[tier] = self._tiers.get(tier, 0) + 1
+
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+            for tier, hit in (results.get('cache') or {}).items():
+                if hit:
+                    self._cache_hits[tier] = self._cache_hits.get(tier, 0) + 1
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+        --------
+        dict: {
+            'stages': {stage: {'count', 'sum_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'}},
+            'detection_tiers': {config_used: count},
+            'outcomes': {outcome: count},
+            'cache_hits': {tier: count}
+        }
+        """
+        with self._lock:
+            stages = {}
+            for stage in STAGES:
+                if not self._count[stage]:
+                    continue
+                values = np.percentile(np.fromiter(self._samples[stage], dtype=np.float64),
+                                       [q * 100 for q in QUANTILES])
+                stages[stage] = {
+                    'count': self._count[stage],
+                    'sum_ms': self._sum_ms[stage],
+                    'mean_ms': self._sum_ms[stage] / self._count[stage]
+                }
+                stages[stage].update({_quantile_key(q): float(value) for q, value in zip(QUANTILES, values)})
+            return {
+                'stages': stages,
+                'detection_tiers': dict(self._tiers),
+                'outcomes': dict(self._outcomes),
+                'cache_hits': dict(self._cache_hits)
+            }
+
+    def reset(self):
+        with self._lock:
+            for stage in STAGES:
+                self._samples[stage].clear()
+                self._sum_ms[stage] = 0.0
+                self._count[stage] = 0
+            self._tiers.clear()
+            self._outcomes.clear()
+            self._cache_hits.clear()
+
+
+def _outcome(results: Dict) -> str:
+    if results.get('success'):
+        return 'success'
+    if not (results.get('detection') or {}).get('success'):
+        return 'detection_failed'
+    if not (results.get('model_inputs') or {}).get('ready', True):
+        return 'preprocessing_failed'
+    return 'prediction_failed'
+
+
+_metrics = PipelineMetrics()
+
+
+def get_metrics() -> PipelineMetrics:
+    """Process-wide registry run_inference_pipeline records into."""
+    return _metrics
+
+
+# ============================================================================
+# PROMETHEUS TEXT FORMAT
+# ============================================================================
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus(metrics: Optional[PipelineMetrics] = None, extra_gauges: Optional[Dict] = None) -> str:
+    """
+    Prometheus text exposition (version 0.0.4) of the pipeline metrics.
+
+    Parameters:
+    -----------
+    metrics : PipelineMetrics, optional
+        Registry to export (default: get_metrics())
+    extra_gauges : dict, optional
+        {metric_name: (help, value)} appended as gauges (e.g. queue depth)
+
+    Returns:
+    --------
+    str: text/plain; version=0.0.4 body
+    """
+    metrics = metrics or get_metrics()
+    snapshot = metrics.snapshot()
+
+    lines = []
+
+    name = f'{METRIC_PREFIX}_stage_latency_seconds'
+    lines.append(f'# HELP {name} Inference pipeline stage latency (quantiles over the last '
+                 f'{metrics.window} requests)')
+    lines.append(f'# TYPE {name} summary')
+    for stage, stats in snapshot['stages'].items():
+        for q in QUANTILES:
+            lines.append(f'{name}{_labels(stage=stage, quantile=q)} {stats[_quantile_key(q)] / 1000:.6f}')
+        lines.append(f'{name}_sum{_labels(stage=stage)} {stats["sum_ms"] / 1000:.6f}')
+        lines.append(f'{name}_count{_labels(stage=stage)} {stats["count"]}')
+
+    for name, help_text, label, values in (
+        (f'{METRIC_PREFIX}_detection_tier_total', 'Successful detections per tier (config_used)',
+         'tier', snapshot['detection_tiers']),
+        (f'{METRIC_PREFIX}_pipeline_requests_total', 'Pipeline runs per outcome', 'outcome',
+         snapshot['outcomes']),
+        (f'{METRIC_PREFIX}_result_cache_hits_total', 'Result cache hits per tier', 'cache',
+         snapshot['cache_hits'])
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for key, count in sorted(values.items()):
+            lines.append(f'{name}{_labels(**{label: key})} {count}')
+
+    for name, (help_text, value) in (extra_gauges or {}).items():
+        lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_{name} gauge')
+        lines.append(f'{METRIC_PREFIX}_{name} {value}')
+
+    return '\n'.join(lines) + '\n'
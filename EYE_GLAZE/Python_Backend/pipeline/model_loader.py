@@ -35,6 +35,7 @@ finally:
     sys.stdout = _original_stdout
     sys.stderr = _original_stderr
 
+import weakref
 import numpy as np
 from typing import Dict, Tuple, Optional
 
@@ -42,9 +43,264 @@ from typing import Dict, Tuple, Optional
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from layers import CUSTOM_OBJECTS
+from layers.custom_layers import WeightedFeatureFusion
 from utils import focal_loss
 
 
+# Output names of the serving model built by build_serving_model()
+PREDICTION_OUTPUT = 'stress_probability'
+ALPHA_OUTPUT = 'fusion_alpha'
+
+# Serving models built on demand for models that were not loaded through
+# load_production_model (keyed weakly so they die with the source model)
+_serving_models = weakref.WeakKeyDictionary()
+
+
+def build_serving_model(model: keras.Model) -> keras.Model:
+    """
+    Wrap the trained model so one forward pass returns both the stress
+    probability and the per-sample fusion alpha.
+    
+    The WeightedFeatureFusion gating network is re-applied to the fusion
+    layer's symbolic inputs, so alpha becomes a real graph output that shares
+    every weight (and the whole dual-CNN trunk) with the prediction. No
+    weights are copied and predictions are unchanged.
+    
+    Parameters:
+    -----------
+    model : keras.Model
+        Loaded production model (single output)
+    
+    Returns:
+    --------
+    keras.Model: Model with outputs [prediction (B, 1), alpha (B, 1)], or the
+                 input model unchanged if it already has several outputs or
+                 has no WeightedFeatureFusion layer
+    """
+    if len(model.outputs) > 1:
+        return model
+    
+    fusion_layer = next((layer for layer in model.layers
+                         if isinstance(layer, WeightedFeatureFusion)), None)
+    if fusion_layer is None:
+        print(f"   [INFO] No WeightedFeatureFusion layer, serving prediction only")
+        return model
+    
+    alpha = fusion_layer.compute_alpha(fusion_layer.input)
+    
+    return keras.Model(
+        inputs=model.inputs,
+        outputs={PREDICTION_OUTPUT: model.outputs[0], ALPHA_OUTPUT: alpha},
+        name=f'{model.name}_serving'
+    )
+
+
+def get_serving_model(model: keras.Model) -> keras.Model:
+    """Serving model for model, built once and cached."""
+    if len(model.outputs) > 1:
+        return model
+    if model not in _serving_models:
+        serving_model = build_serving_model(model)
+        # None = no alpha available, serve the model itself (avoids a strong self-reference)
+        _serving_models[model] = serving_model if serving_model is not model else None
+    return _serving_models[model] or model
+
+
+# ============================================================================
+# COMPILED SERVING FUNCTION
+# ============================================================================
+
+# Fixed input signature (batch dimension free so micro-batches reuse the trace)
+SERVING_INPUT_SIGNATURE = {
+    'pupil_input': tf.TensorSpec((None, 224, 224, 5), tf.float32, name='pupil_input'),
+    'iris_input': tf.TensorSpec((None, 224, 224, 5), tf.float32, name='iris_input'),
+    'age_input': tf.TensorSpec((None, 8), tf.float32, name='age_input'),
+    'iris_ring_count': tf.TensorSpec((None, 1), tf.float32, name='iris_ring_count')
+}
+
+# Serving functions are stored on the model itself ({jit_compile: function}).
+# The traced function holds the serving model (the model itself for
+# multi-output models), so a cache keyed weakly on the model could never drop it.
+SERVING_FUNCTIONS_ATTR = '_eye_glaze_serving_functions'
+
+
+def _serving_jit_compile() -> bool:
+    # Imported lazily (config is optional for library use)
+    try:
+        from config import SERVING_JIT_COMPILE
+        return bool(SERVING_JIT_COMPILE)
+    except ImportError:
+        return False
+
+
+def make_serving_function(model: keras.Model, jit_compile: Optional[bool] = None):
+    """
+    Trace the serving model once as a tf.function with a fixed input signature.
+    
+    Calling the model directly skips the data adapter / predict loop that
+    model.predict() sets up on every call, which dominates latency at batch
+    size 1.
+    
+    Parameters:
+    -----------
+    model : keras.Model
+        Production model (plain or serving model)
+    jit_compile : bool, optional
+        XLA JIT compile the forward pass (default: config.SERVING_JIT_COMPILE)
+    
+    Returns:
+    --------
+    tf.function: serve(inputs) -> {'stress_probability': (B, 1), 'fusion_alpha': (B, 1)}
+                 ('fusion_alpha' is missing if the model has no fusion layer)
+    """
+    serving_model = get_serving_model(model)
+    if jit_compile is None:
+        jit_compile = _serving_jit_compile()
+    
+    @tf.function(input_signature=[SERVING_INPUT_SIGNATURE], jit_compile=jit_compile)
+    def serve(inputs):
+        outputs = serving_model(inputs, training=False)
+        if isinstance(outputs, dict):
+            return outputs
+        if isinstance(outputs, (list, tuple)):
+            return {PREDICTION_OUTPUT: outputs[0], ALPHA_OUTPUT: outputs[1]}
+        return {PREDICTION_OUTPUT: outputs}
+    
+    # Trace now so the first request does not pay for it
+    serve.get_concrete_function()
+    return serve
+
+
+def get_serving_function(model: keras.Model, jit_compile: Optional[bool] = None):
+    """Serving function for model, traced once per (model, jit_compile) and cached on the model."""
+    if jit_compile is None:
+        jit_compile = _serving_jit_compile()
+    if getattr(model, SERVING_FUNCTIONS_ATTR, None) is None:
+        setattr(model, SERVING_FUNCTIONS_ATTR, {})
+    # Keras wraps dict attributes on assignment - always use the stored one
+    functions = getattr(model, SERVING_FUNCTIONS_ATTR)
+    if jit_compile not in functions:
+        functions[jit_compile] = make_serving_function(model, jit_compile=jit_compile)
+    return functions[jit_compile]
+
+
+def warmup_model(model: keras.Model, batch_sizes=(1,), jit_compile: Optional[bool] = None) -> Dict:
+    """
+    Run one dummy forward pass per served batch size.
+    
+    Traces / compiles the serving function and lets TensorFlow allocate its
+    per-shape kernels before the first real request, so no request pays
+    the cold-start cost.
+    
+    Parameters:
+    -----------
+    model : keras.Model
+        Production model
+    batch_sizes : iterable of int
+        Batch sizes that will be served (1 for single requests, up to the
+        micro-batching MAX_BATCH_SIZE)
+    jit_compile : bool, optional
+        XLA for the serving function (default: config.SERVING_JIT_COMPILE)
+    
+    Returns:
+    --------
+    dict: {batch_size: warmup time in ms}
+    """
+    import time
+    
+    serve = get_serving_function(model, jit_compile=jit_compile)
+    timings = {}
+    for batch_size in sorted(set(int(b) for b in batch_sizes)):
+        inputs = {name: np.zeros((batch_size,) + tuple(spec.shape[1:]), dtype=np.float32)
+                  for name, spec in SERVING_INPUT_SIGNATURE.items()}
+        start = time.perf_counter()
+        outputs = serve(inputs)
+        outputs[PREDICTION_OUTPUT].numpy()
+        timings[batch_size] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def _as_serving_inputs(inputs: Dict) -> Dict:
+    return {name: np.asarray(inputs[name], dtype=np.float32) for name in SERVING_INPUT_SIGNATURE}
+
+
+def benchmark_serving_latency(model: keras.Model, runs: int = 50, warmup: int = 5,
+                              jit_compile: Optional[bool] = None, seed: int = 0) -> Dict:
+    """
+    Single-sample latency: model.predict() vs the traced serving function.
+    
+    Parameters:
+    -----------
+    model : keras.Model
+        Production model
+    runs : int
+        Timed calls per path
+    warmup : int
+        Untimed calls per path (tracing / XLA compilation)
+    jit_compile : bool, optional
+        XLA for the serving function (default: config.SERVING_JIT_COMPILE)
+    seed : int
+        Seed for the random (valid-shaped) input sample
+    
+    Returns:
+    --------
+    dict: {
+        'predict_ms': {'mean', 'p50', 'p95'},
+        'tf_function_ms': {'mean', 'p50', 'p95'},
+        'speedup_p50': float,
+        'max_abs_diff': float (prediction and alpha, predict vs serving function),
+        'jit_compile': bool
+    }
+    """
+    import time
+    
+    rng = np.random.default_rng(seed)
+    pupil = rng.random((1, 224, 224, 5), dtype=np.float32)
+    pupil[..., 3:] = 0.0
+    inputs = _as_serving_inputs({
+        'pupil_input': pupil,
+        'iris_input': rng.random((1, 224, 224, 5), dtype=np.float32),
+        'age_input': np.eye(8, dtype=np.float32)[[3]],
+        'iris_ring_count': np.array([[0.4]], dtype=np.float32)
+    })
+    
+    if jit_compile is None:
+        jit_compile = _serving_jit_compile()
+    serving_model = get_serving_model(model)
+    serve = get_serving_function(model, jit_compile=jit_compile)
+    
+    def time_calls(fn):
+        for _ in range(warmup):
+            fn()
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) * 1000)
+        times = np.array(times)
+        return {'mean': float(times.mean()),
+                'p50': float(np.percentile(times, 50)),
+                'p95': float(np.percentile(times, 95))}
+    
+    predict_ms = time_calls(lambda: serving_model.predict(inputs, verbose=0))
+    function_ms = time_calls(lambda: {k: v.numpy() for k, v in serve(inputs).items()})
+    
+    expected = serving_model.predict(inputs, verbose=0)
+    if not isinstance(expected, dict):
+        expected = {PREDICTION_OUTPUT: expected[0] if isinstance(expected, (list, tuple)) else expected}
+    actual = serve(inputs)
+    max_abs_diff = max(float(np.max(np.abs(np.asarray(expected[name]) - actual[name].numpy())))
+                       for name in expected)
+    
+    return {
+        'predict_ms': predict_ms,
+        'tf_function_ms': function_ms,
+        'speedup_p50': predict_ms['p50'] / function_ms['p50'],
+        'max_abs_diff': max_abs_diff,
+        'jit_compile': jit_compile
+    }
+
+
 def load_production_model(model_path: str) -> Optional[keras.Model]:
     """
     Load the production-ready stress detection model.
@@ -61,7 +317,8 @@ def load_production_model(model_path: str) -> Optional[keras.Model]:
     
     Returns:
     --------
-    keras.Model: Loaded model, or None if loading fails
+    keras.Model: Serving model (outputs: stress probability + fusion alpha,
+                 see build_serving_model), or None if loading fails
     """
     try:
         print(f"\n[LOADING] Loading Production Model...")
@@ -129,6 +386,10 @@ def load_production_model(model_path: str) -> Optional[keras.Model]:
         except Exception as compile_error:
             print(f"   DEBUG: Compilation warning (not critical): {compile_error}")
         
+        # Export alpha as a real output (one forward pass per request)
+        model = build_serving_model(model)
+        print(f"   DEBUG: Serving model built ({len(model.outputs)} outputs)")
+        
         # Verify model architecture
         print(f"   [SUCCESS] Model loaded successfully!")
         
@@ -219,17 +480,59 @@ def get_model_info(model: keras.Model) -> Dict:
         return {
             'total_params': model.count_params(),
             'trainable_params': sum([tf.size(var).numpy() for var in model.trainable_variables]),
-            'input_shapes': [inp.shape.as_list() for inp in model.inputs],
-            'output_shape': model.output.shape.as_list(),
+            'input_shapes': [list(inp.shape) for inp in model.inputs],
+            'output_shape': list(model.outputs[0].shape),
             'layer_count': len(model.layers),
             'input_names': [inp.name for inp in model.inputs],
-            'output_name': model.output.name
+            'output_name': model.outputs[0].name,
+            'output_count': len(model.outputs)
         }
     except Exception as e:
         print(f"❌ Error getting model info: {e}")
         return {}
 
 
+def prepare_sample_inputs(pupil_img: np.ndarray, iris_img: np.ndarray,
+                          age_vector: np.ndarray, ring_count: float) -> Dict[str, np.ndarray]:
+    """
+    Validate one sample and build the batch-of-1 model input dictionary.
+    
+    Shared by predict_single and the micro-batching scheduler
+    (pipeline/batching.py), so both enforce the same training-time format.
+    
+    Returns:
+    --------
+    dict: {'pupil_input': (1, 224, 224, 5), 'iris_input': (1, 224, 224, 5),
+           'age_input': (1, 8), 'iris_ring_count': (1, 1)}
+    """
+    # Verify input shapes
+    assert pupil_img.shape == (224, 224, 5), f"Pupil shape mismatch: {pupil_img.shape}"
+    assert iris_img.shape == (224, 224, 5), f"Iris shape mismatch: {iris_img.shape}"
+    assert age_vector.shape == (8,), f"Age vector shape mismatch: {age_vector.shape}"
+    
+    # CRITICAL: Verify pupil channels 3-4 are zeroed (training requirement).
+    # preprocess_pupil_stream writes exact zeros, so a single any() suffices
+    if pupil_img[:, :, 3:].any():
+        print("   [WARNING] Pupil channels 3-4 not zeroed! Zeroing now...")
+        pupil_img[:, :, 3] = 0.0
+        pupil_img[:, :, 4] = 0.0
+    
+    # Add batch dimension
+    pupil_batch = np.expand_dims(pupil_img, axis=0)
+    iris_batch = np.expand_dims(iris_img, axis=0)
+    age_batch = np.expand_dims(age_vector, axis=0)
+    ring_count_batch = np.array([[ring_count]], dtype=np.float32)
+    
+    # Create input dictionary (EXACT match to training)
+    inputs = {
+        'pupil_input': pupil_batch,
+        'iris_input': iris_batch,
+        'age_input': age_batch,
+        'iris_ring_count': ring_count_batch
+    }
+    return inputs
+
+
 def predict_single(model: keras.Model, pupil_img: np.ndarray, iris_img: np.ndarray,
                    age_vector: np.ndarray, ring_count: float) -> Tuple[float, Optional[float]]:
     """
@@ -261,90 +564,16 @@ def predict_single(model: keras.Model, pupil_img: np.ndarray, iris_img: np.ndarr
         - alpha: Fusion weight (iris stream importance), or None if not available
     """
     try:
-        # Verify input shapes
-        assert pupil_img.shape == (224, 224, 5), f"Pupil shape mismatch: {pupil_img.shape}"
-        assert iris_img.shape == (224, 224, 5), f"Iris shape mismatch: {iris_img.shape}"
-        assert age_vector.shape == (8,), f"Age vector shape mismatch: {age_vector.shape}"
-        
-        # CRITICAL: Verify pupil channels 3-4 are zeroed (training requirement)
-        if not np.allclose(pupil_img[:, :, 3], 0.0) or not np.allclose(pupil_img[:, :, 4], 0.0):
-            print("   [WARNING] Pupil channels 3-4 not zeroed! Zeroing now...")
-            pupil_img[:, :, 3] = 0.0
-            pupil_img[:, :, 4] = 0.0
-        
-        # Add batch dimension
-        pupil_batch = np.expand_dims(pupil_img, axis=0)
-        iris_batch = np.expand_dims(iris_img, axis=0)
-        age_batch = np.expand_dims(age_vector, axis=0)
-        ring_count_batch = np.array([[ring_count]], dtype=np.float32)
-        
-        # Create input dictionary (EXACT match to training)
-        inputs = {
-            'pupil_input': pupil_batch,
-            'iris_input': iris_batch,
-            'age_input': age_batch,
-            'iris_ring_count': ring_count_batch
-        }
-        
-        # Run prediction
-        outputs = model.predict(inputs, verbose=0)
+        inputs = prepare_sample_inputs(pupil_img, iris_img, age_vector, ring_count)
         
-        # Extract prediction value
-        # Model may return single output or multiple outputs [prediction, alpha]
-        if isinstance(outputs, list):
-            pred_value = float(outputs[0][0][0])
-            # Check if alpha is in the outputs
-            if len(outputs) > 1:
-                alpha = float(outputs[1][0][0])
-                print(f"   [INFO] Alpha from model outputs: {alpha:.4f}")
-                return pred_value, alpha
-        else:
-            pred_value = float(outputs[0][0])
+        # Single forward pass through the traced serving function:
+        # prediction and alpha come from the same graph
+        outputs = get_serving_function(model)(_as_serving_inputs(inputs))
         
-        # Extract alpha from WeightedFeatureFusion layer by creating intermediate model
+        pred_value = float(outputs[PREDICTION_OUTPUT].numpy().reshape(-1)[0])
         alpha = None
-        
-        # Find the WeightedFeatureFusion layer
-        fusion_layer = None
-        for layer in model.layers:
-            if 'weighted' in layer.name.lower() and 'fusion' in layer.name.lower():
-                fusion_layer = layer
-                print(f"   [INFO] Found fusion layer: {layer.name}")
-                break
-        
-        if fusion_layer is not None:
-            try:
-                # Create an intermediate model that outputs both prediction and fusion layer
-                # We need to get the output of the fusion layer which contains alpha
-                intermediate_model = keras.Model(
-                    inputs=model.inputs,
-                    outputs=model.output
-                )
-                
-                # Run prediction again to populate last_alpha
-                _ = intermediate_model.predict(inputs, verbose=0)
-                
-                # Now check if last_alpha was populated
-                if hasattr(fusion_layer, 'last_alpha') and fusion_layer.last_alpha is not None:
-                    # The last_alpha is a tensor from the previous forward pass
-                    alpha_value = fusion_layer.last_alpha
-                    
-                    # Convert to numpy if needed
-                    if hasattr(alpha_value, 'numpy'):
-                        alpha_value = alpha_value.numpy()
-                    
-                    # Extract scalar value
-                    if isinstance(alpha_value, np.ndarray):
-                        alpha = float(alpha_value[0][0])
-                    else:
-                        alpha = float(alpha_value)
-                    
-                    print(f"   [INFO] Alpha extracted from fusion layer: {alpha:.4f}")
-                    print(f"      -> Iris stream weight: {alpha:.1%}")
-                    print(f"      -> Pupil+Age stream weight: {(1-alpha):.1%}")
-                
-            except Exception as e:
-                print(f"   [WARNING] Error extracting alpha from fusion layer: {e}")
+        if ALPHA_OUTPUT in outputs:
+            alpha = float(outputs[ALPHA_OUTPUT].numpy().reshape(-1)[0])
         
         if alpha is None:
             # Fallback: Use training statistics
@@ -364,6 +593,46 @@ def predict_single(model: keras.Model, pupil_img: np.ndarray, iris_img: np.ndarr
         return 0.5, None
 
 
+def predict_batch(model: keras.Model, pupil_batch: np.ndarray, iris_batch: np.ndarray,
+                  age_batch: np.ndarray, ring_counts: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Run prediction on a batch of samples in one forward pass.
+    
+    Same input format as predict_single, stacked along a leading batch axis
+    (see batch_score.py for offline scoring).
+    
+    Parameters:
+    -----------
+    model : keras.Model
+        Loaded production model
+    pupil_batch : numpy.ndarray
+        (B, 224, 224, 5) - channels 3-4 MUST be zeros
+    iris_batch : numpy.ndarray
+        (B, 224, 224, 5)
+    age_batch : numpy.ndarray
+        (B, 8) one-hot ages
+    ring_counts : numpy.ndarray
+        (B,) normalized ring counts
+    
+    Returns:
+    --------
+    tuple: (predictions (B,), alphas (B,) or None if the model has no fusion layer)
+    """
+    assert pupil_batch.shape[1:] == (224, 224, 5), f"Pupil shape mismatch: {pupil_batch.shape}"
+    assert iris_batch.shape[1:] == (224, 224, 5), f"Iris shape mismatch: {iris_batch.shape}"
+    assert not pupil_batch[:, :, :, 3:].any(), "Pupil channels 3-4 must be zero"
+    
+    outputs = get_serving_function(model)(_as_serving_inputs({
+        'pupil_input': pupil_batch,
+        'iris_input': iris_batch,
+        'age_input': age_batch,
+        'iris_ring_count': np.asarray(ring_counts, dtype=np.float32).reshape(-1, 1)
+    }))
+    predictions = outputs[PREDICTION_OUTPUT].numpy().reshape(-1)
+    alphas = outputs[ALPHA_OUTPUT].numpy().reshape(-1) if ALPHA_OUTPUT in outputs else None
+    return predictions, alphas
+
+
 if __name__ == "__main__":
     print("[TEST] Testing Model Loader...")
     print("\n[INFO] Available functions:")
@@ -371,4 +640,17 @@ if __name__ == "__main__":
     print("  - load_both_models: Load both Model 1 and Model 2")
     print("  - get_model_info: Extract model information")
     print("  - predict_single: Run prediction on one sample")
+    print("  - predict_batch: Run prediction on a stacked batch")
+    print("  - benchmark_serving_latency: model.predict vs traced serving function")
     print("\nModel loader is ready!")
+    
+    # Latency benchmark: python pipeline/model_loader.py <model.keras> [--xla]
+    if len(sys.argv) > 1:
+        model = load_production_model(sys.argv[1])
+        if model is not None:
+            report = benchmark_serving_latency(model, jit_compile='--xla' in sys.argv)
+            print(f"\n[BENCHMARK] Single-sample latency (jit_compile={report['jit_compile']})")
+            for path in ('predict_ms', 'tf_function_ms'):
+                t = report[path]
+                print(f"   {path:15s} mean {t['mean']:7.2f}  p50 {t['p50']:7.2f}  p95 {t['p95']:7.2f}")
+            print(f"   Speedup (p50): {report['speedup_p50']:.1f}x, max |diff|: {report['max_abs_diff']:.2e}")
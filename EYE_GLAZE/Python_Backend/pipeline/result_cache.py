@@ -0,0 +1,272 @@
+"""
+Result Cache - Content-hash cache in front of run_inference_pipeline
+
+Clients resubmit the same capture (retries, the React client re-rendering
+its history). Results are keyed by a hash of the DECODED pixels, so the same
+image re-encoded by the client still hits:
+
+- detection tier:  image hash -> detection + measurements (age independent)
+- prediction tier: image hash + age group + model tag -> prediction
+
+A resubmission with a different age only re-runs preprocessing and one
+forward pass; an identical resubmission runs nothing.
+
+Each tier is an LRU bounded by entry count and (pickled) bytes, with an
+optional SQLite tier on disk that survives restarts and is shared by the
+serve.py workers. Settings come from config.RESULT_CACHE_SETTINGS.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+# Bump when detection / measurement output or the key format changes so
+# stale disk entries miss
+CACHE_VERSION = 2
+
+
+def image_digest(image: np.ndarray) -> str:
+    """
+    Content hash of a decoded image (shape, dtype and pixels).
+
+    Runs before every cached request. SHA-256 uses the CPU's SHA instructions
+    (OpenSSL) where available: about 0.75 ms for 640x480 and 3 ms for
+    1280x960 on x86 with SHA extensions (BLAKE2b: 1.6 / 7.8 ms). Without
+    them it costs about as much as BLAKE2b. Either way it is small next to
+    detection (tens to hundreds of milliseconds).
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"{image.shape}|{image.dtype}".encode())
+    hasher.update(np.ascontiguousarray(image).data)
+    return hasher.hexdigest()[:32]
+
+
+def age_group_index(age: int) -> int:
+    """Age group the model sees (index of the one-hot encode_age vector)."""
+    from utils import encode_age
+    return int(np.argmax(encode_age(age)))
+
+
+# ============================================================================
+# LRU TIER (memory + optional SQLite)
+# ============================================================================
+
+class LRUCache:
+    """
+    Thread-safe LRU of pickled values, bounded by entry count and bytes.
+
+    Values are stored pickled, so every get() returns an independent copy
+    and the byte bound is exact. With disk_path, entries are written through
+    to a SQLite table and memory misses fall back to it.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 disk_path: Optional[str] = None, table: str = 'results',
+                 disk_max_entries: int = 100000):
+        """
+        Parameters:
+        -----------
+        max_entries : int
+            Most entries kept in memory
+        max_bytes : int
+            Most pickled bytes kept in memory
+        disk_path : str, optional
+            SQLite file for the persistent tier (None = memory only)
+        table : str
+            Table name in the SQLite file (one per tier)
+        disk_max_entries : int
+            Most entries kept on disk (least recently used pruned first)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.table = table
+        self.disk_max_entries = disk_max_entries
+
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._db = None
+        self._disk_puts = 0
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                             f"(key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value or None."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return pickle.loads(data)
+
+            data = self._disk_get(key)
+            if data is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._insert(key, data)
+        return pickle.loads(data)
+
+    def put(self, key: str, value: Any):
+        """Store value (pickled) in memory and, if enabled, on disk."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._insert(key, data)
+            self._disk_put(key, data)
+
+    def stats(self) -> Dict:
+        """{'entries', 'bytes', 'hits', 'disk_hits', 'misses', 'hit_rate', 'evictions', 'disk'}"""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': (self._hits + self._disk_hits) / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'disk': self._db is not None
+            }
+
+    def clear(self):
+        """Drop every entry (memory and disk)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ------------------------------------------------------------------
+    # Internals (called with the lock held)
+    # ------------------------------------------------------------------
+
+    def _insert(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = data
+        self._bytes += len(data)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"[WARNING] Result cache disk read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, data: bytes):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, accessed) VALUES (?, ?, ?)",
+                             (key, data, time.time()))
+            self._disk_puts += 1
+            # Prune now and then, not on every write
+            if self._disk_puts % 100 == 0:
+                self._db.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                    f"ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.disk_max_entries,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[WARNING] Result cache disk write failed: {e}")
+
+
+# ============================================================================
+# PIPELINE CACHE (detection tier + prediction tier)
+# ============================================================================
+
+class PipelineCache:
+    """
+    Detection/measurement and prediction caches for run_inference_pipeline.
+
+    Usage:
+        cache = PipelineCache(model_tag=model_file_tag(config.MODEL_PATH))
+        results = run_inference_pipeline(image, age, model, cache=cache)
+        results['cache']   # {'detection': hit?, 'prediction': hit?}
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 disk_path: Optional[str] = None, model_tag: str = ''):
+        """
+        Parameters:
+        -----------
+        max_entries, max_bytes : int, optional
+            Bounds of EACH tier (default: RESULT_CACHE_SETTINGS)
+        disk_path : str, optional
+            SQLite file for the persistent tier (default: RESULT_CACHE_SETTINGS['DISK_PATH'])
+        model_tag : str
+            Identifies the model weights - predictions of another model never hit
+        """
+        from config import RESULT_CACHE_SETTINGS
+        max_entries = max_entries or RESULT_CACHE_SETTINGS['MAX_ENTRIES']
+        max_bytes = max_bytes or RESULT_CACHE_SETTINGS['MAX_BYTES']
+        disk_path = disk_path if disk_path is not None else RESULT_CACHE_SETTINGS['DISK_PATH']
+
+        self.model_tag = model_tag
+        self.detection = LRUCache(max_entries, max_bytes, disk_path, table='detection')
+        self.prediction = LRUCache(max_entries, max_bytes, disk_path, table='prediction')
+
+    def detection_key(self, digest: str) -> str:
+        return f"v{CACHE_VERSION}:{digest}"
+
+    def prediction_key(self, digest: str, age: int) -> str:
+        return f"v{CACHE_VERSION}:{self.model_tag}:{digest}:{age_group_index(age)}"
+
+    def stats(self) -> Dict:
+        return {'detection': self.detection.stats(), 'prediction': self.prediction.stats()}
+
+    def clear(self):
+        self.detection.clear()
+        self.prediction.clear()
+
+    def close(self):
+        self.detection.close()
+        self.prediction.close()
+
+
+def model_file_tag(model_path: str) -> str:
+    """Tag for PipelineCache: model file name, size and modification time."""
+    try:
+        stat = os.stat(model_path)
+        return f"{os.path.basename(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        return os.path.basename(model_path)
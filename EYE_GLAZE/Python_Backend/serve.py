@@ -0,0 +1,327 @@
+"""
+Production Launcher - Pre-fork multi-worker server with model warmup
+
+    python serve.py [--workers N] [--host HOST] [--port PORT] [--model PATH] [--ready-file PATH]
+
+1. The parent imports the whole backend (Flask app, detection, TensorFlow,
+   custom layers) once and binds the port WITHOUT listening yet.
+2. N workers are forked and share those already-imported modules
+   copy-on-write (no per-worker TensorFlow import cost).
+3. Each worker loads the model and warms it up at every served batch size
+   (config.SERVER_SETTINGS['WARMUP_BATCH_SIZES']), then reports to the parent.
+4. Only when ALL workers are warm does the parent start listening, print
+   READY and touch --ready-file: the port never accepts a request that would
+   hit a cold model. Each worker's /ready endpoint agrees.
+
+TensorFlow is not fork-safe once its runtime has executed ops (forked
+children deadlock), so the weights are loaded after the fork: each worker
+owns its TF variables, and the model file is shared through the OS page
+cache. Everything imported before the fork is shared.
+
+Workers that die are replaced (warmed up before they accept requests).
+Replacements warm up while the parent keeps reaping; a replacement that
+fails its warmup is retried with exponential backoff, and the server exits
+with status 1 once MAX_FAILED_RESPAWNS replacements fail within
+RESPAWN_WINDOW_S (config.SERVER_SETTINGS).
+Falls back to a single threaded server where fork() is unavailable (Windows).
+"""
+
+import argparse
+import collections
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+# Suppress TensorFlow C++ logging before it is imported
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+
+def _run_worker(listener: socket.socket, host: str, port: int, ready_fd: int, go_fd=None):
+    """Worker process body: load + warm up, report, (wait for listen), serve forever."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    import app as backend
+
+    ok = backend.initialize_model(warmup=True)
+    os.write(ready_fd, b'1' if ok else b'0')
+    os.close(ready_fd)
+    if not ok:
+        os._exit(1)
+
+    # Initial workers wait until the parent has opened the socket
+    if go_fd is not None and os.read(go_fd, 1) != b'1':
+        os._exit(0)
+
+    from werkzeug.serving import make_server
+    server = make_server(host, port, backend.app, threaded=True, fd=listener.fileno())
+    server.serve_forever()
+    os._exit(0)
+
+
+def _spawn_worker(listener: socket.socket, host: str, port: int, go_fd=None, close_fds=()):
+    """Fork one worker. Returns (pid, fd the worker reports readiness on)."""
+    ready_r, ready_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(ready_r)
+        for fd in close_fds:
+            os.close(fd)
+        try:
+            _run_worker(listener, host, port, ready_w, go_fd)
+        finally:
+            os._exit(1)
+    os.close(ready_w)
+    return pid, ready_r
+
+
+def _wait_ready(ready_fd: int, deadline: float) -> bool:
+    """True once the worker reported a successful warmup before the deadline."""
+    try:
+        readable, _, _ = select.select([ready_fd], [], [], max(0.0, deadline - time.monotonic()))
+        return bool(readable) and os.read(ready_fd, 1) == b'1'
+    finally:
+        os.close(ready_fd)
+
+
+def _terminate(pids, sig=signal.SIGTERM):
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+def _supervise(children: set, spawn, ready_timeout: float, settings: dict, stopping) -> bool:
+    """
+    Reap and replace workers until none are left (after a stop signal).
+
+    Nothing here blocks on a single worker: exits are reaped with WNOHANG and
+    the readiness pipes of warming replacements are polled in the same loop.
+    A dead worker is replaced immediately; while replacements keep failing
+    their warmup the next one waits RESPAWN_BACKOFF_S, doubling each time.
+
+    Parameters:
+    -----------
+    children : set
+        PIDs of live workers (updated in place)
+    spawn : callable
+        Starts one worker, returns (pid, ready_fd)
+    ready_timeout : float
+        Seconds a replacement gets to load and warm up the model
+    settings : dict
+        config.SERVER_SETTINGS (backoff and failure limit)
+    stopping : callable
+        True once the server is shutting down (no more replacements)
+
+    Returns:
+    --------
+    bool: False if MAX_FAILED_RESPAWNS replacements failed within RESPAWN_WINDOW_S
+    """
+    warming = {}                     # pid -> (ready_fd, deadline)
+    due = []                         # monotonic times to start a replacement at
+    failures = collections.deque()   # monotonic times of failed replacements
+    streak = 0                       # consecutive failed replacements
+
+    def failed(pid: int, reason: str) -> bool:
+        nonlocal streak
+        streak += 1
+        now = time.monotonic()
+        failures.append(now)
+        while failures[0] < now - settings['RESPAWN_WINDOW_S']:
+            failures.popleft()
+        print(f"❌ Replacement worker {pid} {reason}")
+        return len(failures) < settings['MAX_FAILED_RESPAWNS']
+
+    try:
+        while children or due:
+            if stopping():
+                due.clear()
+                for ready_fd, _ in warming.values():
+                    os.close(ready_fd)
+                warming.clear()
+
+            # Reap every worker that has exited, without blocking
+            while children:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    children.clear()
+                    break
+                if pid == 0:
+                    break
+                if pid not in children:
+                    continue
+                children.discard(pid)
+                if stopping():
+                    continue
+                if pid in warming:
+                    os.close(warming.pop(pid)[0])
+                    if not failed(pid, "exited during warmup"):
+                        return False
+                delay = 0.0 if not streak else min(settings['RESPAWN_BACKOFF_S'] * 2 ** (streak - 1),
+                                                   settings['RESPAWN_BACKOFF_MAX_S'])
+                print(f"⚠️  Worker {pid} exited (status {status}), "
+                      f"starting a replacement in {delay:.1f}s...")
+                due.append(time.monotonic() + delay)
+                due.sort()
+
+            # Start replacements whose backoff has elapsed
+            while due and due[0] <= time.monotonic():
+                due.pop(0)
+                pid, ready_fd = spawn()
+                children.add(pid)
+                warming[pid] = (ready_fd, time.monotonic() + ready_timeout)
+
+            # Wait for a readiness report, the next deadline or the next poll
+            now = time.monotonic()
+            wake = [deadline for _, deadline in warming.values()] + due[:1]
+            timeout = max(0.0, min([0.5] + [when - now for when in wake]))
+            readable, _, _ = select.select([fd for fd, _ in warming.values()], [], [], timeout)
+
+            for pid, (ready_fd, deadline) in list(warming.items()):
+                if ready_fd in readable:
+                    ok = os.read(ready_fd, 1) == b'1'
+                elif deadline <= time.monotonic():
+                    ok = None
+                    _terminate([pid])
+                else:
+                    continue
+                os.close(ready_fd)
+                del warming[pid]
+                if ok:
+                    streak = 0
+                    print(f"✅ Replacement worker {pid} is warm")
+                # A failed worker exits on its own and is replaced (with backoff) once reaped
+                elif not failed(pid, "failed to warm up" if ok is False else
+                                f"did not warm up within {ready_timeout:.0f}s"):
+                    return False
+        return True
+    finally:
+        for ready_fd, _ in warming.values():
+            os.close(ready_fd)
+
+
+def _touch(path: str):
+    with open(path, 'w') as f:
+        f.write(f"{os.getpid()}\n")
+
+
+def serve(workers: int, host: str, port: int, ready_timeout: float,
+          ready_file: str = None) -> int:
+    """
+    Run the pre-fork server until SIGINT/SIGTERM.
+
+    Returns:
+    --------
+    int: Process exit code (0 = clean shutdown, 1 = startup failure or
+         replacement workers kept failing)
+    """
+    print("=" * 80)
+    print(f"🚀 PRE-FORK LAUNCHER ({workers} workers, {host}:{port})")
+    print("=" * 80)
+
+    # Preload everything shared copy-on-write (no TensorFlow ops run here)
+    start = time.perf_counter()
+    import app as backend  # noqa: F401
+    print(f"📦 Backend modules preloaded in {time.perf_counter() - start:.1f}s")
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.set_inheritable(True)
+
+    go_r, go_w = os.pipe()
+    pending = {}
+    for _ in range(workers):
+        pid, ready_fd = _spawn_worker(listener, host, port, go_fd=go_r, close_fds=(go_w,))
+        pending[pid] = ready_fd
+    os.close(go_r)
+
+    # Readiness: every worker loaded and warmed up
+    deadline = time.monotonic() + ready_timeout
+    failed = [pid for pid, ready_fd in pending.items() if not _wait_ready(ready_fd, deadline)]
+    children = set(pending)
+
+    if failed:
+        print(f"❌ {len(failed)} worker(s) failed to load/warm up the model - shutting down")
+        _terminate(children)
+        for pid in children:
+            os.waitpid(pid, 0)
+        listener.close()
+        return 1
+
+    listener.listen(128)
+    os.write(go_w, b'1' * workers)
+    os.close(go_w)
+
+    print(f"✅ READY: {workers} warm workers serving on http://{host}:{port} "
+          f"({time.perf_counter() - start:.1f}s)")
+    if ready_file:
+        _touch(ready_file)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        _terminate(list(children))
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    settings = config.SERVER_SETTINGS
+    healthy = _supervise(children, lambda: _spawn_worker(listener, host, port), ready_timeout,
+                         settings, lambda: stopping)
+    if not healthy:
+        print(f"❌ {settings['MAX_FAILED_RESPAWNS']} replacement workers failed within "
+              f"{settings['RESPAWN_WINDOW_S']}s - shutting down")
+        stopping = True
+        _terminate(children)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+    if ready_file and os.path.exists(ready_file):
+        os.remove(ready_file)
+    listener.close()
+    print("👋 Server stopped")
+    return 0 if healthy else 1
+
+
+def main() -> int:
+    settings = config.SERVER_SETTINGS
+    parser = argparse.ArgumentParser(description="Pre-fork production server with model warmup")
+    parser.add_argument('--workers', type=int, default=settings['WORKERS'])
+    parser.add_argument('--host', default=settings['HOST'])
+    parser.add_argument('--port', type=int, default=settings['PORT'])
+    parser.add_argument('--model', default=None, help="Model path (default: config.MODEL_PATH)")
+    parser.add_argument('--ready-file', default=None,
+                        help="Created once all workers are warm (removed on shutdown)")
+    args = parser.parse_args()
+
+    if args.model:
+        config.MODEL_PATH = args.model
+
+    if not hasattr(os, 'fork'):
+        # Windows: no fork - one warm, threaded process
+        import app as backend
+        if not backend.initialize_model(warmup=True):
+            return 1
+        print(f"✅ READY: single process serving on http://{args.host}:{args.port}")
+        if args.ready_file:
+            _touch(args.ready_file)
+        backend.app.run(host=args.host, port=args.port, debug=False, threaded=True)
+        return 0
+
+    return serve(args.workers, args.host, args.port, settings['READY_TIMEOUT_S'], args.ready_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Offline batch scoring (batch_score.py): CPU stages in worker processes,
+batched prediction, and an output that resumes where an interrupted run
+stopped without scoring any image twice.
+
+Run:
+    python test_batch_score.py
+    python -m pytest -q test_batch_score.py
+"""
+
+import csv
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from batch_score import batch_score, find_images, read_manifest
+from test_color_eye import make_color_eye
+from test_model_loader import make_dual_stream_model
+
+
+def write_images(folder):
+    for index, (center, pupil_radius, iris_radius) in enumerate(
+            [((320, 240), 40, 130), ((300, 240), 50, 150), ((330, 250), 35, 120)]):
+        cv2.imwrite(os.path.join(folder, f'eye_{index}.png'),
+                    make_color_eye(480, 640, center, pupil_radius, iris_radius, seed=index))
+    # Not an eye: gets a failed row
+    cv2.imwrite(os.path.join(folder, 'blank.png'), np.full((200, 200, 3), 128, dtype=np.uint8))
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_interrupted_run_resumes():
+    model = make_dual_stream_model()
+    with tempfile.TemporaryDirectory() as folder:
+        write_images(folder)
+        tasks = [(path, 40) for path in find_images(folder)]
+        output = os.path.join(folder, 'results.csv')
+
+        # First run stops after two images, then dies mid-write of a row
+        first = batch_score(tasks, output, model=model, workers=0, batch_size=2, chunk_size=1, limit=2)
+        assert first['scored'] == 2 and first['skipped'] == 0
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(tasks[2][0] + ',40,Tr')
+
+        second = batch_score(tasks, output, model=model, workers=1, batch_size=2, chunk_size=2)
+        assert second['skipped'] == 2 and second['scored'] == 2
+
+        rows = read_rows(output)
+        assert sorted(row['path'] for row in rows) == sorted(path for path, _ in tasks)
+        by_name = {os.path.basename(row['path']): row for row in rows}
+        assert by_name['blank.png']['success'] == 'False' and by_name['blank.png']['error']
+        for name in ('eye_0.png', 'eye_1.png', 'eye_2.png'):
+            row = by_name[name]
+            assert row['success'] == 'True', row
+            assert 0.0 <= float(row['prediction']) <= 1.0 and row['alpha'] and row['stress_level']
+
+        # Nothing left
+        assert batch_score(tasks, output, model=model, workers=0)['scored'] == 0
+
+
+def test_resume_keeps_every_age_of_an_image():
+    model = make_dual_stream_model()
+    with tempfile.TemporaryDirectory() as folder:
+        write_images(folder)
+        manifest = os.path.join(folder, 'manifest.csv')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write('path,age\neye_0.png,25\neye_0.png,60\n')
+        tasks = read_manifest(manifest, 30)
+        output = os.path.join(folder, 'results.csv')
+
+        assert batch_score(tasks, output, model=model, workers=0, chunk_size=1, limit=1)['scored'] == 1
+        resumed = batch_score(tasks, output, model=model, workers=0)
+        assert resumed['skipped'] == 1 and resumed['scored'] == 1
+        assert sorted(int(row['age']) for row in read_rows(output)) == [25, 60]
+
+
+def test_manifest_paths_and_ages():
+    with tempfile.TemporaryDirectory() as folder:
+        manifest = os.path.join(folder, 'manifest.csv')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write('path,age\nimages/a.png,25\n/abs/b.png,\n')
+        assert read_manifest(manifest, 30) == [(os.path.join(folder, 'images', 'a.png'), 25),
+                                               ('/abs/b.png', 30)]
+
+
+if __name__ == "__main__":
+    test_interrupted_run_resumes()
+    test_resume_keeps_every_age_of_an_image()
+    test_manifest_paths_and_ages()
+    print("✅ Batch scoring resumes without rescoring")
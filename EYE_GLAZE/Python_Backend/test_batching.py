@@ -0,0 +1,58 @@
+"""
+Micro-batching scheduler: concurrent samples are scored in shared forward
+passes and every caller gets back its own (prediction, alpha).
+
+Run:
+    python test_batching.py
+    python -m pytest -q test_batching.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pipeline import MicroBatcher, predict_single
+from test_model_loader import make_dual_stream_model, make_inputs
+
+
+def split_samples(inputs):
+    return [(inputs['pupil_input'][i], inputs['iris_input'][i], inputs['age_input'][i],
+             float(inputs['iris_ring_count'][i, 0])) for i in range(len(inputs['age_input']))]
+
+
+def test_concurrent_requests_are_batched():
+    model = make_dual_stream_model()
+    samples = split_samples(make_inputs(np.random.default_rng(0), batch=12))
+    expected = [predict_single(model, *sample) for sample in samples]
+
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            results = list(pool.map(lambda sample: batcher.predict(*sample, timeout=30), samples))
+        stats = batcher.stats()
+    finally:
+        batcher.close()
+
+    for (pred, alpha), (exp_pred, exp_alpha) in zip(results, expected):
+        assert abs(pred - exp_pred) < 1e-5 and abs(alpha - exp_alpha) < 1e-5
+
+    assert stats['samples'] == 12
+    assert stats['batches'] < 12
+    assert max(stats['batch_size_histogram']) <= 4
+    assert stats['queue_depth'] == 0
+
+
+def test_close_drains_queue():
+    model = make_dual_stream_model()
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait_ms=0)
+    futures = [batcher.submit(*sample) for sample in split_samples(make_inputs(np.random.default_rng(1), batch=5))]
+    batcher.close()
+
+    assert all(future.done() for future in futures)
+    assert batcher.stats()['samples'] == 5
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_are_batched()
+    test_close_drains_queue()
+    print("✅ Micro-batching returns per-request results from batched forward passes")
@@ -0,0 +1,56 @@
+"""
+Benchmark suite (benchmarks/pipeline_stages.py, benchmarks/synthetic_eye.py):
+synthetic eyes carry usable ground truth, and the report covers every
+stage and can be compared across runs.
+
+Run:
+    python test_benchmarks.py
+    python -m pytest -q test_benchmarks.py
+"""
+
+import json
+
+from benchmarks.synthetic_eye import make_synthetic_eye
+from benchmarks.pipeline_stages import run_benchmarks, compare_reports
+from detection import count_tension_rings
+from pipeline.inference_pipeline import run_detection
+from test_model_loader import make_dual_stream_model
+
+
+def test_synthetic_eye_ground_truth():
+    for grayscale in (False, True):
+        for ring_count in (0, 3, 6):
+            image, truth = make_synthetic_eye(480, 640, ring_count=ring_count, grayscale=grayscale, seed=ring_count)
+            assert image.shape == (480, 640, 3) and len(truth['ring_radii']) == ring_count
+
+            (cx, cy), pupil_radius = truth['pupil']
+            assert count_tension_rings(image, (cx, cy), pupil_radius, (cx, cy), truth['iris'][1]) == ring_count
+
+            detection = run_detection(image)
+            assert detection['success'] and detection['image_type'] == truth['image_type']
+            (px, py), detected_radius = detection['pupil']
+            assert abs(px - cx) <= 2 and abs(py - cy) <= 2 and abs(detected_radius - pupil_radius) <= 2
+
+
+def test_report_covers_stages_and_compares():
+    cases = [('color', 240, 320, 3), ('grayscale', 240, 320, 3)]
+    report = run_benchmarks(cases, repeats=1, model=make_dual_stream_model(), requests=2)
+    json.dumps(report)
+
+    assert set(report['cases']['color_320x240_r3']['stages']) == {
+        'detect_image_type', 'detect_eye_color', 'count_tension_rings', 'preprocess_eye_image'}
+    assert 'detect_eye_grayscale' in report['cases']['grayscale_320x240_r3']['stages']
+    assert report['model']['predict_single']['median_ms'] > 0
+    assert 'prediction' in report['model']['run_inference_pipeline_ms']
+    assert report['endpoint']['concurrency_4']['ok'] == 2
+
+    assert compare_reports(report, report)['result_changes'] == []
+    changed = json.loads(json.dumps(report))
+    changed['cases']['color_320x240_r3']['accuracy']['ring_count_at_truth'] += 1
+    assert len(compare_reports(changed, report)['result_changes']) == 1
+
+
+if __name__ == "__main__":
+    test_synthetic_eye_ground_truth()
+    test_report_covers_stages_and_compares()
+    print("✅ Benchmark suite: ground truth recovered, report comparable")
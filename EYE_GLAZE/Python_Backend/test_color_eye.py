@@ -0,0 +1,109 @@
+"""
+Regression tests for color eye detection.
+
+- detect_iris_gradient_based vs the original per-ray loop implementation
+  (kept here as the reference) on synthetic color eye images
+- Coarse-to-fine ROI pupil detection vs full-frame detection
+
+Run:
+    python test_color_eye.py
+    python -m pytest -q test_color_eye.py
+"""
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic_eye import paint_eye
+from detection.color_eye import detect_iris_gradient_based, compare_roi_detection
+
+
+def reference_iris_gradient_based(image, pupil_center, pupil_radius):
+    """Original loop-based implementation used as ground truth."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    blurred = cv2.GaussianBlur(gray, (5, 5), 1.0)
+    sobelx = cv2.Sobel(blurred, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(blurred, cv2.CV_64F, 0, 1, ksize=3)
+    gradient_magnitude = np.sqrt(sobelx**2 + sobely**2)
+
+    px, py = pupil_center
+    num_angles = 36
+    angles = np.linspace(0, 2*np.pi, num_angles, endpoint=False)
+    min_search_radius = int(pupil_radius * 1.8)
+    max_search_radius = int(pupil_radius * 4.5)
+    max_search_radius = min(max_search_radius, min(px, w-px, py, h-py) - 5)
+    if min_search_radius >= max_search_radius:
+        return None, None
+
+    detected_radii = []
+    for angle in angles:
+        dx = np.cos(angle)
+        dy = np.sin(angle)
+        max_grad = 0
+        best_radius = None
+        for r in np.arange(min_search_radius, max_search_radius, 1):
+            x = int(px + r * dx)
+            y = int(py + r * dy)
+            if x < 0 or x >= w or y < 0 or y >= h:
+                break
+            grad = gradient_magnitude[y, x]
+            if grad > max_grad:
+                max_grad = grad
+                best_radius = r
+        if best_radius is not None and max_grad > 10:
+            detected_radii.append(best_radius)
+
+    if len(detected_radii) < num_angles * 0.5:
+        return None, None
+    iris_radius = int(np.median(detected_radii))
+    if iris_radius < pupil_radius * 1.8 or iris_radius > pupil_radius * 4.5:
+        return None, None
+    return pupil_center, iris_radius
+
+
+def make_color_eye(h, w, center, pupil_radius, iris_radius, seed=0):
+    """Synthetic BGR eye: white sclera, brown iris, black pupil, sensor noise."""
+    return paint_eye(h, w, center, pupil_radius, iris_radius, seed=seed)
+
+
+CASES = [
+    # (h, w, center, pupil_radius, iris_radius)
+    (480, 640, (320, 240), 40, 130),
+    (600, 800, (400, 300), 50, 170),
+    (300, 300, (150, 150), 30, 100),
+    (400, 600, (120, 200), 35, 140),   # search range clipped by the left edge
+    (240, 320, (160, 120), 20, 95),    # iris larger than the search range
+]
+
+
+def test_gradient_iris_matches_reference():
+    for i, (h, w, center, p_r, i_r) in enumerate(CASES):
+        image = make_color_eye(h, w, center, p_r, i_r, seed=i)
+
+        result = detect_iris_gradient_based(image, center, p_r)
+        expected = reference_iris_gradient_based(image, center, p_r)
+        assert result == expected, f"case {i}: {result} != {expected}"
+
+
+def test_roi_detection_matches_full_frame():
+    # High-resolution capture: skin, sclera, iris, pupil and a glint
+    rng = np.random.default_rng(0)
+    h, w, center = 1200, 1600, (840, 560)
+    image = np.full((h, w, 3), (150, 170, 200), dtype=np.uint8)
+    cv2.ellipse(image, center, (480, 240), 0, 0, 360, (205, 205, 210), -1)
+    cv2.circle(image, center, 210, (40, 70, 110), -1)
+    cv2.circle(image, center, 64, (12, 12, 12), -1)
+    cv2.circle(image, (860, 540), 10, (255, 255, 255), -1)
+    image = np.clip(image + rng.normal(0, 4, size=image.shape), 0, 255).astype(np.uint8)
+
+    report = compare_roi_detection(image, coarse_max_dim=400)
+    assert report['roi']['pupil'][0] is not None
+    assert report['pupil_center_delta_px'] <= 2
+    assert abs(report['pupil_radius_delta_px']) <= 2
+    assert report['iris_radius_delta_px'] is not None and abs(report['iris_radius_delta_px']) <= 2
+
+
+if __name__ == "__main__":
+    test_gradient_iris_matches_reference()
+    test_roi_detection_matches_full_frame()
+    print("✅ Color eye detection matches the reference implementations")
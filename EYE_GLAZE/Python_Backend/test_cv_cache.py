@@ -0,0 +1,43 @@
+"""
+OpenCV object cache: CLAHE instances are reused per thread (never shared
+across threads), kernels are shared read-only, and results are unchanged.
+
+Run:
+    python test_cv_cache.py
+    python -m pytest -q test_cv_cache.py
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from utils.cv_cache import get_clahe, get_structuring_element
+
+
+def test_clahe_is_per_thread_and_exact():
+    image = np.random.default_rng(0).integers(0, 256, (120, 160), dtype=np.uint8)
+    clahe = get_clahe(2.0, (8, 8))
+    assert get_clahe(2, [8, 8]) is clahe and get_clahe(3.0, (8, 8)) is not clahe
+    expected = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(image)
+    assert np.array_equal(clahe.apply(image), expected)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_clahe(2.0, (8, 8))))
+    thread.start()
+    thread.join()
+    assert other[0] is not clahe
+
+
+def test_kernels_are_shared_read_only():
+    kernel = get_structuring_element(cv2.MORPH_ELLIPSE, (7, 7))
+    assert get_structuring_element(cv2.MORPH_ELLIPSE, [7, 7]) is kernel
+    assert np.array_equal(kernel, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7)))
+    assert not kernel.flags.writeable
+    assert np.array_equal(get_structuring_element(cv2.MORPH_RECT, (15, 15)), np.ones((15, 15), np.uint8))
+
+
+if __name__ == "__main__":
+    test_clahe_is_per_thread_and_exact()
+    test_kernels_are_shared_read_only()
+    print("✅ CLAHE / structuring-element cache is exact and thread-safe")
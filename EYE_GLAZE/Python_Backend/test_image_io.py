@@ -0,0 +1,82 @@
+"""
+Decode-once image sources: detection entry points must give the same result
+for a file path, encoded bytes and an already decoded array. The sampled
+grayscale check agrees with the full np.allclose comparison it replaces.
+
+Run:
+    python test_image_io.py
+    python -m pytest -q test_image_io.py
+"""
+
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from detection import detect_eye_color, detect_eye_grayscale, load_image, is_grayscale_image
+from test_color_eye import make_color_eye
+
+
+def make_sources(image):
+    ok, encoded = cv2.imencode('.png', image)
+    assert ok
+    path = Path(tempfile.mkdtemp()) / 'eye.png'
+    cv2.imwrite(str(path), image)
+    return [str(path), path, encoded.tobytes(), image]
+
+
+def test_load_image_sources_agree():
+    image = make_color_eye(240, 320, (160, 120), 20, 80)
+    for source in make_sources(image):
+        assert np.array_equal(load_image(source), image)
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    assert load_image(gray).shape == image.shape
+    assert load_image(b'not an image') is None
+
+
+def test_detectors_accept_any_source():
+    image = make_color_eye(480, 640, (320, 240), 40, 130)
+    gray = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+
+    for detect, img in ((detect_eye_color, image), (detect_eye_grayscale, gray)):
+        results = [detect(source) for source in make_sources(img)]
+        for result in results:
+            assert result['success'] == results[-1]['success']
+            assert result.get('pupil') == results[-1].get('pupil')
+            assert result.get('iris') == results[-1].get('iris')
+
+
+def allclose_is_grayscale(image):
+    """Original full-plane check."""
+    return bool(np.allclose(image[:, :, 0], image[:, :, 1]) and np.allclose(image[:, :, 1], image[:, :, 2]))
+
+
+def test_sampled_grayscale_check_matches_allclose():
+    color = make_color_eye(480, 640, (320, 240), 40, 130)
+    gray = cv2.cvtColor(cv2.cvtColor(color, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+
+    # One coloured pixel between sample points: only the exact pass sees it
+    almost_gray = gray.copy()
+    almost_gray[241, 333, 2] ^= 1
+    tinted_last_rows = gray.copy()
+    tinted_last_rows[-3:, :, 0] = 0
+
+    cases = [color, gray, almost_gray, tinted_last_rows,
+             np.dstack([gray, np.full(gray.shape[:2], 255, np.uint8)]),  # BGRA
+             gray.astype(np.float32) / 255.0,
+             almost_gray.astype(np.float32)]
+    for image in cases:
+        assert is_grayscale_image(image) == allclose_is_grayscale(image)
+    assert [is_grayscale_image(image) for image in cases[:4]] == [False, True, False, False]
+
+    assert is_grayscale_image(gray[:, :, 0]) and is_grayscale_image(gray[:, :, :1])
+    assert is_grayscale_image(gray[:1, :1])
+
+
+if __name__ == "__main__":
+    test_load_image_sources_agree()
+    test_detectors_accept_any_source()
+    test_sampled_grayscale_check_matches_allclose()
+    print("✅ Path, bytes and array sources give identical detections")
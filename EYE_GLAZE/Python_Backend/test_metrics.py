@@ -0,0 +1,95 @@
+"""
+Pipeline metrics: per-stage timings on the results, quantile aggregation,
+detection-tier counters and the Prometheus text export behind /metrics.
+
+Run:
+    python test_metrics.py
+    python -m pytest -q test_metrics.py
+"""
+
+import re
+
+from pipeline import run_inference_pipeline, PipelineCache
+from pipeline.metrics import PipelineMetrics, get_metrics, render_prometheus
+from test_color_eye import make_color_eye
+from test_model_loader import make_dual_stream_model
+
+
+SAMPLE_LINE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? -?[0-9.e+-]+$')
+
+
+def test_quantiles_and_counters():
+    metrics = PipelineMetrics(window=100)
+    for i in range(1, 101):
+        metrics.record({
+            'success': i % 10 != 0,
+            'detection': {'success': i % 10 != 0, 'config_used': 'STANDARD' if i % 2 else 'AGGRESSIVE'},
+            'timings_ms': {'detection': float(i), 'total': float(i) + 1}
+        })
+
+    snapshot = metrics.snapshot()
+    detection = snapshot['stages']['detection']
+    assert detection['count'] == 100 and detection['sum_ms'] == 5050.0
+    assert 49 <= detection['p50_ms'] <= 52 and 94 <= detection['p95_ms'] <= 96 and detection['p99_ms'] >= 98
+    assert snapshot['outcomes'] == {'success': 90, 'detection_failed': 10}
+    assert snapshot['detection_tiers'] == {'STANDARD': 50, 'AGGRESSIVE': 40}
+
+    text = render_prometheus(metrics, extra_gauges={'model_ready': ('Model warm', 1)})
+    for line in text.strip().split('\n'):
+        assert line.startswith('# ') or SAMPLE_LINE.match(line), line
+    assert 'eye_glaze_stage_latency_seconds{stage="detection",quantile="0.95"}' in text
+    assert 'eye_glaze_stage_latency_seconds_sum{stage="detection"} 5.050000' in text
+    assert 'eye_glaze_detection_tier_total{tier="STANDARD"} 50' in text
+    assert 'eye_glaze_model_ready 1' in text
+
+
+def test_cached_detection_does_not_count_tier():
+    metrics = PipelineMetrics(window=10)
+    detection = {'success': True, 'config_used': 'JACKPOT'}
+    metrics.record({'success': True, 'detection': detection,
+                    'cache': {'detection': False, 'prediction': False}})
+    before = metrics.snapshot()['detection_tiers']
+
+    metrics.record({'success': True, 'detection': detection,
+                    'cache': {'detection': True, 'prediction': True}})
+    snapshot = metrics.snapshot()
+    assert before == {'JACKPOT': 1} and snapshot['detection_tiers'] == before
+    assert snapshot['cache_hits'] == {'detection': 1, 'prediction': 1}
+
+
+def test_pipeline_records_stage_timings():
+    get_metrics().reset()
+    image = make_color_eye(480, 640, (320, 240), 40, 130)
+    model = make_dual_stream_model()
+    cache = PipelineCache(max_entries=4, max_bytes=10 ** 6, disk_path='')
+
+    first = run_inference_pipeline(image, 30, model, cache=cache)
+    assert first['success']
+    assert set(first['timings_ms']) == {'hash', 'detection', 'measurements', 'preprocessing',
+                                        'prediction', 'total'}
+    assert first['timings_ms']['total'] >= first['timings_ms']['detection'] > 0
+
+    cached = run_inference_pipeline(image, 30, model, cache=cache)
+    assert set(cached['timings_ms']) == {'hash', 'total'}
+
+    snapshot = get_metrics().snapshot()
+    assert snapshot['stages']['total']['count'] == 2 and snapshot['stages']['detection']['count'] == 1
+    assert snapshot['detection_tiers'] == {'COLOR': 1}
+    assert snapshot['cache_hits'] == {'detection': 1, 'prediction': 1}
+
+
+def test_metrics_endpoint():
+    import app as backend
+
+    response = backend.app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'eye_glaze_model_ready' in response.get_data(as_text=True)
+
+
+if __name__ == "__main__":
+    test_quantiles_and_counters()
+    test_cached_detection_does_not_count_tier()
+    test_pipeline_records_stage_timings()
+    test_metrics_endpoint()
+    print("✅ Pipeline stage timings aggregate into /metrics")
@@ -0,0 +1,148 @@
+"""
+Serving model: prediction and fusion alpha from one forward pass, and the
+traced tf.function serving path, and warmup of a reloaded .keras file.
+
+Uses a small dual-stream model with the production input names and the real
+WeightedFeatureFusion layer (the trained .keras file is not needed).
+
+Run:
+    python test_model_loader.py
+    python -m pytest -q test_model_loader.py
+"""
+
+import gc
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+from pipeline.model_loader import (
+    keras,
+    build_serving_model,
+    get_serving_model,
+    get_serving_function,
+    benchmark_serving_latency,
+    load_production_model,
+    predict_single,
+    warmup_model,
+    PREDICTION_OUTPUT,
+    ALPHA_OUTPUT
+)
+from layers import WeightedFeatureFusion
+
+
+def make_dual_stream_model():
+    layers = keras.layers
+    pupil = keras.Input((224, 224, 5), name='pupil_input')
+    iris = keras.Input((224, 224, 5), name='iris_input')
+    age = keras.Input((8,), name='age_input')
+    rings = keras.Input((1,), name='iris_ring_count')
+
+    pupil_features = layers.GlobalAveragePooling2D()(layers.Conv2D(4, 3, strides=8)(pupil))
+    iris_features = layers.GlobalAveragePooling2D()(layers.Conv2D(4, 3, strides=8)(iris))
+    pupil_age = layers.Dense(16)(layers.concatenate([pupil_features, age]))
+    iris_rings = layers.Dense(16)(layers.concatenate([iris_features, rings]))
+
+    fused = WeightedFeatureFusion()([pupil_age, iris_rings])
+    output = layers.Dense(1, activation='sigmoid')(fused)
+    return keras.Model([pupil, iris, age, rings], output)
+
+
+def make_inputs(rng, batch=3):
+    pupil = rng.random((batch, 224, 224, 5), dtype=np.float32)
+    pupil[..., 3:] = 0.0
+    return {
+        'pupil_input': pupil,
+        'iris_input': rng.random((batch, 224, 224, 5), dtype=np.float32),
+        'age_input': np.eye(8, dtype=np.float32)[rng.integers(0, 8, batch)],
+        'iris_ring_count': rng.random((batch, 1), dtype=np.float32)
+    }
+
+
+def test_serving_model_exports_alpha():
+    model = make_dual_stream_model()
+    serving_model = build_serving_model(model)
+    inputs = make_inputs(np.random.default_rng(0))
+
+    outputs = serving_model.predict(inputs, verbose=0)
+    expected = model.predict(inputs, verbose=0)
+
+    # Alpha reported by the layer on the reference pass (same batch)
+    fusion_layer = next(l for l in model.layers if isinstance(l, WeightedFeatureFusion))
+    model(inputs)
+    expected_alpha = np.asarray(fusion_layer.last_alpha)
+
+    np.testing.assert_allclose(outputs[PREDICTION_OUTPUT], expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(outputs[ALPHA_OUTPUT], expected_alpha, rtol=1e-5, atol=1e-6)
+    assert len(set(np.round(outputs[ALPHA_OUTPUT].ravel(), 6))) > 1  # per-sample alpha
+
+    # Already served models are left alone
+    assert build_serving_model(serving_model) is serving_model
+
+
+def test_predict_single_uses_model_alpha():
+    model = make_dual_stream_model()
+    inputs = make_inputs(np.random.default_rng(1), batch=1)
+    expected = build_serving_model(model).predict(inputs, verbose=0)
+
+    for served in (model, build_serving_model(model)):
+        pred, alpha = predict_single(served, inputs['pupil_input'][0], inputs['iris_input'][0],
+                                     inputs['age_input'][0], float(inputs['iris_ring_count'][0, 0]))
+        assert abs(pred - float(expected[PREDICTION_OUTPUT][0, 0])) < 1e-5
+        assert abs(alpha - float(expected[ALPHA_OUTPUT][0, 0])) < 1e-5
+
+
+def test_serving_function_matches_predict():
+    model = make_dual_stream_model()
+    inputs = make_inputs(np.random.default_rng(2), batch=4)
+    expected = build_serving_model(model).predict(inputs, verbose=0)
+
+    for jit_compile in (False, True):
+        serve = get_serving_function(model, jit_compile=jit_compile)
+        assert get_serving_function(model, jit_compile=jit_compile) is serve  # traced once
+        outputs = serve(inputs)
+        for name in (PREDICTION_OUTPUT, ALPHA_OUTPUT):
+            np.testing.assert_allclose(outputs[name].numpy(), expected[name], rtol=1e-4, atol=1e-5)
+
+    report = benchmark_serving_latency(model, runs=3, warmup=1)
+    assert report['max_abs_diff'] < 1e-4
+    assert report['tf_function_ms']['p50'] > 0
+
+
+def test_cached_serving_function_does_not_pin_model():
+    # A multi-output model is its own serving model: its function references it
+    serving_model = get_serving_model(make_dual_stream_model())
+    get_serving_function(serving_model)
+    reference = weakref.ref(serving_model)
+    del serving_model
+    for _ in range(3):
+        gc.collect()
+    assert reference() is None
+
+
+def test_loaded_model_warmup():
+    model = make_dual_stream_model()
+    inputs = make_inputs(np.random.default_rng(3), batch=2)
+    expected = build_serving_model(model).predict(inputs, verbose=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.keras')
+        model.save(path)
+        loaded = load_production_model(path)
+
+    assert loaded is not None
+    timings = warmup_model(loaded, batch_sizes=[4, 1, 4])
+    assert sorted(timings) == [1, 4]
+    outputs = get_serving_function(loaded)(inputs)
+    for name in (PREDICTION_OUTPUT, ALPHA_OUTPUT):
+        np.testing.assert_allclose(outputs[name].numpy(), expected[name], rtol=1e-4, atol=1e-5)
+
+
+if __name__ == "__main__":
+    test_serving_model_exports_alpha()
+    test_predict_single_uses_model_alpha()
+    test_serving_function_matches_predict()
+    test_cached_serving_function_does_not_pin_model()
+    test_loaded_model_warmup()
+    print("✅ Serving model returns prediction and per-sample alpha in one pass")
@@ -0,0 +1,104 @@
+"""
+Stream-aware preprocessing must reproduce the original preprocess_eye_image
+(training format) exactly:
+- preprocess_iris_stream: all 5 channels
+- preprocess_pupil_stream: RGB channels, channels 3-4 zeroed
+- in place into pooled buffers (utils/buffer_pool.py)
+- preprocess_eye_images_batch: same result for every crop of a batch
+
+Run:
+    python test_preprocessing.py
+    python -m pytest -q test_preprocessing.py
+"""
+
+import cv2
+import numpy as np
+
+from utils import preprocess_pupil_stream, preprocess_iris_stream, preprocess_eye_images_batch
+from utils.buffer_pool import InputBufferPool
+
+
+def reference_preprocess(image, target_size=(224, 224)):
+    """Original preprocess_eye_image (training notebook Section 4.1)."""
+    if len(image.shape) == 3 and image.shape[2] == 3:
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    else:
+        rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    rgb = cv2.resize(rgb, target_size)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    gray_clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+    edge_channel = np.clip(cv2.Canny(gray_clahe, 50, 150).astype(np.float32) / 255.0, 0.0, 1.0)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+    black_hat = cv2.morphologyEx(gray_clahe, cv2.MORPH_BLACKHAT, kernel).astype(np.float32)
+    bh_min, bh_max = black_hat.min(), black_hat.max()
+    if (bh_max - bh_min) > 1e-7:
+        texture_channel = (black_hat - bh_min) / (bh_max - bh_min + 1e-7)
+    else:
+        texture_channel = np.zeros_like(black_hat)
+    texture_channel = np.clip(texture_channel, 0.0, 1.0)
+    rgb_float = rgb.astype(np.float32) / 255.0
+    five_channel = np.dstack([rgb_float[:, :, 0], rgb_float[:, :, 1], rgb_float[:, :, 2],
+                              edge_channel, texture_channel])
+    return np.clip(five_channel, 0.0, 1.0).astype(np.float32)
+
+
+def make_images(rng):
+    yield rng.integers(0, 256, (300, 400, 3), dtype=np.uint8)      # color, downscale
+    yield rng.integers(0, 256, (90, 120), dtype=np.uint8)          # grayscale, upscale
+    yield np.full((150, 150, 3), 7, dtype=np.uint8)                # flat (no BlackHat range)
+
+
+def test_streams_match_reference():
+    for image in make_images(np.random.default_rng(0)):
+        expected = reference_preprocess(image)
+        assert np.array_equal(preprocess_iris_stream(image), expected)
+
+        expected[:, :, 3:] = 0.0
+        assert np.array_equal(preprocess_pupil_stream(image), expected)
+
+
+def test_streams_write_into_buffer():
+    image = np.random.default_rng(1).integers(0, 256, (200, 260, 3), dtype=np.uint8)
+    buffer = np.full((224, 224, 5), np.nan, dtype=np.float32)
+
+    assert preprocess_pupil_stream(image, out=buffer) is buffer
+    assert not buffer[:, :, 3:].any()
+    assert preprocess_iris_stream(image, out=buffer) is buffer
+    assert np.array_equal(buffer, reference_preprocess(image))
+
+
+def test_buffer_pool_reuses_buffers():
+    pool = InputBufferPool(batch_size=2)
+    image = np.random.default_rng(2).integers(0, 256, (180, 240, 3), dtype=np.uint8)
+
+    for _ in range(5):
+        with pool.lease() as buffer:
+            assert buffer.shape == (2, 224, 224, 5) and buffer.dtype == np.float32
+            preprocess_iris_stream(image, out=buffer[1])
+            assert np.array_equal(buffer[1], reference_preprocess(image))
+
+    stats = pool.stats()
+    assert stats['allocated'] == 1 and stats['reused'] == 4 and stats['in_use'] == 0
+
+
+def test_batch_matches_single_image():
+    rng = np.random.default_rng(3)
+    crops = [rng.integers(0, 256, (int(h), int(w), 3), dtype=np.uint8)
+             for h, w in rng.integers(40, 400, size=(10, 2))]
+    crops += list(make_images(rng))
+    crops.append(np.zeros((0, 0, 3), dtype=np.uint8))  # failed crop -> zeros
+
+    for stream, single in (('iris', preprocess_iris_stream), ('pupil', preprocess_pupil_stream)):
+        for max_workers in (1, 4):
+            batch = preprocess_eye_images_batch(crops, stream=stream, max_workers=max_workers)
+            assert batch.shape == (len(crops), 224, 224, 5)
+            for crop, result in zip(crops, batch):
+                assert np.array_equal(result, single(crop))
+
+
+if __name__ == "__main__":
+    test_streams_match_reference()
+    test_streams_write_into_buffer()
+    test_buffer_pool_reuses_buffers()
+    test_batch_matches_single_image()
+    print("✅ Stream-aware preprocessing matches the training format")
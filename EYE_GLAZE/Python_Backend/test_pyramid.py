@@ -0,0 +1,72 @@
+"""
+Tests for the pyramid coarse-to-fine localisation strategy (detection/pyramid.py).
+
+Pyramid results must agree with native-resolution detection on synthetic
+high-resolution captures.
+
+Run:
+    python test_pyramid.py
+    python -m pytest -q test_pyramid.py
+"""
+
+import numpy as np
+
+import config
+from benchmarks.synthetic_eye import paint_eye
+from detection import (
+    detect_pupil_robust,
+    detect_iris_robust,
+    detect_pupil_hybrid,
+    detect_pupil_pyramid,
+    detect_iris_pyramid,
+    detect_pupil_hybrid_pyramid
+)
+from detection.pyramid import build_pyramid
+
+
+H, W, CENTER, PUPIL_RADIUS, IRIS_RADIUS = 1500, 2000, (1010, 740), 60, 210
+
+
+def make_grayscale_eye(seed=0):
+    reflection = ((CENTER[0] + 20, CENTER[1] - 20), 8)
+    return paint_eye(H, W, CENTER, PUPIL_RADIUS, IRIS_RADIUS, sclera=170, iris=110, pupil=15,
+                     noise=5.0, glint=reflection, grayscale=True, seed=seed)
+
+
+def make_color_eye(seed=0):
+    return paint_eye(H, W, CENTER, PUPIL_RADIUS, IRIS_RADIUS, sclera=(205, 205, 210),
+                     noise=4.0, seed=seed)
+
+
+def assert_close(result, expected, tolerance=2):
+    assert result[0] is not None, f"pyramid detection failed, expected {expected}"
+    for got, want in zip(result, expected):
+        assert abs(int(got) - int(want)) <= tolerance, f"{result} != {expected}"
+
+
+def test_build_pyramid_respects_min_dim():
+    pyramid = build_pyramid(np.zeros((1500, 2000), np.uint8), levels=5, min_level_dim=160)
+    assert [p.shape for p in pyramid] == [(1500, 2000), (750, 1000), (375, 500), (188, 250)]
+
+
+def test_grayscale_pyramid_matches_native():
+    image = make_grayscale_eye()
+    cfg = config.JACKPOT_CONFIG
+
+    assert_close(detect_pupil_pyramid(image, cfg), detect_pupil_robust(image, cfg))
+    assert_close(detect_iris_pyramid(image, cfg), detect_iris_robust(image, cfg))
+
+
+def test_color_pyramid_matches_native():
+    image = make_color_eye()
+
+    center, radius = detect_pupil_hybrid_pyramid(image)
+    expected_center, expected_radius = detect_pupil_hybrid(image)
+    assert_close((*center, radius), (*expected_center, expected_radius))
+
+
+if __name__ == "__main__":
+    test_build_pyramid_respects_min_dim()
+    test_grayscale_pyramid_matches_native()
+    test_color_pyramid_matches_native()
+    print("✅ Pyramid localisation matches native-resolution detection")
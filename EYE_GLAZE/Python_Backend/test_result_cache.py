@@ -0,0 +1,79 @@
+"""
+Result cache: LRU bounds, the SQLite tier, and run_inference_pipeline reusing
+detection across ages and predictions for the same image + age group.
+
+Run:
+    python test_result_cache.py
+    python -m pytest -q test_result_cache.py
+"""
+
+import os
+import tempfile
+
+import cv2
+
+from pipeline import run_inference_pipeline, PipelineCache
+from pipeline.result_cache import LRUCache, image_digest
+from test_color_eye import make_color_eye
+from test_model_loader import make_dual_stream_model
+
+
+def test_lru_bounds_and_disk_tier():
+    cache = LRUCache(max_entries=3, max_bytes=10 ** 6)
+    for i in range(5):
+        cache.put(f'k{i}', {'value': i})
+    assert cache.get('k0') is None and cache.get('k4') == {'value': 4}
+    assert cache.stats()['entries'] == 3 and cache.stats()['evictions'] == 2
+
+    small = LRUCache(max_entries=100, max_bytes=2000)
+    for i in range(10):
+        small.put(f'k{i}', b'x' * 500)
+    assert small.stats()['bytes'] <= 2000 and small.get('k9') is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.sqlite')
+        first = LRUCache(max_entries=2, disk_path=path, table='t')
+        for i in range(4):
+            first.put(f'k{i}', i)
+        first.close()
+
+        second = LRUCache(max_entries=2, disk_path=path, table='t')
+        assert second.get('k0') == 0  # evicted from memory long ago, restored from disk
+        assert second.stats()['disk_hits'] == 1
+        second.close()
+
+
+def test_pipeline_reuses_detection_and_prediction():
+    image = make_color_eye(480, 640, (320, 240), 40, 130)
+    model = make_dual_stream_model()
+    cache = PipelineCache(max_entries=16, max_bytes=10 ** 6, disk_path='')
+
+    first = run_inference_pipeline(image, 30, model, cache=cache)
+    assert first['success'] and first['cache'] == {'detection': False, 'prediction': False}
+
+    # Same pixels re-encoded losslessly by the client: full hit
+    png = cv2.imencode('.png', image)[1].tobytes()
+    again = run_inference_pipeline(png, 30, model, cache=cache)
+    assert again['cache'] == {'detection': True, 'prediction': True}
+    assert again['prediction'] == first['prediction']
+    assert again['measurements'] == first['measurements']
+
+    # Same age group hits, another age group only re-runs the prediction
+    assert run_inference_pipeline(image, 25, model, cache=cache)['cache']['prediction']
+    older = run_inference_pipeline(image, 70, model, cache=cache)
+    assert older['success'] and older['cache'] == {'detection': True, 'prediction': False}
+    assert older['detection']['image'] is not None
+
+    stats = cache.stats()
+    assert stats['detection']['misses'] == 1 and stats['prediction']['misses'] == 2
+
+    # Any pixel change is a different image
+    changed = image.copy()
+    changed[0, 0, 0] ^= 1
+    assert image_digest(changed) != image_digest(image)
+
+
+if __name__ == "__main__":
+    test_lru_bounds_and_disk_tier()
+    test_pipeline_reuses_detection_and_prediction()
+    print("✅ Result cache reuses detection across ages and predictions per age group")
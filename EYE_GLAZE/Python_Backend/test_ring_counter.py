@@ -0,0 +1,202 @@
+"""
+Regression test for the vectorized ring counter.
+
+Compares detection/ring_counter.py against the original per-pixel loop
+implementation (kept here as the reference) on synthetic iris images.
+
+Run:
+    python test_ring_counter.py
+    python -m pytest -q test_ring_counter.py
+"""
+
+import cv2
+import numpy as np
+from scipy.ndimage import gaussian_filter1d
+from scipy.signal import find_peaks
+
+from detection.ring_counter import (
+    detect_tension_rings_radial_profile,
+    unwrap_iris_region,
+    count_tension_rings,
+    count_tension_rings_batch
+)
+
+
+def reference_radial_profile(gray_image, pupil_center, pupil_radius, iris_radius):
+    """Original loop-based implementation (pre-vectorization) used as ground truth."""
+    h, w = gray_image.shape
+    cx_pupil, cy_pupil = pupil_center
+
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced_image = clahe.apply(gray_image)
+
+    min_radius = int(pupil_radius + 5)
+    max_radius = int(iris_radius - 5)
+
+    if max_radius <= min_radius:
+        return [], [], None
+
+    radial_profile = []
+    for radius in range(min_radius, max_radius):
+        angles = np.linspace(0, 2*np.pi, 720, endpoint=False)
+        intensities = []
+        for angle in angles:
+            x = int(cx_pupil + radius * np.cos(angle))
+            y = int(cy_pupil + radius * np.sin(angle))
+            if 0 <= x < w and 0 <= y < h:
+                intensities.append(enhanced_image[y, x])
+        if len(intensities) > 0:
+            radial_profile.append(np.median(intensities))
+        else:
+            radial_profile.append(0)
+    radial_profile = np.array(radial_profile)
+
+    if len(radial_profile) < 10:
+        return [], [], radial_profile
+
+    smoothed_profile = gaussian_filter1d(radial_profile, sigma=2)
+    peaks, properties = find_peaks(-smoothed_profile, prominence=0.5, distance=2, width=(1, 35))
+
+    if len(peaks) == 0:
+        return [], [], radial_profile
+
+    ring_radii = [min_radius + peak_idx for peak_idx in peaks]
+    prominences = properties.get('prominences', np.ones(len(peaks)))
+    max_prom = max(prominences)
+    ring_confidences = [p / max_prom if max_prom > 0 else 0.5 for p in prominences]
+
+    validated_rings = []
+    validated_confidences = []
+    for ring_radius, conf in zip(ring_radii, ring_confidences):
+        angles = np.linspace(0, 2*np.pi, 64, endpoint=False)
+        ring_intensities = []
+        for angle in angles:
+            x = int(cx_pupil + ring_radius * np.cos(angle))
+            y = int(cy_pupil + ring_radius * np.sin(angle))
+            if 0 <= x < w and 0 <= y < h:
+                ring_intensities.append(enhanced_image[y, x])
+
+        if len(ring_intensities) > 0:
+            ring_intensity = np.median(ring_intensities)
+            surrounding_intensities = []
+            for offset in [-5, -3, 3, 5]:
+                r = ring_radius + offset
+                if min_radius <= r <= max_radius:
+                    for angle in np.linspace(0, 2*np.pi, 32, endpoint=False):
+                        x = int(cx_pupil + r * np.cos(angle))
+                        y = int(cy_pupil + r * np.sin(angle))
+                        if 0 <= x < w and 0 <= y < h:
+                            surrounding_intensities.append(enhanced_image[y, x])
+
+            if len(surrounding_intensities) > 0:
+                avg_surrounding = np.median(surrounding_intensities)
+                darkness_ratio = ring_intensity / (avg_surrounding + 1)
+                if ring_intensity < 140 or darkness_ratio < 0.90:
+                    validated_rings.append(ring_radius)
+                    if ring_intensity < 130 and darkness_ratio < 0.85:
+                        validated_confidences.append(min(conf * 1.2, 1.0))
+                    else:
+                        validated_confidences.append(conf)
+            elif ring_intensity < 140:
+                validated_rings.append(ring_radius)
+                validated_confidences.append(conf)
+
+    return validated_rings, validated_confidences, radial_profile
+
+
+def reference_unwrap(gray, pupil_center, pupil_radius, iris_radius, radial_res=64, angular_res=512):
+    """Original nested-loop rubber-sheet unwrap used as ground truth."""
+    h, w = gray.shape
+    cx_pupil, cy_pupil = pupil_center
+    unwrapped = np.zeros((radial_res, angular_res), dtype=np.uint8)
+    for r_idx in range(radial_res):
+        r_norm = r_idx / (radial_res - 1)
+        radius = pupil_radius + r_norm * (iris_radius - pupil_radius)
+        for theta_idx in range(angular_res):
+            theta = (2 * np.pi * theta_idx) / angular_res
+            x = int(cx_pupil + radius * np.cos(theta))
+            y = int(cy_pupil + radius * np.sin(theta))
+            if 0 <= x < w and 0 <= y < h:
+                unwrapped[r_idx, theta_idx] = gray[y, x]
+    return unwrapped
+
+
+def make_iris_image(h, w, center, pupil_radius, iris_radius, ring_radii, seed=0):
+    """Synthetic grayscale eye: dark pupil, textured iris, dark concentric rings."""
+    rng = np.random.default_rng(seed)
+    image = np.full((h, w), 200, dtype=np.uint8)
+    cv2.circle(image, center, iris_radius, 150, -1)
+    for r in ring_radii:
+        cv2.circle(image, center, r, 90, 2)
+    cv2.circle(image, center, pupil_radius, 20, -1)
+    noise = rng.normal(0, 12, size=(h, w))
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+CASES = [
+    # (h, w, center, pupil_radius, iris_radius, ring_radii)
+    (480, 640, (320, 240), 40, 160, [70, 95, 120, 140]),
+    (300, 300, (150, 150), 25, 110, [50, 80]),
+    (400, 400, (60, 200), 30, 150, [60, 90, 120]),     # iris clipped on the left edge
+    (400, 500, (470, 30), 20, 140, [45, 70, 100]),     # pupil near a corner
+    (256, 256, (128, 128), 35, 60, []),                # no rings
+    (480, 480, (240, 240), 30, 230, list(range(45, 225, 9))),  # ~20 candidates
+]
+
+
+def test_radial_profile_matches_reference():
+    for i, (h, w, center, p_r, i_r, rings) in enumerate(CASES):
+        image = make_iris_image(h, w, center, p_r, i_r, rings, seed=i)
+        if i % 2:
+            image = cv2.add(image, 60)  # brighter iris: exercises the relative darkness check
+
+        radii, confidences, profile = detect_tension_rings_radial_profile(image, center, p_r, i_r)
+        ref_radii, ref_confidences, ref_profile = reference_radial_profile(image, center, p_r, i_r)
+
+        assert radii == ref_radii, f"case {i}: {radii} != {ref_radii}"
+        assert confidences == ref_confidences, f"case {i}: {confidences} != {ref_confidences}"
+        np.testing.assert_array_equal(profile, ref_profile)
+
+
+def test_unwrap_nearest_matches_reference():
+    for i, (h, w, center, p_r, i_r, rings) in enumerate(CASES):
+        image = make_iris_image(h, w, center, p_r, i_r, rings, seed=i)
+
+        unwrapped = unwrap_iris_region(image, center, p_r, center, i_r)
+        np.testing.assert_array_equal(unwrapped, reference_unwrap(image, center, p_r, i_r))
+
+
+def test_unwrap_bilinear_close_to_reference():
+    h, w, center, p_r, i_r, rings = CASES[0]
+    image = make_iris_image(h, w, center, p_r, i_r, rings)
+
+    unwrapped = unwrap_iris_region(image, center, p_r, center, i_r, interpolation='bilinear')
+    reference = reference_unwrap(image, center, p_r, i_r)
+    assert unwrapped.shape == reference.shape
+    assert np.abs(unwrapped.astype(int) - reference).mean() < 15
+
+
+def test_batch_matches_single_calls():
+    samples = []
+    for i, (h, w, center, p_r, i_r, rings) in enumerate(CASES * 3):
+        image = make_iris_image(h, w, center, p_r, i_r, rings, seed=i)
+        samples.append((cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), center, p_r, i_r))
+
+    for processes in (None, 2):
+        batch = count_tension_rings_batch(samples, processes=processes, chunksize=4)
+        assert batch['offsets'][-1] == len(batch['ring_radii'])
+
+        for i, sample in enumerate(samples):
+            count, radii, confidences = count_tension_rings(*sample)
+            start, stop = batch['offsets'][i], batch['offsets'][i + 1]
+            assert batch['ring_counts'][i] == count
+            assert batch['ring_radii'][start:stop].tolist() == radii
+            assert batch['ring_confidences'][start:stop].tolist() == confidences
+
+
+if __name__ == "__main__":
+    test_radial_profile_matches_reference()
+    test_unwrap_nearest_matches_reference()
+    test_unwrap_bilinear_close_to_reference()
+    test_batch_matches_single_calls()
+    print("✅ Vectorized ring counter matches the reference implementation")
@@ -0,0 +1,92 @@
+"""
+Worker supervision in the pre-fork launcher (serve.py): replacements that
+keep failing their warmup are retried with backoff and then stop the
+server, and a slow warmup never delays replacing another dead worker.
+
+Run:
+    python test_serve.py
+    python -m pytest -q test_serve.py
+"""
+
+import os
+import time
+
+from serve import _supervise, _terminate
+
+
+SETTINGS = {'RESPAWN_BACKOFF_S': 0.05, 'RESPAWN_BACKOFF_MAX_S': 0.2,
+            'MAX_FAILED_RESPAWNS': 3, 'RESPAWN_WINDOW_S': 60}
+
+
+def fake_worker(report=None, lifetime=60.0):
+    """Fork a stand-in worker: writes `report` (b'0' exits at once), then lives `lifetime`."""
+    ready_r, ready_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(ready_r)
+            if report is not None:
+                os.write(ready_w, report)
+            if report != b'0':
+                time.sleep(lifetime)
+        finally:
+            os._exit(0 if report == b'1' else 1)
+    os.close(ready_w)
+    return pid, ready_r
+
+
+def started(lifetime):
+    """A serving worker (already past its warmup) that dies after `lifetime`."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            time.sleep(lifetime)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def test_failing_replacements_give_up():
+    spawned = []
+
+    def spawn():
+        spawned.append(time.monotonic())
+        return fake_worker(b'0')
+
+    crashed = started(0)
+    children = {crashed}
+    start = time.monotonic()
+    assert not _supervise(children, spawn, 5.0, SETTINGS, lambda: False)
+    for pid in children:
+        os.waitpid(pid, 0)
+    assert len(spawned) == SETTINGS['MAX_FAILED_RESPAWNS']
+    # Backoff between consecutive failed replacements
+    assert spawned[2] - spawned[1] >= SETTINGS['RESPAWN_BACKOFF_S']
+    assert time.monotonic() - start < 5.0
+
+
+def test_slow_warmup_does_not_block_reaping():
+    spawned, stopping = [], []
+    children = set()
+
+    def spawn():
+        spawned.append(time.monotonic())
+        if len(spawned) == 1:
+            # Still warming when the other worker dies
+            return fake_worker(None, lifetime=30)
+        # Second replacement started without waiting on the first: shut down
+        pid, ready_fd = fake_worker(b'1')
+        stopping.append(True)
+        _terminate(list(children) + [pid])
+        return pid, ready_fd
+
+    children.update({started(0), started(0.3)})
+    start = time.monotonic()
+    assert _supervise(children, spawn, 30.0, SETTINGS, lambda: bool(stopping))
+    assert len(spawned) == 2 and spawned[1] - start < 5.0
+
+
+if __name__ == "__main__":
+    test_failing_replacements_give_up()
+    test_slow_warmup_does_not_block_reaping()
+    print("✅ Launcher backs off, gives up on failing replacements and keeps reaping")
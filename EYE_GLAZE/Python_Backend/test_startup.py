@@ -0,0 +1,30 @@
+"""
+Detection/measurement-only entry points must start without TensorFlow.
+
+Run:
+    python test_startup.py
+    python -m pytest -q test_startup.py
+"""
+
+from benchmarks.startup_time import measure_import
+
+
+def test_detection_entry_points_skip_tensorflow():
+    for module in ('detection', 'measurement', 'utils', 'pipeline', 'app_production'):
+        probe = measure_import(module)
+        assert 'tensorflow' in probe, f"{module}: {probe.get('error')}"
+        assert not probe['tensorflow'], f"{module} imported TensorFlow"
+
+
+def test_lazy_pipeline_exports_resolve():
+    import pipeline
+    from pipeline import predict_single, MicroBatcher
+
+    assert callable(predict_single) and isinstance(MicroBatcher, type)
+    assert pipeline.predict_single is predict_single
+
+
+if __name__ == "__main__":
+    test_detection_entry_points_skip_tensorflow()
+    test_lazy_pipeline_exports_resolve()
+    print("✅ Detection entry points start without TensorFlow")
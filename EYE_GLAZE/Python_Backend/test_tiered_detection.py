@@ -0,0 +1,115 @@
+"""
+Parallel tier evaluation (detection/tiered.py): detect_eye_grayscale(parallel=True)
+returns exactly what the sequential JACKPOT -> HIGH_PASS -> RESCUE fallback
+returns, and cancels passes that can no longer change the answer. Tiers
+share one DetectionContext (detection/context.py) without changing results.
+
+Run:
+    python test_tiered_detection.py
+    python -m pytest -q test_tiered_detection.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic_eye import paint_eye
+from detection import (
+    detect_eye_grayscale,
+    detect_pupil_robust,
+    detect_iris_robust,
+    detect_pupil_pyramid,
+    detect_iris_pyramid,
+    grayscale_tiers,
+    run_tiers_parallel,
+    DetectionContext
+)
+import config
+
+
+def make_eye(pupil_radius, iris_radius, seed=0):
+    """Grayscale eye; small pupils / irises only pass the relaxed tiers."""
+    return paint_eye(500, 500, (250, 250), pupil_radius, iris_radius, sclera=170, iris=110,
+                     pupil=15, noise=5.0, grayscale=True, seed=seed)
+
+
+def test_parallel_matches_sequential():
+    cases = [(30, 120), (11, 120), (14, 70), (30, 50)]
+    tiers_used = set()
+    for pupil_radius, iris_radius in cases:
+        image = make_eye(pupil_radius, iris_radius)
+        sequential = detect_eye_grayscale(image)
+        parallel = detect_eye_grayscale(image, parallel=True)
+        for key in ('success', 'pupil', 'iris', 'config_used', 'error'):
+            assert sequential.get(key) == parallel.get(key), (pupil_radius, iris_radius, key)
+        tiers_used.add(sequential['config_used'])
+    assert tiers_used == {'JACKPOT', 'HIGH_PASS', 'RESCUE'}
+
+    blank = np.full((300, 300, 3), 128, dtype=np.uint8)
+    assert detect_eye_grayscale(blank, parallel=True) == detect_eye_grayscale(blank)
+
+
+def slow_detector(succeeds_from_tier, delay=0.2):
+    """Fake detector: every pass takes delay, tiers >= succeeds_from_tier find (1, 2, 3)."""
+    names = [name for name, _ in grayscale_tiers(config.JACKPOT_CONFIG)]
+
+    def detect(image, tier_config):
+        time.sleep(delay)
+        return (1, 2, 3) if names.index(tier_config['NAME']) >= succeeds_from_tier else (None, None, None)
+    return detect
+
+
+def named_tiers():
+    return [(name, dict(tier_config, NAME=name)) for name, tier_config in grayscale_tiers(config.JACKPOT_CONFIG)]
+
+
+def test_worst_case_latency_is_one_tier():
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        start = time.perf_counter()
+        outcome = run_tiers_parallel(image, named_tiers(), slow_detector(2), slow_detector(2), executor)
+        elapsed = time.perf_counter() - start
+    assert outcome['pupil_tier'] == 2 and outcome['iris_tier'] == 2
+    assert elapsed < 0.45  # sequential: 3 tiers x 2 parts x 0.2 s
+
+
+def test_lower_tiers_are_cancelled():
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        outcome = run_tiers_parallel(image, named_tiers(), slow_detector(0), slow_detector(0), executor)
+    assert outcome['pupil'] == (1, 2, 3) and outcome['pupil_tier'] == 0
+    assert outcome['passes_run'] <= 3  # at most one pass started before JACKPOT answered
+
+    # Pupil fails every tier: pending iris passes are dropped as well
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        outcome = run_tiers_parallel(image, named_tiers(), slow_detector(3, 0.05), slow_detector(0, 0.05), executor)
+    assert outcome['pupil_tier'] is None and outcome['passes_run'] < 6
+
+
+def test_context_shares_work_across_tiers():
+    tiers = [tier_config for _, tier_config in grayscale_tiers(config.JACKPOT_CONFIG)]
+    for pupil_radius, iris_radius in [(30, 120), (11, 120), (30, 50)]:
+        image = make_eye(pupil_radius, iris_radius)
+        for detect_pupil, detect_iris in [(detect_pupil_robust, detect_iris_robust),
+                                          (detect_pupil_pyramid, detect_iris_pyramid)]:
+            context = DetectionContext(image)
+            for tier_config in tiers:
+                assert detect_pupil(image, tier_config, context=context) == detect_pupil(image, tier_config)
+                assert detect_iris(image, tier_config, context=context) == detect_iris(image, tier_config)
+
+    # gray, both blurs: computed once for six passes
+    context = DetectionContext(make_eye(30, 50))
+    for tier_config in tiers:
+        detect_pupil_robust(context.image, tier_config, context=context)
+        detect_iris_robust(context.image, tier_config, context=context)
+    assert context.stats()['misses'] == 3 + 3 + 3  # gray/blur5/blur7 + 3 inpaints + 3 Canny
+    assert context.stats()['hits'] >= 5
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_worst_case_latency_is_one_tier()
+    test_lower_tiers_are_cancelled()
+    test_context_shares_work_across_tiers()
+    print("✅ Parallel / shared-context tiers match the sequential fallback")
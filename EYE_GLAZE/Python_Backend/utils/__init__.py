@@ -4,6 +4,9 @@ Utility modules for preprocessing and feature extraction
 
 from .preprocessing import (
     preprocess_eye_image,
+    preprocess_pupil_stream,
+    preprocess_iris_stream,
+    preprocess_eye_images_batch,
     encode_age,
     extract_eye_region,
     focal_loss,
@@ -12,6 +15,9 @@ from .preprocessing import (
 
 __all__ = [
     'preprocess_eye_image',
+    'preprocess_pupil_stream',
+    'preprocess_iris_stream',
+    'preprocess_eye_images_batch',
     'encode_age',
     'extract_eye_region',
     'focal_loss',
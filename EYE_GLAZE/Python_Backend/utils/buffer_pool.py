@@ -0,0 +1,247 @@
+"""
+Input Buffer Pool - Preallocated float32 tensors for the 5-channel model inputs
+
+The preprocessing hot path writes straight into pooled arrays instead of
+allocating a fresh (224, 224, 5) tensor (plus RGB / edge / texture
+temporaries) per request:
+
+- InputBufferPool hands out (B, 224, 224, 5) float32 arrays and takes them
+  back when the request is done (B = 1 for single requests, the batch size
+  for micro-batches).
+- get_scratch() keeps per-thread uint8 work images (resized crop, gray,
+  CLAHE, edges, BlackHat) for preprocess_pupil_stream / preprocess_iris_stream.
+
+benchmark_preprocessing_memory() compares peak RSS and GC activity of the
+allocating and the pooled path.
+"""
+
+import gc
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+# ============================================================================
+# BUFFER POOL
+# ============================================================================
+
+class InputBufferPool:
+    """
+    Thread-safe pool of (batch_size, H, W, channels) float32 arrays.
+
+    Usage:
+        pool = InputBufferPool(batch_size=1)
+        with pool.lease() as buffer:
+            preprocess_iris_stream(crop, out=buffer[0])
+            ...
+    """
+
+    def __init__(self, batch_size: int = 1, target_size: Tuple[int, int] = (224, 224),
+                 channels: int = 5, max_free: int = 16):
+        """
+        Parameters:
+        -----------
+        batch_size : int
+            Leading dimension of every buffer
+        target_size : tuple
+            Model input size (height, width)
+        channels : int
+            Channels per image (5 = RGB + Canny + BlackHat)
+        max_free : int
+            Most idle buffers kept; extra released buffers are dropped
+        """
+        self.shape = (batch_size, target_size[0], target_size[1], channels)
+        self.max_free = max_free
+        self._free: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        self._allocated = 0
+        self._reused = 0
+        self._in_use = 0
+
+    def acquire(self) -> np.ndarray:
+        """Idle buffer (contents undefined - preprocessing overwrites every channel)."""
+        with self._lock:
+            self._in_use += 1
+            if self._free:
+                self._reused += 1
+                return self._free.pop()
+            self._allocated += 1
+        return np.empty(self.shape, dtype=np.float32)
+
+    def release(self, buffer: np.ndarray):
+        """Return a buffer obtained from acquire()."""
+        if buffer.shape != self.shape or buffer.dtype != np.float32:
+            raise ValueError(f"Buffer {buffer.shape}/{buffer.dtype} does not belong to pool {self.shape}")
+        with self._lock:
+            self._in_use -= 1
+            if len(self._free) < self.max_free:
+                self._free.append(buffer)
+
+    @contextmanager
+    def lease(self):
+        """Context manager: acquire() on enter, release() on exit."""
+        buffer = self.acquire()
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def stats(self) -> Dict:
+        """{'shape', 'allocated', 'reused', 'in_use', 'free'}"""
+        with self._lock:
+            return {
+                'shape': self.shape,
+                'allocated': self._allocated,
+                'reused': self._reused,
+                'in_use': self._in_use,
+                'free': len(self._free)
+            }
+
+
+_pools: Dict[Tuple, InputBufferPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_buffer_pool(batch_size: int = 1, target_size: Tuple[int, int] = (224, 224),
+                    channels: int = 5) -> InputBufferPool:
+    """Process-wide pool for the given buffer shape (created on first use)."""
+    key = (batch_size, tuple(target_size), channels)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = InputBufferPool(batch_size, target_size, channels)
+        return pool
+
+
+# ============================================================================
+# PER-THREAD SCRATCH IMAGES
+# ============================================================================
+
+_scratch = threading.local()
+
+
+def get_scratch(name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+    """
+    Per-thread work array, reused across calls while the shape stays the same.
+
+    Only valid until the same thread asks for the same name again - never
+    return a scratch array to the caller.
+    """
+    arrays = getattr(_scratch, 'arrays', None)
+    if arrays is None:
+        arrays = _scratch.arrays = {}
+    array = arrays.get(name)
+    if array is None or array.shape != shape or array.dtype != dtype:
+        array = arrays[name] = np.empty(shape, dtype=dtype)
+    return array
+
+
+# ============================================================================
+# MEMORY BENCHMARK
+# ============================================================================
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process in MB (resource module: Linux / macOS)."""
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024.0
+
+
+def _run_preprocessing(mode: str, iterations: int, crop_size: int, seed: int) -> Dict:
+    """Child-process body of benchmark_preprocessing_memory (one mode per process)."""
+    import os
+    import sys
+    import time
+    import tracemalloc
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.preprocessing import preprocess_pupil_stream, preprocess_iris_stream
+
+    rng = np.random.default_rng(seed)
+    crops = [rng.integers(0, 256, (crop_size, crop_size, 3), dtype=np.uint8) for _ in range(8)]
+    pool = InputBufferPool(batch_size=1)
+
+    def allocating(crop):
+        # Per-request tensors + batch dimension copies
+        pupil = np.expand_dims(preprocess_pupil_stream(crop), 0).copy()
+        iris = np.expand_dims(preprocess_iris_stream(crop), 0).copy()
+        return float(pupil[0, 0, 0, 0] + iris[0, 0, 0, 0])
+
+    def pooled(crop):
+        with pool.lease() as pupil, pool.lease() as iris:
+            preprocess_pupil_stream(crop, out=pupil[0])
+            preprocess_iris_stream(crop, out=iris[0])
+            return float(pupil[0, 0, 0, 0] + iris[0, 0, 0, 0])
+
+    step = pooled if mode == 'pooled' else allocating
+    step(crops[0])  # warm up scratch / pool
+
+    gc.collect()
+    rss_before = _peak_rss_mb()
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(iterations):
+        step(crops[i % len(crops)])
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+
+    rss_after = _peak_rss_mb()
+
+    return {
+        'peak_rss_mb': rss_after,
+        'peak_rss_growth_mb': rss_after - rss_before,
+        'traced_peak_kb': traced_peak / 1024.0,
+        'gc_collections': collections,
+        'ms_per_request': elapsed / iterations * 1000
+    }
+
+
+def benchmark_preprocessing_memory(iterations: int = 300, crop_size: int = 400, seed: int = 0) -> Dict:
+    """
+    Memory benchmark: allocating vs pooled preprocessing of one pupil + one iris crop.
+
+    Each mode runs in a fresh process so peak RSS is not shared. Linux/macOS
+    only (peak RSS comes from the resource module); raises RuntimeError on
+    Windows.
+
+    Returns:
+    --------
+    dict: {'allocating': {...}, 'pooled': {...}} with
+          'peak_rss_mb', 'peak_rss_growth_mb' (during the timed loop),
+          'traced_peak_kb' (tracemalloc peak inside the loop),
+          'gc_collections' and 'ms_per_request'
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import importlib.util
+    import multiprocessing
+
+    if importlib.util.find_spec('resource') is None:
+        raise RuntimeError("benchmark_preprocessing_memory needs the resource module "
+                           "(Linux/macOS); it is not available on this platform")
+
+    context = multiprocessing.get_context('spawn')
+    report = {}
+    for mode in ('allocating', 'pooled'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            report[mode] = executor.submit(_run_preprocessing, mode, iterations, crop_size, seed).result()
+    return report
+
+
+if __name__ == "__main__":
+    print("🧪 Preprocessing memory benchmark (allocating vs pooled)...")
+    try:
+        report = benchmark_preprocessing_memory()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    for mode, stats in report.items():
+        print(f"  {mode:10s} peak RSS {stats['peak_rss_mb']:7.1f} MB "
+              f"(+{stats['peak_rss_growth_mb']:.1f} in loop) | "
+              f"traced peak {stats['traced_peak_kb']:8.1f} KB | "
+              f"gc {stats['gc_collections']:3d} | {stats['ms_per_request']:.2f} ms/request")
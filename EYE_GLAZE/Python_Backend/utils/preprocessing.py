@@ -4,11 +4,123 @@ Utility functions for image preprocessing and feature extraction
 
 import cv2
 import numpy as np
-from typing import Tuple, Optional
-import tensorflow as tf
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional
 
+from .buffer_pool import get_scratch
+from .cv_cache import get_clahe, get_structuring_element
 
-def preprocess_eye_image(image: np.ndarray, target_size: Tuple[int, int] = (224, 224)) -> np.ndarray:
+
+# BlackHat kernel (matching training notebook), built once
+BLACKHAT_KERNEL = get_structuring_element(cv2.MORPH_ELLIPSE, (7, 7))
+
+
+def _new_five_channel(target_size: Tuple[int, int]) -> np.ndarray:
+    return np.zeros((target_size[1], target_size[0], 5), dtype=np.float32)
+
+
+def _resize_crop(image: np.ndarray, target_size: Tuple[int, int], bgr: np.ndarray,
+                 gray: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """
+    Resize a crop into bgr (H, W, 3 uint8) and optionally its grayscale into gray (H, W).
+    
+    Resizing commutes with the BGR->RGB swap / gray->RGB replication, so the
+    crop is resized in its own layout and the RGB order is applied when
+    normalising - no intermediate full-size copies.
+    """
+    if len(image.shape) == 3 and image.shape[2] == 3:
+        cv2.resize(image, target_size, dst=bgr)
+        if gray is not None:
+            cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY, dst=gray)
+        return gray
+    
+    # Grayscale to RGB (all three channels identical)
+    if len(image.shape) == 3:
+        if image.shape[2] != 1:
+            raise ValueError(f"Unsupported channel count: {image.shape[2]}")
+        image = image[:, :, 0]
+    resized = cv2.resize(image, target_size, dst=gray)
+    bgr[...] = resized[:, :, None]
+    return resized
+
+
+def _edge_texture_sources(gray: np.ndarray, edges: np.ndarray, black_hat: np.ndarray,
+                          clahe_dst: Optional[np.ndarray] = None):
+    """CLAHE -> Canny edges and BlackHat (uint8, matching training notebook) into edges / black_hat."""
+    # Apply CLAHE for better edge detection (matching training notebook)
+    clahe = get_clahe(2.0, (8, 8))
+    gray_clahe = clahe.apply(gray, dst=clahe_dst)
+    
+    # Canny edge detection (matching training notebook exactly!)
+    cv2.Canny(gray_clahe, 50, 150, edges=edges)
+    
+    # Black Hat morphological operation (dark structures - tension rings)
+    cv2.morphologyEx(gray_clahe, cv2.MORPH_BLACKHAT, BLACKHAT_KERNEL, dst=black_hat)
+
+
+def _normalise_black_hat(black_hat: np.ndarray, out: np.ndarray):
+    """
+    Per-image min-max scaling with epsilon (matching training notebook), in place.
+    
+    black_hat: (..., H, W) uint8, out: matching float32 view. Images with a
+    flat BlackHat response get all zeros.
+    """
+    black_hat_min = black_hat.min(axis=(-2, -1), keepdims=True).astype(np.float32)
+    black_hat_max = black_hat.max(axis=(-2, -1), keepdims=True).astype(np.float32)
+    black_hat_range = black_hat_max - black_hat_min
+    
+    epsilon = 1e-7
+    np.subtract(black_hat, black_hat_min, out=out)
+    np.divide(out, black_hat_range + epsilon, out=out)
+    np.clip(out, 0.0, 1.0, out=out)
+    out[np.broadcast_to(black_hat_range <= epsilon, out.shape)] = 0.0
+
+
+def preprocess_pupil_stream(image: np.ndarray, target_size: Tuple[int, int] = (224, 224),
+                            out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Preprocess a pupil crop for the pupil stream: RGB only, channels 3-4 ZEROED.
+    
+    **EXACT MATCH to training** (pupil stream never saw Canny/BlackHat), and
+    identical to preprocess_eye_image() with channels 3-4 zeroed - but CLAHE,
+    Canny and BlackHat are never computed.
+    
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        Input image in BGR format
+    target_size : tuple
+        Target size (height, width)
+    out : numpy.ndarray, optional
+        Preallocated float32 buffer of shape (H, W, 5) to write into
+    
+    Returns:
+    --------
+    numpy.ndarray: 5-channel image (RGB + 0 + 0) of shape (H, W, 5)
+    """
+    if out is None:
+        out = _new_five_channel(target_size)
+    
+    try:
+        width, height = target_size
+        bgr = get_scratch('resized_bgr', (height, width, 3))
+        # Color crops need no grayscale; grayscale crops are resized through it
+        gray = None if image.ndim == 3 and image.shape[2] == 3 else get_scratch('gray', (height, width))
+        _resize_crop(image, target_size, bgr, gray)
+        
+        # BGR -> RGB while normalising (uint8 / 255 is always within [0, 1])
+        np.divide(bgr[:, :, ::-1], np.float32(255.0), out=out[:, :, :3])
+        out[:, :, 3:] = 0.0
+    
+    except Exception as e:
+        print(f"❌ Error in preprocess_pupil_stream: {e}")
+        out[...] = 0.0
+    
+    return out
+
+
+def preprocess_iris_stream(image: np.ndarray, target_size: Tuple[int, int] = (224, 224),
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Preprocess eye image to 5-channel format (RGB + Canny + BlackHat).
     
@@ -25,72 +137,141 @@ def preprocess_eye_image(image: np.ndarray, target_size: Tuple[int, int] = (224,
         Input image in BGR format
     target_size : tuple
         Target size (height, width)
+    out : numpy.ndarray, optional
+        Preallocated float32 buffer of shape (H, W, 5) to write into
     
     Returns:
     --------
     numpy.ndarray: 5-channel image (RGB + Canny + BlackHat) of shape (H, W, 5)
     """
+    if out is None:
+        out = _new_five_channel(target_size)
+    
     try:
-        # Convert BGR to RGB
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            # Grayscale to RGB
-            rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-        
-        # Resize
-        rgb = cv2.resize(rgb, target_size)
-        
-        # Convert to grayscale for edge/texture detection
-        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
-        
-        # Apply CLAHE for better edge detection (matching training notebook)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        gray_clahe = clahe.apply(gray)
+        width, height = target_size
+        bgr = get_scratch('resized_bgr', (height, width, 3))
+        gray = _resize_crop(image, target_size, bgr, get_scratch('gray', (height, width)))
         
-        # Channel 4: Canny edge detection (matching training notebook exactly!)
-        edges = cv2.Canny(gray_clahe, 50, 150)
-        edge_channel = edges.astype(np.float32) / 255.0
-        edge_channel = np.clip(edge_channel, 0.0, 1.0)
+        # Channels 0-2: RGB (BGR -> RGB while normalising)
+        np.divide(bgr[:, :, ::-1], np.float32(255.0), out=out[:, :, :3])
         
-        # Channel 5: Black Hat morphological operation (dark structures - tension rings)
-        kernel_size = 7
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-        black_hat = cv2.morphologyEx(gray_clahe, cv2.MORPH_BLACKHAT, kernel)
+        # Channels 3-4 sources: Canny edges + BlackHat on the CLAHE image
+        edges = get_scratch('edges', (height, width))
+        black_hat = get_scratch('black_hat', (height, width))
+        _edge_texture_sources(gray, edges, black_hat, clahe_dst=get_scratch('clahe', (height, width)))
         
-        # Normalize with epsilon to prevent NaN (matching training notebook)
-        black_hat_float = black_hat.astype(np.float32)
-        black_hat_min, black_hat_max = black_hat_float.min(), black_hat_float.max()
+        # Channel 4: Canny edges
+        np.divide(edges, np.float32(255.0), out=out[:, :, 3])
         
-        epsilon = 1e-7
-        if (black_hat_max - black_hat_min) > epsilon:
-            texture_channel = (black_hat_float - black_hat_min) / (black_hat_max - black_hat_min + epsilon)
-        else:
-            texture_channel = np.zeros_like(black_hat_float)
-        
-        texture_channel = np.clip(texture_channel, 0.0, 1.0)
-        
-        # Stack channels: RGB (3) + Canny (1) + BlackHat (1) = 5 channels
-        # Matching training notebook exactly!
-        rgb_float = rgb.astype(np.float32) / 255.0
-        
-        five_channel = np.dstack([
-            rgb_float[:, :, 0],              # R
-            rgb_float[:, :, 1],              # G
-            rgb_float[:, :, 2],              # B
-            edge_channel,                     # Canny edges
-            texture_channel                   # BlackHat texture
-        ])
-        
-        # Final validation: ensure all values in [0,1] (matching training notebook)
-        five_channel = np.clip(five_channel, 0.0, 1.0)
-        
-        return five_channel.astype(np.float32)
+        # Channel 5: BlackHat, min-max normalised in place
+        _normalise_black_hat(black_hat, out[:, :, 4])
     
     except Exception as e:
-        print(f"❌ Error in preprocess_eye_image: {e}")
+        print(f"❌ Error in preprocess_iris_stream: {e}")
         # Return zero image if preprocessing fails
-        return np.zeros((target_size[0], target_size[1], 5), dtype=np.float32)
+        out[...] = 0.0
+    
+    return out
+
+
+def preprocess_eye_image(image: np.ndarray, target_size: Tuple[int, int] = (224, 224)) -> np.ndarray:
+    """
+    Preprocess eye image to 5-channel format (RGB + Canny + BlackHat).
+    
+    Stream-agnostic form of preprocess_iris_stream(). For model inputs use the
+    stream-aware functions: preprocess_pupil_stream() (RGB only) and
+    preprocess_iris_stream() (all 5 channels).
+    
+    Parameters:
+    -----------
+    image : numpy.ndarray
+        Input image in BGR format
+    target_size : tuple
+        Target size (height, width)
+    
+    Returns:
+    --------
+    numpy.ndarray: 5-channel image (RGB + Canny + BlackHat) of shape (H, W, 5)
+    """
+    return preprocess_iris_stream(image, target_size)
+
+
+def preprocess_eye_images_batch(crops: List[np.ndarray], target_size: Tuple[int, int] = (224, 224),
+                                stream: str = 'iris', out: Optional[np.ndarray] = None,
+                                max_workers: Optional[int] = None) -> np.ndarray:
+    """
+    Preprocess many crops at once (offline scoring, micro-batches).
+    
+    Per-image OpenCV work (resize, CLAHE, Canny, BlackHat) runs on a thread
+    pool - OpenCV releases the GIL - writing into shared uint8 stacks. RGB and
+    edge normalisation, per-image BlackHat min-max scaling and clipping then
+    run as whole-batch NumPy operations.
+    
+    Output matches preprocess_iris_stream() / preprocess_pupil_stream()
+    applied to each crop exactly (failed crops are all zeros, as there).
+    
+    Parameters:
+    -----------
+    crops : list of numpy.ndarray
+        Input crops in BGR (or grayscale) format, any sizes
+    target_size : tuple
+        Target size (height, width)
+    stream : str
+        'iris' (RGB + Canny + BlackHat) or 'pupil' (RGB only, channels 3-4 zeroed)
+    out : numpy.ndarray, optional
+        Preallocated float32 buffer of shape (N, H, W, 5), e.g. from an InputBufferPool
+    max_workers : int, optional
+        Thread pool size (default: ThreadPoolExecutor default)
+    
+    Returns:
+    --------
+    numpy.ndarray: 5-channel images of shape (N, H, W, 5)
+    """
+    if stream not in ('iris', 'pupil'):
+        raise ValueError(f"Unknown stream: {stream} (expected 'iris' or 'pupil')")
+    
+    n = len(crops)
+    width, height = target_size
+    if out is None:
+        out = np.empty((n, height, width, 5), dtype=np.float32)
+    if n == 0:
+        return out
+    
+    iris = stream == 'iris'
+    bgr = np.empty((n, height, width, 3), dtype=np.uint8)
+    gray = np.empty((n, height, width), dtype=np.uint8)
+    if iris:
+        edges = np.empty((n, height, width), dtype=np.uint8)
+        black_hat = np.empty((n, height, width), dtype=np.uint8)
+    ok = np.ones(n, dtype=bool)
+    
+    def process(index):
+        image = crops[index]
+        try:
+            color = image.ndim == 3 and image.shape[2] == 3
+            gray_i = _resize_crop(image, target_size, bgr[index],
+                                  gray[index] if iris or not color else None)
+            if iris:
+                _edge_texture_sources(gray_i, edges[index], black_hat[index])
+        except Exception as e:
+            print(f"❌ Error in preprocess_eye_images_batch (crop {index}): {e}")
+            ok[index] = False
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(process, range(n)))
+    
+    # Whole-batch normalisation
+    np.divide(bgr[..., ::-1], np.float32(255.0), out=out[..., :3])
+    if iris:
+        np.divide(edges, np.float32(255.0), out=out[..., 3])
+        _normalise_black_hat(black_hat, out[..., 4])
+    else:
+        out[..., 3:] = 0.0
+    
+    # Failed crops: zero image (as the single-image functions)
+    out[~ok] = 0.0
+    
+    return out
 
 
 def encode_age(age: int) -> np.ndarray:
@@ -204,6 +385,10 @@ def focal_loss(alpha=0.5, gamma=2.0):
     Lin, T. Y., Goyal, P., Girshick, R., He, K., & Dollár, P. (2017). 
     Focal loss for dense object detection. ICCV 2017.
     """
+    # TensorFlow is only needed for training/model loading - imported lazily
+    # so detection/preprocessing users never pay for it
+    import tensorflow as tf
+    
     def focal_loss_fixed(y_true, y_pred):
         """
         🔧 ROCK-SOLID Focal Loss implementation.
@@ -280,6 +465,8 @@ if __name__ == "__main__":
     print("🧪 Testing Utility Functions...")
     print("\n✅ Available functions:")
     print("  - preprocess_eye_image: Convert to 5-channel format")
+    print("  - preprocess_pupil_stream / preprocess_iris_stream: Stream-aware 5-channel inputs")
+    print("  - preprocess_eye_images_batch: Threaded, vectorized preprocessing of many crops")
     print("  - encode_age: One-hot encoding for age groups")
     print("  - extract_eye_region: Crop eye region from image")
     print("  - focal_loss: Focal loss for imbalanced classification")